@@ -28,11 +28,23 @@ def create_app(config_name='development'):
     from app.api.health import health_bp
     from app.api.csv_patients import csv_patients_bp
     from app.api.patients import patients_bp
+    from app.api.admin import admin_bp
     app.register_blueprint(api_bp, url_prefix='/api')
     app.register_blueprint(csv_risk_patients_bp, url_prefix='/api')
     app.register_blueprint(health_bp, url_prefix='/api')
     app.register_blueprint(csv_patients_bp, url_prefix='/api')
     app.register_blueprint(patients_bp, url_prefix='/api')
+    app.register_blueprint(admin_bp, url_prefix='/api')
+    
+    # Optional per-factor risk instrumentation
+    if app.config.get('RISK_METRICS_ENABLED'):
+        from app.services import RiskAssessmentService
+        RiskAssessmentService.enable_instrumentation()
+    
+    # Keep the weather cache warm so request handlers never call the weather API
+    if app.config.get('WEATHER_PREFETCH_ENABLED') and not app.testing:
+        from app.services.weather_prefetcher import init_weather_prefetcher
+        init_weather_prefetcher(app)
     
     # Register error handlers
     from app.errors import register_error_handlers
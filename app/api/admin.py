@@ -0,0 +1,62 @@
+from flask import Blueprint, request, jsonify
+from app.services import AIJobService, AIService, RiskAssessmentService, WeatherService
+from app.services.weather_prefetcher import get_prefetcher_status
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/admin/metrics', methods=['GET'])
+def get_metrics():
+    """Get internal performance metrics"""
+    try:
+        return jsonify({
+            'success': True,
+            'metrics': {
+                'risk_factors': RiskAssessmentService.get_factor_metrics(),
+                'weather_cache': WeatherService.get_cache_metrics(),
+                'weather_upstream': WeatherService.get_upstream_metrics(),
+                'weather_breakers': WeatherService.get_breaker_metrics(),
+                'weather_prefetcher': get_prefetcher_status(),
+                'ai_cache': AIService.get_cache_metrics(),
+                'ai_models': AIService.get_model_metrics(),
+                'ai_jobs': AIJobService.get_metrics()
+            },
+            'timestamp': datetime.utcnow().isoformat()
+        })
+    
+    except Exception as e:
+        logger.error(f"Error getting metrics: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to get metrics'
+        }), 500
+
+@admin_bp.route('/admin/metrics/risk-factors', methods=['POST'])
+def configure_risk_factor_metrics():
+    """Enable or disable per-factor risk instrumentation and optionally reset it"""
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        if 'enabled' in data:
+            if data['enabled']:
+                RiskAssessmentService.enable_instrumentation()
+            else:
+                RiskAssessmentService.disable_instrumentation()
+        
+        if data.get('reset', False):
+            RiskAssessmentService.factor_metrics.reset()
+        
+        return jsonify({
+            'success': True,
+            'risk_factors': RiskAssessmentService.get_factor_metrics()
+        })
+    
+    except Exception as e:
+        logger.error(f"Error configuring risk factor metrics: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to configure risk factor metrics'
+        }), 500
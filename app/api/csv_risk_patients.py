@@ -1,6 +1,7 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.models.csv_models import csv_manager
 from app.services import RiskAssessmentService, MessageService
+from app.utils.budget import LatencyBudget, add_budget_summary
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,6 +16,7 @@ def get_risk_patients():
         risk_level = request.args.get('risk_level')  # 'low', 'medium', 'high'
         location = request.args.get('location')  # zip_code
         include_ai_suggestions = request.args.get('include_ai_suggestions', 'false').lower() == 'true'
+        budget = LatencyBudget(request.args.get('ai_budget_ms', current_app.config.get('AI_BUDGET_MS', 0), type=int))
         
         # Get all patients and limit to first 10 for better performance
         all_patients = csv_manager.get_all_patients()
@@ -34,6 +36,7 @@ def get_risk_patients():
         
         # Analyze each patient
         risk_patients = []
+        assessed = []
         risk_distribution = {'low': 0, 'medium': 0, 'high': 0}
         patients_at_risk = 0
         
@@ -99,29 +102,23 @@ def get_risk_patients():
                     'updated_at': patient.updated_at.isoformat() if patient.updated_at else None
                 }
                 
-                # Add AI suggestions if requested
-                if include_ai_suggestions:
-                    try:
-                        from app.services.ai_service import AIService
-                        ai_suggestions = AIService.get_risk_recommendations(patient, risk_data)
-                        patient_info['ai_suggestions'] = ai_suggestions
-                    except Exception as e:
-                        logger.warning(f"Failed to get AI suggestions for patient {patient.id}: {e}")
-                        patient_info['ai_suggestions'] = {
-                            'error': 'AI suggestions unavailable',
-                            'fallback_recommendations': _get_fallback_recommendations(patient_risk_level, risk_data)
-                        }
-                
                 risk_patients.append(patient_info)
-                
+                assessed.append((patient, risk_data))
+            
             except Exception as e:
                 logger.warning(f"Error processing patient {patient.id}: {e}")
                 continue
         
+        # Add AI suggestions if requested
+        if include_ai_suggestions:
+            suggestions = _get_ai_suggestions_for_patients(assessed, budget)
+            for patient_info, ai_suggestions in zip(risk_patients, suggestions):
+                patient_info['ai_suggestions'] = ai_suggestions
+        
         return jsonify({
             'success': True,
             'risk_patients': risk_patients,
-            'summary': {
+            'summary': add_budget_summary({
                 'total_patients': len(risk_patients),
                 'total_available_patients': len(all_patients),
                 'patients_limited_to': 10,
@@ -132,7 +129,7 @@ def get_risk_patients():
                     'location': location,
                     'include_ai_suggestions': include_ai_suggestions
                 }
-            }
+            }, budget)
         })
         
     except Exception as e:
@@ -157,17 +154,8 @@ def get_patient_risk_details(patient_id):
         # Perform comprehensive risk assessment
         risk_data = RiskAssessmentService.assess_risk(patient)
         
-        # Get AI suggestions
-        ai_suggestions = None
-        try:
-            from app.services.ai_service import AIService
-            ai_suggestions = AIService.get_risk_recommendations(patient, risk_data)
-        except Exception as e:
-            logger.warning(f"Failed to get AI suggestions for patient {patient_id}: {e}")
-            ai_suggestions = {
-                'error': 'AI suggestions unavailable',
-                'fallback_recommendations': _get_fallback_recommendations(risk_data['risk_level'], risk_data)
-            }
+        # Get AI suggestions (queued in the background with async_ai=true)
+        ai_suggestions = _get_ai_suggestions_for_patients([(patient, risk_data)])[0]
         
         # Get risk assessment history
         risk_history = csv_manager.get_risk_assessments_by_patient(patient_id)
@@ -315,20 +303,10 @@ def get_comprehensive_risk_assessment(patient_id):
         # Get comprehensive risk assessment
         comprehensive_risk = RiskAssessmentService.get_comprehensive_risk_assessment(patient)
         
-        # Add AI suggestions if available
-        try:
-            from app.services.ai_service import AIService
-            ai_suggestions = AIService.get_risk_recommendations(patient, comprehensive_risk['basic_risk'])
-            comprehensive_risk['ai_suggestions'] = ai_suggestions
-        except Exception as e:
-            logger.warning(f"Failed to get AI suggestions for patient {patient_id}: {e}")
-            comprehensive_risk['ai_suggestions'] = {
-                'error': 'AI suggestions unavailable',
-                'fallback_recommendations': _get_fallback_recommendations(
-                    comprehensive_risk['basic_risk']['risk_level'], 
-                    comprehensive_risk['basic_risk']
-                )
-            }
+        # Add AI suggestions if available (queued in the background with async_ai=true)
+        comprehensive_risk['ai_suggestions'] = _get_ai_suggestions_for_patients(
+            [(patient, comprehensive_risk['basic_risk'])]
+        )[0]
         
         return jsonify({
             'success': True,
@@ -342,39 +320,75 @@ def get_comprehensive_risk_assessment(patient_id):
             'error': 'Failed to get comprehensive risk assessment'
         }), 500
 
-def _get_fallback_recommendations(risk_level, risk_data):
-    """Get fallback recommendations when AI service is unavailable"""
-    recommendations = []
+@csv_risk_patients_bp.route('/ai-suggestions/<job_id>', methods=['GET'])
+def get_ai_suggestions_job(job_id):
+    """Get the state and, once finished, the result of a background AI suggestions job"""
+    try:
+        from app.services.ai_job_service import AIJobService
+        
+        job = AIJobService.get_job(job_id)
+        if job is None:
+            return jsonify({
+                'success': False,
+                'error': 'Job not found'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'job': job
+        })
     
-    if risk_level == 'high':
-        recommendations.extend([
-            "Immediate medical consultation recommended",
-            "Monitor vital signs closely",
-            "Avoid extreme weather conditions",
-            "Ensure emergency contact is available"
-        ])
-    elif risk_level == 'medium':
-        recommendations.extend([
-            "Regular medical check-ups recommended",
-            "Monitor symptoms closely",
-            "Follow prescribed medication schedule",
-            "Maintain healthy lifestyle"
-        ])
-    else:
-        recommendations.extend([
-            "Continue regular prenatal care",
-            "Maintain healthy diet and exercise",
-            "Stay hydrated",
-            "Regular medical check-ups"
-        ])
+    except Exception as e:
+        logger.error(f"Error getting AI suggestions job: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to get AI suggestions job'
+        }), 500
+
+def _get_ai_suggestions_for_patients(patients_with_risk, budget=None):
+    """Get `ai_suggestions` values for (patient, risk_data) pairs, in order
     
-    # Add weather-specific recommendations
-    if risk_data.get('heat_wave_risk', False):
-        recommendations.extend([
-            "Stay indoors during peak heat hours",
-            "Ensure adequate hydration",
-            "Use air conditioning if available",
-            "Wear light, loose clothing"
-        ])
+    With the job queue enabled, finished results are returned and the rest are
+    queued and answered with the rule-based fallback plus a job id; otherwise
+    the AI is called concurrently and the request waits for it, up to the
+    LatencyBudget if one is given (entries it cuts off are flagged `ai_skipped`).
+    """
+    from app.services.ai_service import AIService
+    from app.services.ai_job_service import AIJobService
     
-    return recommendations
+    fallbacks = [_get_fallback_recommendations(risk_data['risk_level'], risk_data) for _, risk_data in patients_with_risk]
+    try:
+        if AIJobService.is_enabled(request.args.get('async_ai'), request.args.get('ai_budget_ms')):
+            jobs = AIJobService.submit_recommendations_for_patients(patients_with_risk)
+            return [AIJobService.describe(job, fallback) for job, fallback in zip(jobs, fallbacks)]
+        if budget is not None:
+            suggestions, skipped = AIService.get_risk_recommendations_within_budget(patients_with_risk, budget)
+        else:
+            suggestions = AIService.get_risk_recommendations_for_patients(patients_with_risk)
+            skipped = [False] * len(patients_with_risk)
+    except Exception as e:
+        logger.warning(f"Failed to get AI suggestions for {len(patients_with_risk)} patients: {e}")
+        suggestions, skipped = [None] * len(patients_with_risk), [False] * len(patients_with_risk)
+    
+    results = []
+    for ai_suggestions, was_skipped, fallback in zip(suggestions, skipped, fallbacks):
+        if was_skipped:
+            results.append({
+                'ai_skipped': True,
+                'reason': 'AI latency budget exhausted',
+                'fallback_recommendations': fallback
+            })
+        elif ai_suggestions is None:
+            results.append({
+                'error': 'AI suggestions unavailable',
+                'fallback_recommendations': fallback
+            })
+        else:
+            results.append(ai_suggestions)
+    return results
+
+def _get_fallback_recommendations(risk_level, risk_data):
+    """Get fallback recommendations when AI service is unavailable"""
+    from app.services.recommendation_engine import RecommendationEngine
+    return RecommendationEngine.get_fallback_recommendations(risk_level, risk_data, 'en')
+
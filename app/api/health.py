@@ -124,6 +124,9 @@ def get_environment_metrics():
                 }
             })
         
+        # Fetch weather for every distinct location at once instead of one blocking call per patient
+        weather_batch = WeatherService.get_weather_for_zips([patient.zip_code for patient in patients])
+        
         # Analyze environment conditions
         patients_at_risk = []
         extreme_heat_count = 0
@@ -133,7 +136,7 @@ def get_environment_metrics():
         for patient in patients:
             try:
                 # Get weather data for patient's location
-                weather_data = WeatherService.get_weather_data(patient.zip_code)
+                weather_data = weather_batch.weather.get(patient.zip_code) or WeatherService._get_default_weather_data()
                 
                 # Check for extreme heat conditions
                 is_extreme_heat = weather_data.get('is_heat_wave', False) or weather_data.get('temperature', 0) > 35
@@ -185,6 +188,7 @@ def get_environment_metrics():
                 'extreme_heat_conditions': extreme_heat_count,
                 'risk_distribution': risk_distribution,
                 'weather_conditions': weather_conditions,
+                'weather_unavailable_locations': weather_batch.failed,
                 'at_risk_patients': patients_at_risk
             },
             'timestamp': datetime.utcnow().isoformat()
@@ -273,6 +277,63 @@ def get_environment_metrics_by_location(zip_code):
             'error': f'Failed to get environment metrics for location {zip_code}'
         }), 500
 
+@health_bp.route('/heat-exposure', methods=['GET'])
+def get_heat_exposure():
+    """Get forecast heat exposure for all cached locations, weighted by patient count"""
+    try:
+        from app.models.csv_models import csv_manager
+        
+        days = request.args.get('days', 5, type=int)
+        
+        # Count patients per weather location; zips without local coordinates are not geocoded here
+        zip_counts = {}
+        for patient in csv_manager.get_all_patients():
+            if patient.zip_code:
+                zip_counts[patient.zip_code] = zip_counts.get(patient.zip_code, 0) + 1
+        patient_counts = {}
+        unresolved = []
+        for location_key, location_zips in WeatherService.group_zips_by_location(zip_counts, fetch=False).items():
+            if location_key.startswith('zip:'):
+                unresolved.extend(location_zips)
+            else:
+                patient_counts[location_key] = sum(zip_counts[zip_code] for zip_code in location_zips)
+        
+        heat_exposure = WeatherService.get_heat_exposure(days, patient_counts)
+        heat_exposure['unresolved_zip_codes'] = sorted(unresolved)
+        
+        return jsonify({
+            'success': True,
+            'heat_exposure': heat_exposure,
+            'timestamp': datetime.utcnow().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting heat exposure: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to get heat exposure'
+        }), 500
+
+@health_bp.route('/heat-waves/upcoming', methods=['GET'])
+def get_upcoming_heat_waves():
+    """Get patients whose location crosses the heat-wave threshold within the next N hours"""
+    try:
+        from app.services import HeatWaveService
+        
+        hours = request.args.get('hours', 72, type=int)
+        return jsonify({
+            'success': True,
+            'upcoming_heat_waves': HeatWaveService.get_patients_facing_heat_wave(hours),
+            'timestamp': datetime.utcnow().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting upcoming heat waves: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to get upcoming heat waves'
+        }), 500
+
 @health_bp.route('/weather-forecast/<zip_code>', methods=['GET'])
 def get_weather_forecast(zip_code):
     """Get weather forecast for a zip code"""
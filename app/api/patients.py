@@ -1,11 +1,16 @@
-from flask import Blueprint, request, jsonify, Response, stream_template
+from flask import Blueprint, request, jsonify, Response, current_app, stream_template, stream_with_context
 from app.extensions import db
 from app.models import Patient
 from app.schemas import PatientCreateSchema, PatientUpdateSchema, PatientResponseSchema
 from marshmallow import ValidationError
 from app.utils.exceptions import ValidationException
+from app.utils.budget import LatencyBudget, add_budget_summary
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import json
+import math
+import queue
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -227,6 +232,7 @@ def get_all_patients_with_risks():
     try:
         from app.models.csv_models import csv_manager
         from app.services import RiskAssessmentService
+        from app.services.ai_job_service import AIJobService
         
         # Get query parameters
         page = request.args.get('page', 1, type=int)
@@ -236,6 +242,8 @@ def get_all_patients_with_risks():
         include_ai_suggestions = request.args.get('include_ai_suggestions', 'true').lower() == 'true'
         include_notifications = request.args.get('include_notifications', 'true').lower() == 'true'
         no_pagination = request.args.get('no_pagination', 'false').lower() == 'true'  # Get all patients without pagination
+        async_ai = AIJobService.is_enabled(request.args.get('async_ai'), request.args.get('ai_budget_ms'))  # Queue AI suggestions instead of waiting
+        budget = _get_ai_budget()
         
         # Get all patients from CSV
         all_patients = csv_manager.get_all_patients()
@@ -244,8 +252,9 @@ def get_all_patients_with_risks():
         if location:
             all_patients = [p for p in all_patients if p.zip_code == location]
         
-        # Process ALL patients with comprehensive data (no pagination limit)
-        patients_data = []
+        # Assess ALL patients (risk filter and summary need them); AI suggestions,
+        # notifications and history are only added to the page that is returned
+        patient_entries = []
         risk_distribution = {'low': 0, 'medium': 0, 'high': 0}
         patients_at_risk = 0
         
@@ -307,47 +316,18 @@ def get_all_patients_with_risks():
                     'updated_at': patient.updated_at.isoformat() if patient.updated_at else None
                 }
                 
-                # Add AI suggestions if requested
-                if include_ai_suggestions:
-                    try:
-                        from app.services.ai_service import AIService
-                        ai_suggestions = AIService.get_risk_recommendations(patient, risk_data)
-                        patient_info['ai_suggestions'] = ai_suggestions
-                    except Exception as e:
-                        logger.warning(f"Failed to get AI suggestions for patient {patient.id}: {e}")
-                        patient_info['ai_suggestions'] = {
-                            'error': 'AI suggestions unavailable',
-                            'fallback_recommendations': _get_fallback_recommendations(patient_risk_level, risk_data)
-                        }
-                
-                # Add notifications if requested
-                if include_notifications:
-                    try:
-                        notifications = csv_manager.get_notifications_by_patient(patient.id)
-                        patient_info['notifications'] = [n.to_dict() for n in notifications]
-                    except Exception as e:
-                        logger.warning(f"Failed to get notifications for patient {patient.id}: {e}")
-                        patient_info['notifications'] = []
-                
-                # Add risk assessment history
-                try:
-                    risk_history = csv_manager.get_risk_assessments_by_patient(patient.id)
-                    patient_info['risk_history'] = [ra.to_dict() for ra in risk_history]
-                except Exception as e:
-                    logger.warning(f"Failed to get risk history for patient {patient.id}: {e}")
-                    patient_info['risk_history'] = []
-                
-                patients_data.append(patient_info)
-                
+                patient_entries.append((patient, risk_data, patient_info))
+            
             except Exception as e:
                 logger.warning(f"Error processing patient {patient.id}: {e}")
                 continue
         
         # Apply pagination to processed data (unless no_pagination is true)
-        total_processed = len(patients_data)
+        total_processed = len(patient_entries)
         
         if no_pagination:
             # Return all patients without pagination
+            patients_data = _enrich_patients(patient_entries, include_ai_suggestions, include_notifications, async_ai, budget)
             return jsonify({
                 'success': True,
                 'patients': patients_data,
@@ -360,7 +340,7 @@ def get_all_patients_with_risks():
                     'has_prev': False,
                     'no_pagination': True
                 },
-                'summary': {
+                'summary': add_budget_summary({
                     'total_patients': total_processed,
                     'total_processed_patients': total_processed,
                     'total_available_patients': len(all_patients),
@@ -371,15 +351,18 @@ def get_all_patients_with_risks():
                         'location': location,
                         'include_ai_suggestions': include_ai_suggestions,
                         'include_notifications': include_notifications,
+                        'async_ai': async_ai,
                         'no_pagination': True
                     }
-                }
+                }, budget)
             })
         else:
             # Apply pagination
             start_idx = (page - 1) * per_page
             end_idx = start_idx + per_page
-            paginated_patients = patients_data[start_idx:end_idx]
+            paginated_patients = _enrich_patients(
+                patient_entries[start_idx:end_idx], include_ai_suggestions, include_notifications, async_ai, budget
+            )
             
             return jsonify({
                 'success': True,
@@ -393,7 +376,7 @@ def get_all_patients_with_risks():
                     'has_prev': page > 1,
                     'no_pagination': False
                 },
-                'summary': {
+                'summary': add_budget_summary({
                     'total_patients': len(paginated_patients),
                     'total_processed_patients': total_processed,
                     'total_available_patients': len(all_patients),
@@ -404,9 +387,10 @@ def get_all_patients_with_risks():
                         'location': location,
                         'include_ai_suggestions': include_ai_suggestions,
                         'include_notifications': include_notifications,
+                        'async_ai': async_ai,
                         'no_pagination': False
                     }
-                }
+                }, budget)
             })
         
     except Exception as e:
@@ -416,42 +400,160 @@ def get_all_patients_with_risks():
             'error': 'Failed to get patients with risks'
         }), 500
 
-def _get_fallback_recommendations(risk_level, risk_data):
-    """Get fallback recommendations when AI service is unavailable"""
-    recommendations = []
+def _enrich_patients(patient_entries, include_ai_suggestions, include_notifications, async_ai=False, budget=None):
+    """Add AI suggestions, notifications and risk history to (patient, risk_data, patient_info) entries
+    
+    AI suggestions for all entries are requested concurrently, or queued as
+    background jobs when `async_ai` is set (fallbacks plus a job id are returned
+    until they finish); the returned patient dicts keep the order of the entries.
+    With a LatencyBudget, entries left when it runs out get fallbacks flagged `ai_skipped`.
+    """
+    from app.models.csv_models import csv_manager
+    
+    if include_ai_suggestions:
+        from app.services.ai_service import AIService
+        from app.services.ai_job_service import AIJobService
+        
+        pairs = [(patient, risk_data) for patient, risk_data, _ in patient_entries]
+        skipped = [False] * len(pairs)
+        try:
+            if async_ai:
+                jobs = AIJobService.submit_recommendations_for_patients(pairs)
+            elif budget is not None:
+                suggestions, skipped = AIService.get_risk_recommendations_within_budget(pairs, budget)
+            else:
+                suggestions = AIService.get_risk_recommendations_for_patients(pairs)
+        except Exception as e:
+            logger.warning(f"Failed to get AI suggestions for {len(pairs)} patients: {e}")
+            async_ai, suggestions = False, [None] * len(pairs)
+        
+        for index, (patient, risk_data, patient_info) in enumerate(patient_entries):
+            fallback = _get_fallback_recommendations(patient_info['risk_level'], risk_data)
+            if async_ai:
+                patient_info['ai_suggestions'] = AIJobService.describe(jobs[index], fallback)
+            elif skipped[index]:
+                patient_info['ai_suggestions'] = {
+                    'ai_skipped': True,
+                    'reason': 'AI latency budget exhausted',
+                    'fallback_recommendations': fallback
+                }
+            elif suggestions[index] is None:
+                patient_info['ai_suggestions'] = {
+                    'error': 'AI suggestions unavailable',
+                    'fallback_recommendations': fallback
+                }
+            else:
+                patient_info['ai_suggestions'] = suggestions[index]
+    
+    patients_data = []
+    for patient, risk_data, patient_info in patient_entries:
+        # Add notifications if requested
+        if include_notifications:
+            try:
+                notifications = csv_manager.get_notifications_by_patient(patient.id)
+                patient_info['notifications'] = [n.to_dict() for n in notifications]
+            except Exception as e:
+                logger.warning(f"Failed to get notifications for patient {patient.id}: {e}")
+                patient_info['notifications'] = []
+        
+        # Add risk assessment history
+        try:
+            risk_history = csv_manager.get_risk_assessments_by_patient(patient.id)
+            patient_info['risk_history'] = [ra.to_dict() for ra in risk_history]
+        except Exception as e:
+            logger.warning(f"Failed to get risk history for patient {patient.id}: {e}")
+            patient_info['risk_history'] = []
+        
+        patients_data.append(patient_info)
+    
+    return patients_data
+
+def _stream_ai_suggestions(patient_entries, budget):
+    """Yield `ai_partial`/`ai_complete` stream events for (patient, risk_data, patient_info) entries
+    
+    The model answers for all entries are streamed concurrently on a bounded
+    pool and their events are yielded as they arrive, so partial text appears
+    while slower answers are still being generated. Every entry ends with one
+    `ai_complete` event; failed answers carry the fallback recommendations and
+    answers cut off by the LatencyBudget are flagged `ai_skipped`.
+    """
+    from app.services.ai_service import AIService
+    
+    if not patient_entries:
+        return
+    
+    app = current_app._get_current_object()
+    config = current_app.config
+    events = queue.Queue()
+    pending = {patient.id: (risk_data, patient_info['risk_level']) for patient, risk_data, patient_info in patient_entries}
+    completed = 0
+    
+    def stream(patient, risk_data):
+        with app.app_context():
+            try:
+                for event in AIService.stream_risk_recommendations(patient, risk_data):
+                    events.put(dict(event, patient_id=patient.id))
+            except Exception as e:
+                logger.warning(f"Failed to stream AI suggestions for patient {patient.id}: {e}")
+                events.put({'type': 'ai_failed', 'patient_id': patient.id})
+    
+    workers = max(1, min(config.get('AI_ENRICHMENT_MAX_WORKERS', 8), len(patient_entries)))
+    timeout_at = time.monotonic() + config.get('AI_ENRICHMENT_CALL_TIMEOUT', 15) * math.ceil(len(patient_entries) / workers)
+    if budget.deadline is not None:
+        timeout_at = min(timeout_at, budget.deadline)
     
-    if risk_level == 'high':
-        recommendations.extend([
-            "Немедленная консультация с врачом рекомендуется",
-            "Тщательно следите за жизненными показателями",
-            "Избегайте экстремальных погодных условий",
-            "Убедитесь, что экстренный контакт доступен"
-        ])
-    elif risk_level == 'medium':
-        recommendations.extend([
-            "Рекомендуются регулярные медицинские осмотры",
-            "Внимательно следите за симптомами",
-            "Соблюдайте предписанный график приема лекарств",
-            "Ведите здоровый образ жизни"
-        ])
-    else:
-        recommendations.extend([
-            "Продолжайте регулярное дородовое наблюдение",
-            "Поддерживайте здоровую диету и физические упражнения",
-            "Пейте достаточно воды",
-            "Регулярные медицинские осмотры"
-        ])
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ai-stream')
+    try:
+        if not budget.expired():
+            for patient, risk_data, _ in patient_entries:
+                executor.submit(stream, patient, risk_data)
+        
+        while pending:
+            try:
+                event = events.get(timeout=max(0, timeout_at - time.monotonic()))
+            except queue.Empty:
+                break
+            
+            if event['type'] == 'ai_partial':
+                yield event
+                continue
+            
+            risk_data, risk_level = pending.pop(event['patient_id'])
+            if event['type'] == 'ai_failed':
+                event = {
+                    'type': 'ai_complete',
+                    'patient_id': event['patient_id'],
+                    'ai_suggestions': {
+                        'error': 'AI suggestions unavailable',
+                        'fallback_recommendations': _get_fallback_recommendations(risk_level, risk_data)
+                    }
+                }
+            else:
+                completed += 1
+            yield event
+    finally:
+        # Answers still streaming finish in the background and fill the recommendation cache
+        executor.shutdown(wait=False, cancel_futures=True)
     
-    # Add weather-specific recommendations
-    if risk_data.get('heat_wave_risk', False):
-        recommendations.extend([
-            "Оставайтесь в помещении в часы пиковой жары",
-            "Обеспечьте адекватную гидратацию",
-            "Используйте кондиционер, если доступен",
-            "Носите легкую, свободную одежду"
-        ])
+    out_of_budget = budget.expired()
+    for patient_id, (risk_data, risk_level) in pending.items():
+        fallback = _get_fallback_recommendations(risk_level, risk_data)
+        if out_of_budget:
+            ai_suggestions = {'ai_skipped': True, 'reason': 'AI latency budget exhausted', 'fallback_recommendations': fallback}
+        else:
+            ai_suggestions = {'error': 'AI suggestions unavailable', 'fallback_recommendations': fallback}
+        yield {'type': 'ai_complete', 'patient_id': patient_id, 'ai_suggestions': ai_suggestions}
     
-    return recommendations
+    budget.record(completed=completed, skipped=len(pending) if out_of_budget else 0)
+
+def _get_ai_budget():
+    """Latency budget for this request's AI suggestions: `ai_budget_ms`, else AI_BUDGET_MS"""
+    return LatencyBudget(request.args.get('ai_budget_ms', current_app.config.get('AI_BUDGET_MS', 0), type=int))
+
+def _get_fallback_recommendations(risk_level, risk_data):
+    """Get fallback recommendations when AI service is unavailable"""
+    from app.services.recommendation_engine import RecommendationEngine
+    return RecommendationEngine.get_fallback_recommendations(risk_level, risk_data, 'ru')
 
 @patients_bp.route('/patients/statistics', methods=['GET'])
 def get_patients_statistics():
@@ -632,6 +734,8 @@ def get_all_patients_with_risks_stream():
         include_ai_suggestions = request.args.get('include_ai_suggestions', 'true').lower() == 'true'
         include_notifications = request.args.get('include_notifications', 'true').lower() == 'true'
         batch_size = request.args.get('batch_size', 10, type=int)  # Number of patients per batch
+        ai_stream = request.args.get('ai_stream', 'false').lower() == 'true'  # Send records first, then streamed AI events
+        budget = _get_ai_budget()  # Shared by all batches of the stream
         
         def generate_patients():
             try:
@@ -651,12 +755,13 @@ def get_all_patients_with_risks_stream():
                         'risk_level': risk_level,
                         'location': location,
                         'include_ai_suggestions': include_ai_suggestions,
-                        'include_notifications': include_notifications
+                        'include_notifications': include_notifications,
+                        'ai_stream': ai_stream
                     }
                 }) + '\n'
                 
                 # Process patients in batches
-                patients_data = []
+                patient_entries = []
                 risk_distribution = {'low': 0, 'medium': 0, 'high': 0}
                 patients_at_risk = 0
                 processed_count = 0
@@ -719,64 +824,53 @@ def get_all_patients_with_risks_stream():
                             'updated_at': patient.updated_at.isoformat() if patient.updated_at else None
                         }
                         
-                        # Add AI suggestions if requested
-                        if include_ai_suggestions:
-                            try:
-                                from app.services.ai_service import AIService
-                                ai_suggestions = AIService.get_risk_recommendations(patient, risk_data)
-                                patient_info['ai_suggestions'] = ai_suggestions
-                            except Exception as e:
-                                logger.warning(f"Failed to get AI suggestions for patient {patient.id}: {e}")
-                                patient_info['ai_suggestions'] = {
-                                    'error': 'AI suggestions unavailable',
-                                    'fallback_recommendations': _get_fallback_recommendations(patient_risk_level, risk_data)
-                                }
-                        
-                        # Add notifications if requested
-                        if include_notifications:
-                            try:
-                                notifications = csv_manager.get_notifications_by_patient(patient.id)
-                                patient_info['notifications'] = [n.to_dict() for n in notifications]
-                            except Exception as e:
-                                logger.warning(f"Failed to get notifications for patient {patient.id}: {e}")
-                                patient_info['notifications'] = []
-                        
-                        # Add risk assessment history
-                        try:
-                            risk_history = csv_manager.get_risk_assessments_by_patient(patient.id)
-                            patient_info['risk_history'] = [ra.to_dict() for ra in risk_history]
-                        except Exception as e:
-                            logger.warning(f"Failed to get risk history for patient {patient.id}: {e}")
-                            patient_info['risk_history'] = []
-                        
-                        patients_data.append(patient_info)
+                        patient_entries.append((patient, risk_data, patient_info))
                         processed_count += 1
                         
-                        # Send batch when batch_size is reached
-                        if len(patients_data) >= batch_size:
+                        if ai_stream:
+                            # Send the record right away; the batch's AI events follow it
                             yield json.dumps({
-                                'type': 'batch',
-                                'patients': patients_data,
+                                'type': 'patient',
+                                'patient': _enrich_patients([(patient, risk_data, patient_info)], False, include_notifications)[0],
                                 'processed_count': processed_count,
                                 'total_patients': len(all_patients)
                             }) + '\n'
-                            patients_data = []
+                            if include_ai_suggestions and len(patient_entries) >= batch_size:
+                                for event in _stream_ai_suggestions(patient_entries, budget):
+                                    yield json.dumps(event) + '\n'
+                            if len(patient_entries) >= batch_size:
+                                patient_entries = []
+                            continue
                         
+                        # Send batch when batch_size is reached (its AI calls run concurrently)
+                        if len(patient_entries) >= batch_size:
+                            yield json.dumps({
+                                'type': 'batch',
+                                'patients': _enrich_patients(patient_entries, include_ai_suggestions, include_notifications, budget=budget),
+                                'processed_count': processed_count,
+                                'total_patients': len(all_patients)
+                            }) + '\n'
+                            patient_entries = []
+                    
                     except Exception as e:
                         logger.warning(f"Error processing patient {patient.id}: {e}")
                         continue
                 
                 # Send remaining patients
-                if patients_data:
+                if patient_entries and ai_stream:
+                    if include_ai_suggestions:
+                        for event in _stream_ai_suggestions(patient_entries, budget):
+                            yield json.dumps(event) + '\n'
+                elif patient_entries:
                     yield json.dumps({
                         'type': 'batch',
-                        'patients': patients_data,
+                        'patients': _enrich_patients(patient_entries, include_ai_suggestions, include_notifications, budget=budget),
                         'processed_count': processed_count,
                         'total_patients': len(all_patients)
                     }) + '\n'
                 
                 # Send final summary
-                yield json.dumps({
+                yield json.dumps(add_budget_summary({
                     'type': 'summary',
                     'total_processed': processed_count,
                     'total_available_patients': len(all_patients),
@@ -786,10 +880,11 @@ def get_all_patients_with_risks_stream():
                         'risk_level': risk_level,
                         'location': location,
                         'include_ai_suggestions': include_ai_suggestions,
-                        'include_notifications': include_notifications
+                        'include_notifications': include_notifications,
+                        'ai_stream': ai_stream
                     }
-                }) + '\n'
-                
+                }, budget)) + '\n'
+            
             except Exception as e:
                 logger.error(f"Error in stream generation: {e}")
                 yield json.dumps({
@@ -798,7 +893,7 @@ def get_all_patients_with_risks_stream():
                 }) + '\n'
         
         return Response(
-            generate_patients(),
+            stream_with_context(generate_patients()),
             mimetype='application/x-ndjson',
             headers={
                 'Cache-Control': 'no-cache',
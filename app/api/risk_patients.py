@@ -254,40 +254,8 @@ def get_risk_summary():
 
 def _get_fallback_recommendations(risk_level, risk_data):
     """Get fallback recommendations when AI service is unavailable"""
-    recommendations = []
-    
-    if risk_level == 'high':
-        recommendations.extend([
-            "Immediate medical consultation recommended",
-            "Monitor vital signs closely",
-            "Avoid extreme weather conditions",
-            "Ensure emergency contact is available"
-        ])
-    elif risk_level == 'medium':
-        recommendations.extend([
-            "Regular medical check-ups recommended",
-            "Monitor symptoms closely",
-            "Follow prescribed medication schedule",
-            "Maintain healthy lifestyle"
-        ])
-    else:
-        recommendations.extend([
-            "Continue regular prenatal care",
-            "Maintain healthy diet and exercise",
-            "Stay hydrated",
-            "Regular medical check-ups"
-        ])
-    
-    # Add weather-specific recommendations
-    if risk_data.get('heat_wave_risk', False):
-        recommendations.extend([
-            "Stay indoors during peak heat hours",
-            "Ensure adequate hydration",
-            "Use air conditioning if available",
-            "Wear light, loose clothing"
-        ])
-    
-        return recommendations
+    from app.services.recommendation_engine import RecommendationEngine
+    return RecommendationEngine.get_fallback_recommendations(risk_level, risk_data, 'en')
 
 @risk_patients_bp.route('/risk-patients/<int:patient_id>/comprehensive', methods=['GET'])
 def get_comprehensive_risk_assessment(patient_id):
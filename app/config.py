@@ -10,7 +10,99 @@ class Config:
     # External APIs
     GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
     GEMINI_MODEL = os.environ.get('GEMINI_MODEL', 'gemini-2.0-flash-exp')
+    # Point at a local stub (benchmarks/gemini_stub.py, with GEMINI_TRANSPORT=rest) to run without Gemini
+    GEMINI_API_ENDPOINT = os.environ.get('GEMINI_API_ENDPOINT')
+    GEMINI_TRANSPORT = os.environ.get('GEMINI_TRANSPORT')
+    # Low/medium-risk AI calls use the fast model; high-risk calls use GEMINI_MODEL unless its
+    # recent p95 latency (ms, over at least AI_ROUTING_MIN_SAMPLES calls) is over the threshold
+    GEMINI_FAST_MODEL = os.environ.get('GEMINI_FAST_MODEL', 'gemini-1.5-flash-8b')
+    AI_ROUTING_ENABLED = os.environ.get('AI_ROUTING_ENABLED', 'true').lower() == 'true'
+    AI_ROUTING_P95_THRESHOLD_MS = int(os.environ.get('AI_ROUTING_P95_THRESHOLD_MS', 8000))
+    AI_ROUTING_MIN_SAMPLES = int(os.environ.get('AI_ROUTING_MIN_SAMPLES', 20))
+    # Send a duplicate AI request once the first is slower than the model's recent p90 latency
+    # (over at least AI_HEDGE_MIN_SAMPLES calls); hedges are capped at AI_HEDGE_MAX_RATIO of calls
+    AI_HEDGING_ENABLED = os.environ.get('AI_HEDGING_ENABLED', 'false').lower() == 'true'
+    AI_HEDGE_MAX_RATIO = float(os.environ.get('AI_HEDGE_MAX_RATIO', 0.1))
+    AI_HEDGE_MIN_SAMPLES = int(os.environ.get('AI_HEDGE_MIN_SAMPLES', 20))
+    AI_HEDGE_MIN_DELAY_MS = int(os.environ.get('AI_HEDGE_MIN_DELAY_MS', 100))
+    AI_HEDGE_WORKERS = int(os.environ.get('AI_HEDGE_WORKERS', 16))
     WEATHER_API_KEY = os.environ.get('WEATHER_API_KEY')
+    # Point at a local stub (benchmarks/weather_stub.py) to run without OpenWeatherMap
+    WEATHER_API_BASE_URL = os.environ.get('WEATHER_API_BASE_URL', 'http://api.openweathermap.org')
+    
+    # Shared cache (SQLite file used by all worker processes)
+    CACHE_DB_PATH = os.environ.get('CACHE_DB_PATH', 'instance/cache.sqlite3')
+    WEATHER_CACHE_TTL = int(os.environ.get('WEATHER_CACHE_TTL', 600))
+    WEATHER_CACHE_FALLBACK_TTL = int(os.environ.get('WEATHER_CACHE_FALLBACK_TTL', 60))
+    # Expired weather is still served (marked stale) for this many seconds while it refreshes in the background
+    WEATHER_MAX_STALENESS = int(os.environ.get('WEATHER_MAX_STALENESS', 3600))
+    
+    # Weather HTTP client (pooled keep-alive session per worker)
+    WEATHER_HTTP_POOL_SIZE = int(os.environ.get('WEATHER_HTTP_POOL_SIZE', 10))
+    WEATHER_HTTP_RETRIES = int(os.environ.get('WEATHER_HTTP_RETRIES', 2))
+    WEATHER_HTTP_BACKOFF = float(os.environ.get('WEATHER_HTTP_BACKOFF', 0.3))
+    WEATHER_CONNECT_TIMEOUT = float(os.environ.get('WEATHER_CONNECT_TIMEOUT', 3.05))
+    WEATHER_READ_TIMEOUT = float(os.environ.get('WEATHER_READ_TIMEOUT', 5))
+    
+    # Per-endpoint circuit breaker: open after N consecutive failures, retry after the timeout (seconds)
+    WEATHER_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('WEATHER_BREAKER_FAILURE_THRESHOLD', 5))
+    WEATHER_BREAKER_RESET_TIMEOUT = float(os.environ.get('WEATHER_BREAKER_RESET_TIMEOUT', 30))
+    
+    # Geocoding (zip -> coordinates for OneCall)
+    WEATHER_DEFAULT_COUNTRY = os.environ.get('WEATHER_DEFAULT_COUNTRY', 'US')
+    GEOCODING_SEED_FILE = os.environ.get('GEOCODING_SEED_FILE')
+    GEOCODING_CACHE_TTL = int(os.environ.get('GEOCODING_CACHE_TTL', 30 * 24 * 3600))
+    
+    # Zip codes are grouped into square grid cells of this size (degrees) for weather lookups
+    WEATHER_CELL_DEGREES = float(os.environ.get('WEATHER_CELL_DEGREES', 0.25))
+    
+    # Concurrent weather lookups for multi-location endpoints
+    WEATHER_FANOUT_MAX_WORKERS = int(os.environ.get('WEATHER_FANOUT_MAX_WORKERS', 8))
+    WEATHER_FANOUT_DEADLINE = float(os.environ.get('WEATHER_FANOUT_DEADLINE', 8))
+    
+    # Background weather prefetcher (one worker refreshes the shared cache for all patient locations)
+    WEATHER_PREFETCH_ENABLED = os.environ.get('WEATHER_PREFETCH_ENABLED', 'false').lower() == 'true'
+    WEATHER_PREFETCH_INTERVAL = int(os.environ.get('WEATHER_PREFETCH_INTERVAL', 300))
+    WEATHER_PREFETCH_MAX_CALLS_PER_MINUTE = int(os.environ.get('WEATHER_PREFETCH_MAX_CALLS_PER_MINUTE', 30))
+    WEATHER_PREFETCH_LOCK_FILE = os.environ.get('WEATHER_PREFETCH_LOCK_FILE', 'instance/weather_prefetch.lock')
+    
+    # Parsed AI recommendations cached by a fingerprint of the prompt inputs
+    AI_CACHE_ENABLED = os.environ.get('AI_CACHE_ENABLED', 'true').lower() == 'true'
+    AI_CACHE_TTL = int(os.environ.get('AI_CACHE_TTL', 24 * 3600))
+    AI_CACHE_MAX_ENTRIES = int(os.environ.get('AI_CACHE_MAX_ENTRIES', 5000))
+    # Bucket age (years), pregnancy weeks, temperature (°C) and humidity (%) so similar profiles share answers
+    AI_CACHE_BUCKETING = os.environ.get('AI_CACHE_BUCKETING', 'false').lower() == 'true'
+    AI_CACHE_AGE_BUCKET = int(os.environ.get('AI_CACHE_AGE_BUCKET', 5))
+    AI_CACHE_WEEKS_BUCKET = int(os.environ.get('AI_CACHE_WEEKS_BUCKET', 4))
+    AI_CACHE_TEMPERATURE_BUCKET = float(os.environ.get('AI_CACHE_TEMPERATURE_BUCKET', 2))
+    AI_CACHE_HUMIDITY_BUCKET = int(os.environ.get('AI_CACHE_HUMIDITY_BUCKET', 10))
+    
+    # Concurrent AI recommendations for population endpoints (timeout in seconds per call)
+    AI_ENRICHMENT_MAX_WORKERS = int(os.environ.get('AI_ENRICHMENT_MAX_WORKERS', 8))
+    AI_ENRICHMENT_CALL_TIMEOUT = float(os.environ.get('AI_ENRICHMENT_CALL_TIMEOUT', 15))
+    # Patients packed into one prompt for population endpoints (1 disables batching)
+    AI_BATCH_SIZE = int(os.environ.get('AI_BATCH_SIZE', 5))
+    # Default per-request latency budget for AI suggestions in milliseconds, from request start (0 = no budget);
+    # overridden by ?ai_budget_ms=, patients left when it runs out get rule-based fallbacks
+    AI_BUDGET_MS = int(os.environ.get('AI_BUDGET_MS', 0))
+    # Answer common profiles from the rule tables and send only unusual ones to Gemini
+    AI_RULES_TIER_ENABLED = os.environ.get('AI_RULES_TIER_ENABLED', 'true').lower() == 'true'
+    
+    # Opt-in: AI suggestions computed by a background job queue; endpoints answer with fallbacks and a job id meanwhile
+    AI_ASYNC_ENABLED = os.environ.get('AI_ASYNC_ENABLED', 'false').lower() == 'true'
+    AI_JOB_WORKERS = int(os.environ.get('AI_JOB_WORKERS', 2))
+    AI_JOB_TIMEOUT = int(os.environ.get('AI_JOB_TIMEOUT', 120))
+    AI_JOB_TTL = int(os.environ.get('AI_JOB_TTL', 3600))
+    AI_JOB_RETRY_AFTER = int(os.environ.get('AI_JOB_RETRY_AFTER', 60))
+    
+    # Cohort message templates (one Gemini call per risk-profile cohort, rendered per patient)
+    MESSAGE_TEMPLATE_TTL = int(os.environ.get('MESSAGE_TEMPLATE_TTL', 24 * 3600))
+    
+    # Heat-wave lookahead index (built from cached forecasts)
+    HEAT_WAVE_LOOKAHEAD_DAYS = int(os.environ.get('HEAT_WAVE_LOOKAHEAD_DAYS', 5))
+    
+    # Instrumentation
+    RISK_METRICS_ENABLED = os.environ.get('RISK_METRICS_ENABLED', 'false').lower() == 'true'
     
     # Logging configuration
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
@@ -42,6 +134,7 @@ class ProductionConfig(Config):
 class TestConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    CACHE_DB_PATH = ':memory:'
 
 config = {
     'development': DevelopmentConfig,
@@ -3,6 +3,8 @@
 CSV-based models for data storage
 """
 
+import os
+import threading
 from typing import List, Dict, Optional, Any
 from datetime import datetime
 from app.services.csv_service import CSVService
@@ -150,6 +152,9 @@ class CSVModelManager:
     
     def __init__(self):
         self.csv_service = CSVService()
+        self._zip_postings = None
+        self._zip_postings_mtime = None
+        self._zip_postings_lock = threading.Lock()
     
     # Методы для работы с пациентами
     def get_all_patients(self) -> List[CSVPatient]:
@@ -180,6 +185,26 @@ class CSVModelManager:
         """Удаляет пациента"""
         return self.csv_service.delete_patient(patient_id)
     
+    def get_patient_ids_by_zip(self) -> Dict[str, List[int]]:
+        """Получает индекс zip-код -> список ID пациентов
+        
+        Index of patient IDs per zip code; rebuilt only when the patients file changes.
+        """
+        try:
+            mtime = os.stat(self.csv_service.patients_file).st_mtime_ns
+        except OSError:
+            mtime = None
+        
+        with self._zip_postings_lock:
+            if self._zip_postings is None or self._zip_postings_mtime != mtime:
+                postings = {}
+                for patient in self.get_all_patients():
+                    if patient.zip_code:
+                        postings.setdefault(patient.zip_code, []).append(patient.id)
+                self._zip_postings = postings
+                self._zip_postings_mtime = mtime
+            return self._zip_postings
+    
     # Методы для работы с оценками риска
     def create_risk_assessment(self, assessment_data: Dict) -> CSVRiskAssessment:
         """Создает новую оценку риска"""
@@ -1,6 +1,10 @@
 from .weather_service import WeatherService
 from .risk_service import RiskAssessmentService
 from .message_service import MessageService
+from .recommendation_engine import RecommendationEngine
 from .ai_service import AIService
+from .ai_job_service import AIJobService
+from .geocoding_service import GeocodingService
+from .heat_wave_service import HeatWaveService
 
-__all__ = ['WeatherService', 'RiskAssessmentService', 'MessageService', 'AIService']
+__all__ = ['WeatherService', 'RiskAssessmentService', 'MessageService', 'RecommendationEngine', 'AIService', 'AIJobService', 'GeocodingService', 'HeatWaveService']
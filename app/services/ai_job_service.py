@@ -0,0 +1,160 @@
+from flask import current_app
+from app.services.ai_service import AIService
+from app.services.shared_cache import get_shared_cache
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class AIJobService:
+    """Background queue for AI recommendations, with job state shared between workers through the cache"""
+    
+    _executor = None
+    _executor_pid = None
+    _executor_lock = threading.Lock()
+    
+    @staticmethod
+    def is_enabled(requested=None, budget_ms=None):
+        """Whether AI suggestions go through the job queue: the request's `async_ai` choice, else AI_ASYNC_ENABLED
+        
+        A request that sets its own `ai_budget_ms` waits for answers within that budget, so it is never queued.
+        """
+        if budget_ms is not None:
+            return False
+        if requested is not None:
+            return requested.lower() == 'true'
+        return current_app.config.get('AI_ASYNC_ENABLED', False)
+    
+    @staticmethod
+    def submit_recommendations(patient, risk_data):
+        """Get the job for one patient's AI recommendations, queueing it if needed"""
+        return AIJobService.submit_recommendations_for_patients([(patient, risk_data)])[0]
+    
+    @staticmethod
+    def submit_recommendations_for_patients(patients_with_risk):
+        """Get a job for each (patient, risk_data) pair, in input order, queueing the unanswered ones
+        
+        The job id is the recommendation fingerprint, so patients with the same
+        profile share a job and a later read finds the finished result. Profiles
+        already in the recommendation cache come back complete; new jobs are run
+        together in one background task (batched prompts on the bounded pool).
+        Profiles the rule tables cover come back complete without a job.
+        """
+        cache = AIJobService._get_cache()
+        jobs = []
+        queued = []
+        
+        for patient, risk_data in patients_with_risk:
+            rule_recommendations = AIService._get_rule_recommendations(patient, risk_data)
+            if rule_recommendations is not None:
+                jobs.append({'job_id': None, 'status': 'complete', 'result': rule_recommendations})
+                continue
+            
+            job_id = AIService.get_recommendation_fingerprint(patient, risk_data)
+            
+            cached = AIService.get_cached_risk_recommendations(job_id)
+            if cached is not None:
+                jobs.append({'job_id': job_id, 'status': 'complete', 'result': cached})
+                continue
+            
+            entry = cache.get(f"job:{job_id}")
+            if entry is not None:
+                jobs.append(entry.value)
+                continue
+            
+            job = {'job_id': job_id, 'status': 'pending', 'submitted_at': time.time()}
+            # The pending record is a lease: only one worker queues a given profile
+            if cache.add(f"job:{job_id}", job, current_app.config.get('AI_JOB_TIMEOUT', 120)):
+                queued.append((patient, risk_data, job_id))
+            jobs.append(job)
+        
+        if queued:
+            AIJobService._get_executor().submit(AIJobService._run, current_app._get_current_object(), queued)
+        
+        return jobs
+    
+    @staticmethod
+    def get_job(job_id):
+        """Get the state of a job, or None if it is unknown or has expired"""
+        entry = AIJobService._get_cache().get(f"job:{job_id}")
+        if entry is not None:
+            return entry.value
+        
+        # Finished jobs expire before the recommendation cache does
+        cached = AIService.get_cached_risk_recommendations(job_id)
+        if cached is not None:
+            return {'job_id': job_id, 'status': 'complete', 'result': cached}
+        return None
+    
+    @staticmethod
+    def describe(job, fallback_recommendations):
+        """Render a job as the `ai_suggestions` value of an API response"""
+        if job['status'] == 'complete':
+            return job['result']
+        if job['status'] == 'failed':
+            return {
+                'error': 'AI suggestions unavailable',
+                'job_id': job['job_id'],
+                'fallback_recommendations': fallback_recommendations
+            }
+        return {
+            'status': 'pending',
+            'job_id': job['job_id'],
+            'poll_url': f"/api/ai-suggestions/{job['job_id']}",
+            'fallback_recommendations': fallback_recommendations
+        }
+    
+    @staticmethod
+    def _run(app, queued):
+        """Compute queued recommendations and store each job's outcome"""
+        with app.app_context():
+            config = app.config
+            cache = AIJobService._get_cache()
+            try:
+                results = AIService.get_risk_recommendations_for_patients(
+                    [(patient, risk_data) for patient, risk_data, _ in queued]
+                )
+            except Exception as e:
+                logger.warning(f"AI job batch of {len(queued)} failed: {e}")
+                results = [None] * len(queued)
+            
+            for (_, _, job_id), result in zip(queued, results):
+                if result is None:
+                    # Failed jobs expire quickly so the next read queues a retry
+                    cache.set(f"job:{job_id}", {
+                        'job_id': job_id,
+                        'status': 'failed',
+                        'finished_at': time.time()
+                    }, config.get('AI_JOB_RETRY_AFTER', 60))
+                else:
+                    cache.set(f"job:{job_id}", {
+                        'job_id': job_id,
+                        'status': 'complete',
+                        'result': result,
+                        'finished_at': time.time()
+                    }, config.get('AI_JOB_TTL', 3600))
+    
+    @staticmethod
+    def _get_cache():
+        """Get the shared cache holding job state"""
+        return get_shared_cache('ai_jobs')
+    
+    @staticmethod
+    def _get_executor():
+        """Get this process's executor for AI jobs"""
+        with AIJobService._executor_lock:
+            if AIJobService._executor is None or AIJobService._executor_pid != os.getpid():
+                AIJobService._executor = ThreadPoolExecutor(
+                    max_workers=current_app.config.get('AI_JOB_WORKERS', 2),
+                    thread_name_prefix='ai-jobs'
+                )
+                AIJobService._executor_pid = os.getpid()
+            return AIJobService._executor
+    
+    @staticmethod
+    def get_metrics():
+        """Get job cache statistics"""
+        return AIJobService._get_cache().stats()
@@ -1,57 +1,514 @@
-import google.generativeai as genai
 from flask import current_app
+from app.services.gemini_client import get_model
+from app.services.recommendation_engine import RecommendationEngine
+from app.services.shared_cache import get_shared_cache
 from app.utils.exceptions import ExternalAPIException
+from app.utils.metrics import LatencyWindow
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+import hashlib
+import json
 import logging
+import math
+import os
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
 class AIService:
     """Service for AI-powered recommendations using Google Gemini"""
     
+    # Bump when the risk-assessment prompt changes so cached answers are not reused
+    PROMPT_VERSION = 1
+    
+    # Keys of a risk recommendation answer, with the description given to the model
+    RECOMMENDATION_KEYS = [
+        ('immediate_actions', 'List of immediate actions needed'),
+        ('medical_recommendations', 'Medical care recommendations'),
+        ('lifestyle_changes', 'Lifestyle modifications'),
+        ('monitoring_guidelines', 'What to monitor and how often'),
+        ('emergency_signs', 'Warning signs requiring immediate medical attention'),
+        ('weather_precautions', 'Weather-specific precautions'),
+        ('follow_up_schedule', 'Recommended follow-up schedule'),
+        ('priority_level', 'High/Medium/Low priority for medical attention')
+    ]
+    
+    # Recent latency and errors per Gemini model, for routing and the admin metrics
+    model_latency = LatencyWindow()
+    
+    # Hedged calls: this process's executor and counters for the hedging budget
+    _hedge_executor = None
+    _hedge_executor_pid = None
+    _hedge_lock = threading.Lock()
+    _hedge_counts = {'calls': 0, 'hedged': 0, 'hedge_wins': 0}
+    
     @staticmethod
     def get_risk_recommendations(patient, risk_data):
-        """Get AI-powered risk recommendations for a patient"""
+        """Get AI-powered risk recommendations for a patient
+        
+        Profiles the rule tables cover are answered by RecommendationEngine
+        without a network call. AI answers are cached by a fingerprint of the
+        prompt inputs, so patients with the same profile share one LLM call.
+        """
+        rule_recommendations = AIService._get_rule_recommendations(patient, risk_data)
+        if rule_recommendations is not None:
+            return rule_recommendations
+        
         try:
-            # Configure Gemini API
-            api_key = current_app.config.get('GEMINI_API_KEY')
-            if not api_key:
-                raise ExternalAPIException("Gemini API key not configured")
-            
-            model_name = current_app.config.get('GEMINI_MODEL', 'gemini-2.0-flash-exp')
-            
-            genai.configure(api_key=api_key)
-            model = genai.GenerativeModel(model_name)
+            model = AIService._get_routed_model([risk_data.get('risk_level')])
             
             # Prepare patient context
             patient_context = AIService._prepare_patient_context(patient, risk_data)
+            prompt_inputs = AIService._normalize_prompt_inputs(patient_context, risk_data)
+            
+            cache_key = f"recommendations:{AIService._fingerprint(prompt_inputs, model.model_name)}"
+            cached = AIService._get_cached_recommendations(cache_key)
+            if cached is not None:
+                return cached
             
             # Create prompt for AI
-            prompt = AIService._create_risk_assessment_prompt(patient_context, risk_data)
+            prompt = AIService._create_risk_assessment_prompt(prompt_inputs)
             
             # Get AI response
-            response = model.generate_content(prompt)
+            response = AIService._generate(model, prompt)
             
             # Parse and structure the response
             recommendations = AIService._parse_ai_response(response.text)
             
-            return recommendations
+            # Generic answers from unparseable responses are not worth keeping
+            if 'raw_response' not in recommendations:
+                AIService._cache_recommendations(cache_key, recommendations)
             
+            return recommendations
+        
         except Exception as e:
             logger.error(f"Error getting AI recommendations: {e}")
             raise ExternalAPIException(f"AI service error: {str(e)}")
     
     @staticmethod
-    def get_weather_risk_analysis(weather_data, patient_count):
-        """Get AI analysis of weather-related risks"""
+    def stream_risk_recommendations(patient, risk_data):
+        """Stream AI risk recommendations for a patient as the model generates them
+        
+        Yields `ai_partial` events with each chunk of model text, then one
+        `ai_complete` event with the parsed recommendations. A cached answer
+        yields only the `ai_complete` event, as does a profile the rule tables cover.
+        """
+        rule_recommendations = AIService._get_rule_recommendations(patient, risk_data)
+        if rule_recommendations is not None:
+            yield {'type': 'ai_complete', 'ai_suggestions': rule_recommendations, 'cached': False}
+            return
+        
         try:
-            api_key = current_app.config.get('GEMINI_API_KEY')
-            if not api_key:
-                raise ExternalAPIException("Gemini API key not configured")
+            model = AIService._get_routed_model([risk_data.get('risk_level')])
             
-            model_name = current_app.config.get('GEMINI_MODEL', 'gemini-2.0-flash-exp')
+            patient_context = AIService._prepare_patient_context(patient, risk_data)
+            prompt_inputs = AIService._normalize_prompt_inputs(patient_context, risk_data)
+            
+            cache_key = f"recommendations:{AIService._fingerprint(prompt_inputs, model.model_name)}"
+            cached = AIService._get_cached_recommendations(cache_key)
+            if cached is not None:
+                yield {'type': 'ai_complete', 'ai_suggestions': cached, 'cached': True}
+                return
+            
+            prompt = AIService._create_risk_assessment_prompt(prompt_inputs)
+            response_text = ''
+            started = time.perf_counter()
+            try:
+                for chunk in model.generate_content(prompt, stream=True):
+                    try:
+                        text = chunk.text
+                    except ValueError:
+                        # Chunks without text parts (e.g. only safety ratings)
+                        continue
+                    response_text += text
+                    yield {'type': 'ai_partial', 'text': text}
+            except Exception:
+                AIService._record_model_call(model, time.perf_counter() - started, ok=False)
+                raise
+            AIService._record_model_call(model, time.perf_counter() - started)
             
-            genai.configure(api_key=api_key)
-            model = genai.GenerativeModel(model_name)
+            recommendations = AIService._parse_ai_response(response_text)
+            if 'raw_response' not in recommendations:
+                AIService._cache_recommendations(cache_key, recommendations)
+            
+            yield {'type': 'ai_complete', 'ai_suggestions': recommendations, 'cached': False}
+        
+        except Exception as e:
+            logger.error(f"Error streaming AI recommendations: {e}")
+            raise ExternalAPIException(f"AI service error: {str(e)}")
+    
+    @staticmethod
+    def _get_rule_recommendations(patient, risk_data):
+        """Get recommendations from the rule tables, or None if the profile needs the AI"""
+        if RecommendationEngine.needs_ai(patient, risk_data):
+            return None
+        return RecommendationEngine.get_recommendations(patient, risk_data)
+    
+    @staticmethod
+    def _select_model_name(risk_levels):
+        """Pick the model for a call covering patients with `risk_levels`
+        
+        Low and medium risk go to GEMINI_FAST_MODEL and high risk to the primary
+        GEMINI_MODEL, unless the primary's recent p95 latency is over
+        AI_ROUTING_P95_THRESHOLD_MS; then high risk goes to the fast model too
+        until the slow calls age out of the latency window.
+        """
+        config = current_app.config
+        primary = config.get('GEMINI_MODEL') or 'gemini-2.0-flash-exp'
+        fast = config.get('GEMINI_FAST_MODEL')
+        if not config.get('AI_ROUTING_ENABLED', True) or not fast or fast == primary:
+            return primary
+        if 'high' not in risk_levels:
+            return fast
+        
+        p95 = AIService.model_latency.percentile(primary, 95, config.get('AI_ROUTING_MIN_SAMPLES', 20))
+        if p95 is not None and p95 * 1000 > config.get('AI_ROUTING_P95_THRESHOLD_MS', 8000):
+            logger.info(f"Routing high-risk AI call to {fast}: {primary} p95 is {p95 * 1000:.0f} ms")
+            return fast
+        return primary
+    
+    @staticmethod
+    def _get_routed_model(risk_levels):
+        """Get the shared model chosen by _select_model_name"""
+        return get_model(AIService._select_model_name(risk_levels))
+    
+    @staticmethod
+    def _generate(model, prompt):
+        """Call `model`, hedging with a duplicate request when the first one is slow
+        
+        With AI_HEDGING_ENABLED, a call still outstanding after the model's
+        recent p90 latency (see _get_hedge_delay) gets a second, identical
+        request; whichever answers first is returned and the other is ignored.
+        Hedges are capped at AI_HEDGE_MAX_RATIO of calls, so they cut tail
+        latency without doubling the number of requests.
+        """
+        delay = AIService._get_hedge_delay(model)
+        if delay is None:
+            return AIService._call_model(model, prompt)
+        
+        executor = AIService._get_hedge_executor()
+        first = executor.submit(AIService._call_model, model, prompt)
+        try:
+            return first.result(timeout=delay)
+        except FutureTimeoutError:
+            pass
+        
+        if not AIService._take_hedge(current_app.config.get('AI_HEDGE_MAX_RATIO', 0.1)):
+            return first.result()
+        
+        logger.info(f"Hedging AI call to {model.model_name} after {delay * 1000:.0f} ms")
+        hedge = executor.submit(AIService._call_model, model, prompt)
+        pending = {first, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                for other in pending:
+                    other.cancel()
+                if future is hedge:
+                    with AIService._hedge_lock:
+                        AIService._hedge_counts['hedge_wins'] += 1
+                return response
+        raise error
+    
+    @staticmethod
+    def _get_hedge_delay(model):
+        """Seconds to wait before hedging a call to `model`, or None to send a single request
+        
+        The delay is the model's p90 latency over at least AI_HEDGE_MIN_SAMPLES
+        recent calls, and never less than AI_HEDGE_MIN_DELAY_MS.
+        """
+        config = current_app.config
+        if not config.get('AI_HEDGING_ENABLED', False):
+            return None
+        
+        with AIService._hedge_lock:
+            AIService._hedge_counts['calls'] += 1
+        p90 = AIService.model_latency.percentile(model.model_name.split('/')[-1], 90, config.get('AI_HEDGE_MIN_SAMPLES', 20))
+        if p90 is None:
+            return None
+        return max(p90, config.get('AI_HEDGE_MIN_DELAY_MS', 100) / 1000)
+    
+    @staticmethod
+    def _take_hedge(max_ratio):
+        """Reserve a hedge if hedges stay within `max_ratio` of calls"""
+        with AIService._hedge_lock:
+            counts = AIService._hedge_counts
+            if counts['hedged'] + 1 > counts['calls'] * max_ratio:
+                return False
+            counts['hedged'] += 1
+            return True
+    
+    @staticmethod
+    def _get_hedge_executor():
+        """Get this process's executor for hedged calls"""
+        with AIService._hedge_lock:
+            if AIService._hedge_executor is None or AIService._hedge_executor_pid != os.getpid():
+                AIService._hedge_executor = ThreadPoolExecutor(
+                    max_workers=current_app.config.get('AI_HEDGE_WORKERS', 16),
+                    thread_name_prefix='ai-hedge'
+                )
+                AIService._hedge_executor_pid = os.getpid()
+            return AIService._hedge_executor
+    
+    @staticmethod
+    def reset_hedge_counts():
+        """Reset the hedging counters"""
+        with AIService._hedge_lock:
+            AIService._hedge_counts = {'calls': 0, 'hedged': 0, 'hedge_wins': 0}
+    
+    @staticmethod
+    def _call_model(model, prompt):
+        """Call `model` once and record the call's latency and outcome"""
+        started = time.perf_counter()
+        try:
+            response = model.generate_content(prompt)
+        except Exception:
+            AIService._record_model_call(model, time.perf_counter() - started, ok=False)
+            raise
+        AIService._record_model_call(model, time.perf_counter() - started)
+        return response
+    
+    @staticmethod
+    def _record_model_call(model, elapsed, ok=True):
+        """Record one call under the model's short name (GEMINI_MODEL style, without 'models/')"""
+        AIService.model_latency.record(model.model_name.split('/')[-1], elapsed, ok)
+    
+    @staticmethod
+    def get_model_metrics():
+        """Get per-model latency and error statistics with the routing and hedging settings"""
+        config = current_app.config
+        return {
+            'routing': {
+                'enabled': config.get('AI_ROUTING_ENABLED', True),
+                'primary_model': config.get('GEMINI_MODEL'),
+                'fast_model': config.get('GEMINI_FAST_MODEL'),
+                'p95_threshold_ms': config.get('AI_ROUTING_P95_THRESHOLD_MS', 8000),
+                'min_samples': config.get('AI_ROUTING_MIN_SAMPLES', 20)
+            },
+            'hedging': dict(
+                AIService._hedge_counts,
+                enabled=config.get('AI_HEDGING_ENABLED', False),
+                max_ratio=config.get('AI_HEDGE_MAX_RATIO', 0.1)
+            ),
+            'models': AIService.model_latency.snapshot()
+        }
+    
+    @staticmethod
+    def get_recommendation_fingerprint(patient, risk_data):
+        """Fingerprint identifying the AI answer for this patient profile with the current model"""
+        prompt_inputs = AIService._normalize_prompt_inputs(AIService._prepare_patient_context(patient, risk_data), risk_data)
+        return AIService._fingerprint(prompt_inputs, AIService._get_routed_model([risk_data.get('risk_level')]).model_name)
+    
+    @staticmethod
+    def get_cached_risk_recommendations(fingerprint):
+        """Get cached recommendations for a profile fingerprint without calling the model, or None"""
+        return AIService._get_cached_recommendations(f"recommendations:{fingerprint}")
+    
+    @staticmethod
+    def get_risk_recommendations_batch(patients, risk_data_list):
+        """Get AI recommendations for several patients with one prompt, in input order
+        
+        Cached profiles are answered directly and identical profiles share one
+        slot. The rest are packed into a single prompt asking for a JSON array
+        keyed by patient_id; entries missing from or invalid in the answer are
+        retried with single-patient calls. Entries that still fail are None.
+        
+        Each patient is routed and fingerprinted by its own risk level, as a
+        single call would be, so patients of different tiers go out as one
+        batch per model and share cache entries with the single-call path.
+        """
+        results = [None] * len(patients)
+        tiers = {}
+        for index, risk_data in enumerate(risk_data_list):
+            tiers.setdefault(AIService._select_model_name([risk_data.get('risk_level')]), []).append(index)
+        
+        for model_name, indexes in tiers.items():
+            AIService._recommend_batch(get_model(model_name), patients, risk_data_list, indexes, results)
+        return results
+    
+    @staticmethod
+    def _recommend_batch(model, patients, risk_data_list, batch_indexes, results):
+        """Fill `results` at `batch_indexes` with one batched call to `model` (see get_risk_recommendations_batch)"""
+        # fingerprint -> (patient_id, prompt inputs, cache key, indexes sharing the profile)
+        pending = {}
+        for index in batch_indexes:
+            patient, risk_data = patients[index], risk_data_list[index]
+            prompt_inputs = AIService._normalize_prompt_inputs(AIService._prepare_patient_context(patient, risk_data), risk_data)
+            fingerprint = AIService._fingerprint(prompt_inputs, model.model_name)
+            cache_key = f"recommendations:{fingerprint}"
+            
+            if fingerprint in pending:
+                pending[fingerprint][3].append(index)
+                continue
+            cached = AIService._get_cached_recommendations(cache_key)
+            if cached is not None:
+                results[index] = cached
+                continue
+            patient_id = str(getattr(patient, 'id', None) or f"p{index}")
+            if any(entry[0] == patient_id for entry in pending.values()):
+                patient_id = f"{patient_id}-{index}"
+            pending[fingerprint] = (patient_id, prompt_inputs, cache_key, [index])
+        
+        if not pending:
+            return
+        
+        answers = {}
+        if len(pending) > 1:
+            try:
+                prompt = AIService._create_batch_risk_assessment_prompt(
+                    [(patient_id, prompt_inputs) for patient_id, prompt_inputs, _, _ in pending.values()]
+                )
+                response = AIService._generate(model, prompt)
+                answers = AIService._parse_batch_response(response.text, {entry[0] for entry in pending.values()})
+            except Exception as e:
+                logger.warning(f"Batched AI recommendations failed for {len(pending)} profiles: {e}")
+        
+        for patient_id, prompt_inputs, cache_key, indexes in pending.values():
+            recommendations = answers.get(patient_id)
+            if recommendations is not None:
+                AIService._cache_recommendations(cache_key, recommendations)
+            else:
+                # Missing from the batch answer (or a single profile): ask for this patient alone
+                try:
+                    recommendations = AIService.get_risk_recommendations(patients[indexes[0]], risk_data_list[indexes[0]])
+                except Exception as e:
+                    logger.warning(f"AI recommendations failed for patient {patient_id}: {e}")
+                    continue
+            for index in indexes:
+                results[index] = recommendations
+    
+    @staticmethod
+    def _parse_batch_response(response_text, patient_ids):
+        """Split a batch answer into recommendations by patient_id, keeping only complete entries"""
+        start_idx = response_text.find('[')
+        end_idx = response_text.rfind(']') + 1
+        if start_idx == -1 or end_idx <= start_idx:
+            logger.warning("Batched AI response contains no JSON array")
+            return {}
+        
+        answers = {}
+        for item in json.loads(response_text[start_idx:end_idx]):
+            if not isinstance(item, dict):
+                continue
+            patient_id = str(item.get('patient_id'))
+            recommendations = {key: value for key, value in item.items() if key != 'patient_id'}
+            if patient_id not in patient_ids or patient_id in answers:
+                continue
+            if any(key not in recommendations for key, _ in AIService.RECOMMENDATION_KEYS):
+                continue
+            answers[patient_id] = recommendations
+        return answers
+    
+    @staticmethod
+    def get_risk_recommendations_for_patients(patients_with_risk, max_workers=None, call_timeout=None):
+        """Get AI recommendations for many (patient, risk_data) pairs concurrently, in input order
+        
+        Pairs are grouped into batched prompts of AI_BATCH_SIZE patients, and the
+        calls run on a bounded thread pool. Each call gets `call_timeout` seconds,
+        so the whole batch waits at most one timeout per round of workers; entries
+        whose call failed or did not finish in time are None.
+        """
+        results, _ = AIService._recommend_concurrently(patients_with_risk, max_workers, call_timeout)
+        return results
+    
+    @staticmethod
+    def get_risk_recommendations_within_budget(patients_with_risk, budget):
+        """Get AI recommendations concurrently, stopping when a LatencyBudget runs out
+        
+        Returns (results, skipped): results are in input order with None for
+        failed or skipped entries, and skipped flags the entries the budget cut
+        off. Calls not yet started when the budget runs out are never sent.
+        """
+        results, skipped = AIService._recommend_concurrently(patients_with_risk, deadline=budget.deadline)
+        budget.record(
+            completed=sum(1 for result in results if result is not None),
+            skipped=sum(skipped)
+        )
+        return results, skipped
+    
+    @staticmethod
+    def _recommend_concurrently(patients_with_risk, max_workers=None, call_timeout=None, deadline=None):
+        """Run batched recommendation calls on a bounded pool until the call timeouts or `deadline` (monotonic)"""
+        if not patients_with_risk:
+            return [], []
+        
+        # Profiles the rule tables cover are answered inline; only the rest reach the pool
+        rule_results = [AIService._get_rule_recommendations(patient, risk_data) for patient, risk_data in patients_with_risk]
+        if any(result is not None for result in rule_results):
+            novel = [pair for pair, result in zip(patients_with_risk, rule_results) if result is None]
+            ai_results, ai_skipped = AIService._recommend_concurrently(novel, max_workers, call_timeout, deadline)
+            ai_answers = iter(zip(ai_results, ai_skipped))
+            merged = [(result, False) if result is not None else next(ai_answers) for result in rule_results]
+            return [result for result, _ in merged], [skipped for _, skipped in merged]
+        
+        if deadline is not None and time.monotonic() >= deadline:
+            return [None] * len(patients_with_risk), [True] * len(patients_with_risk)
+        
+        config = current_app.config
+        if max_workers is None:
+            max_workers = config.get('AI_ENRICHMENT_MAX_WORKERS', 8)
+        if call_timeout is None:
+            call_timeout = config.get('AI_ENRICHMENT_CALL_TIMEOUT', 15)
+        batch_size = max(1, config.get('AI_BATCH_SIZE', 5))
+        
+        app = current_app._get_current_object()
+        
+        def recommend(chunk):
+            with app.app_context():
+                if len(chunk) == 1:
+                    return [AIService.get_risk_recommendations(*chunk[0])]
+                return AIService.get_risk_recommendations_batch(
+                    [patient for patient, _ in chunk],
+                    [risk_data for _, risk_data in chunk]
+                )
+        
+        chunks = [patients_with_risk[i:i + batch_size] for i in range(0, len(patients_with_risk), batch_size)]
+        workers = max(1, min(max_workers, len(chunks)))
+        rounds = math.ceil(len(chunks) / workers)
+        timeout_at = time.monotonic() + call_timeout * rounds
+        if deadline is not None:
+            timeout_at = min(timeout_at, deadline)
+        results = []
+        skipped = []
+        
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ai-enrichment')
+        try:
+            futures = [executor.submit(recommend, chunk) for chunk in chunks]
+            for chunk, future in zip(chunks, futures):
+                patient_ids = [getattr(patient, 'id', None) for patient, _ in chunk]
+                try:
+                    results.extend(future.result(timeout=max(0, timeout_at - time.monotonic())))
+                    skipped.extend([False] * len(chunk))
+                except FutureTimeoutError:
+                    out_of_budget = deadline is not None and time.monotonic() >= deadline
+                    if out_of_budget:
+                        logger.info(f"AI recommendations for patients {patient_ids} skipped: latency budget exhausted")
+                    else:
+                        logger.warning(f"AI recommendations for patients {patient_ids} timed out")
+                    results.extend([None] * len(chunk))
+                    skipped.extend([out_of_budget] * len(chunk))
+                except Exception as e:
+                    logger.warning(f"AI recommendations failed for patients {patient_ids}: {e}")
+                    results.extend([None] * len(chunk))
+                    skipped.extend([False] * len(chunk))
+        finally:
+            # Late calls still finish in the background and fill the recommendation cache;
+            # calls that have not started are cancelled
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return results, skipped
+    
+    @staticmethod
+    def get_weather_risk_analysis(weather_data, patient_count):
+        """Get AI analysis of weather-related risks"""
+        try:
+            model = get_model()
             
             prompt = f"""
             Analyze the following weather conditions for pregnant women health risks:
@@ -74,9 +531,9 @@ class AIService:
             Format as JSON with keys: risk_level, health_concerns, immediate_recommendations, preventive_measures, emergency_actions
             """
             
-            response = model.generate_content(prompt)
+            response = AIService._generate(model, prompt)
             return AIService._parse_weather_analysis(response.text)
-            
+        
         except Exception as e:
             logger.error(f"Error getting weather risk analysis: {e}")
             raise ExternalAPIException(f"Weather AI analysis error: {str(e)}")
@@ -85,14 +542,7 @@ class AIService:
     def get_patient_health_advice(patient, risk_data, specific_concern=None):
         """Get personalized health advice for a patient"""
         try:
-            api_key = current_app.config.get('GEMINI_API_KEY')
-            if not api_key:
-                raise ExternalAPIException("Gemini API key not configured")
-            
-            model_name = current_app.config.get('GEMINI_MODEL', 'gemini-2.0-flash-exp')
-            
-            genai.configure(api_key=api_key)
-            model = genai.GenerativeModel(model_name)
+            model = get_model()
             
             patient_context = AIService._prepare_patient_context(patient, risk_data)
             
@@ -120,9 +570,9 @@ class AIService:
             Format as JSON with keys: recommendations, lifestyle_modifications, warning_signs, seek_help_when, daily_routine
             """
             
-            response = model.generate_content(prompt)
+            response = AIService._generate(model, prompt)
             return AIService._parse_health_advice(response.text)
-            
+        
         except Exception as e:
             logger.error(f"Error getting health advice: {e}")
             raise ExternalAPIException(f"Health advice AI error: {str(e)}")
@@ -143,43 +593,160 @@ class AIService:
         }
     
     @staticmethod
-    def _create_risk_assessment_prompt(patient_context, risk_data):
-        """Create prompt for risk assessment"""
+    def _normalize_prompt_inputs(patient_context, risk_data):
+        """Reduce the risk-assessment prompt inputs to a canonical form
+        
+        Codes are upper-cased, lists sorted and factors reduced to their level.
+        With AI_CACHE_BUCKETING on, age, pregnancy weeks, temperature and
+        humidity are replaced by ranges and the zip code by its 3-digit prefix,
+        so that similar patients produce the same prompt.
+        """
+        config = current_app.config
+        weather = patient_context.get('weather_conditions') or {}
+        factors = risk_data.get('factors') or {}
+        
+        inputs = {
+            'age': patient_context['age'],
+            'pregnancy_weeks': patient_context['pregnancy_weeks'],
+            'zip_code': str(patient_context['zip_code'] or '').strip(),
+            'risk_level': risk_data['risk_level'],
+            'risk_score': risk_data['risk_score'],
+            'pregnancy_icd10': AIService._normalize_code(patient_context['pregnancy_icd10']),
+            'comorbidity_icd10': AIService._normalize_code(patient_context['comorbidity_icd10']),
+            'conditions': sorted({str(item).strip() for item in patient_context['conditions'] or [] if str(item).strip()}),
+            'medications': sorted({str(item).strip() for item in patient_context['medications'] or [] if str(item).strip()}),
+            'temperature': weather.get('temperature'),
+            'is_heat_wave': bool(weather.get('is_heat_wave', False)),
+            'humidity': weather.get('humidity'),
+            'factors': {
+                factor: value.get('level', 'unknown') if isinstance(value, dict) else value
+                for factor, value in sorted(factors.items())
+            }
+        }
+        
+        if config.get('AI_CACHE_BUCKETING', False):
+            inputs['age'] = AIService._bucket(inputs['age'], config.get('AI_CACHE_AGE_BUCKET', 5))
+            inputs['pregnancy_weeks'] = AIService._bucket(inputs['pregnancy_weeks'], config.get('AI_CACHE_WEEKS_BUCKET', 4))
+            inputs['temperature'] = AIService._bucket(inputs['temperature'], config.get('AI_CACHE_TEMPERATURE_BUCKET', 2))
+            inputs['humidity'] = AIService._bucket(inputs['humidity'], config.get('AI_CACHE_HUMIDITY_BUCKET', 10))
+            if len(inputs['zip_code']) > 3:
+                inputs['zip_code'] = inputs['zip_code'][:3] + 'xx'
+        
+        return inputs
+    
+    @staticmethod
+    def _normalize_code(code):
+        """Normalize an ICD-10 code field for comparison (None when empty)"""
+        code = str(code or '').strip().upper()
+        return code or None
+    
+    @staticmethod
+    def _bucket(value, size):
+        """Replace a number by the range of width `size` it falls into, e.g. 37 -> '35-39'"""
+        if not size or isinstance(value, bool) or not isinstance(value, (int, float)):
+            return value
+        low = math.floor(value / size) * size
+        if isinstance(value, int) and isinstance(size, int):
+            return f"{low}-{low + size - 1}"
+        return f"{low:g}-{low + size:g}"
+    
+    @staticmethod
+    def _fingerprint(prompt_inputs, model_name):
+        """Stable hash of the normalized prompt inputs, model and prompt version"""
+        payload = json.dumps(
+            {'inputs': prompt_inputs, 'model': model_name, 'prompt_version': AIService.PROMPT_VERSION},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    @staticmethod
+    def _get_cache():
+        """Get the shared cache holding parsed AI answers"""
+        return get_shared_cache('ai', max_entries=current_app.config.get('AI_CACHE_MAX_ENTRIES', 5000))
+    
+    @staticmethod
+    def _get_cached_recommendations(cache_key):
+        """Get cached recommendations for `cache_key`, or None"""
+        if not current_app.config.get('AI_CACHE_ENABLED', True):
+            return None
+        entry = AIService._get_cache().get(cache_key)
+        return entry.value if entry is not None else None
+    
+    @staticmethod
+    def _cache_recommendations(cache_key, recommendations):
+        """Store parsed recommendations under `cache_key`"""
+        if current_app.config.get('AI_CACHE_ENABLED', True):
+            AIService._get_cache().set(cache_key, recommendations, current_app.config.get('AI_CACHE_TTL', 86400))
+    
+    @staticmethod
+    def get_cache_metrics():
+        """Get AI answer cache statistics"""
+        return AIService._get_cache().stats()
+    
+    @staticmethod
+    def _create_risk_assessment_prompt(prompt_inputs):
+        """Create prompt for risk assessment from normalized prompt inputs"""
+        temperature = prompt_inputs['temperature'] if prompt_inputs['temperature'] is not None else 'N/A'
+        humidity = prompt_inputs['humidity'] if prompt_inputs['humidity'] is not None else 'N/A'
         return f"""
         As a medical AI assistant, analyze this pregnant patient's risk profile and provide recommendations:
         
         Patient Profile:
-        - Age: {patient_context['age']} years
-        - Pregnancy: {patient_context['pregnancy_weeks']} weeks
-        - Location: {patient_context['zip_code']}
-        - Current Risk Level: {risk_data['risk_level']}
-        - Risk Score: {risk_data['risk_score']}
+        - Age: {prompt_inputs['age']} years
+        - Pregnancy: {prompt_inputs['pregnancy_weeks']} weeks
+        - Location: {prompt_inputs['zip_code']}
+        - Current Risk Level: {prompt_inputs['risk_level']}
+        - Risk Score: {prompt_inputs['risk_score']}
         
         Medical Conditions:
-        - Pregnancy ICD10: {patient_context['pregnancy_icd10'] or 'None'}
-        - Comorbidity ICD10: {patient_context['comorbidity_icd10'] or 'None'}
-        - Other conditions: {', '.join(patient_context['conditions']) if patient_context['conditions'] else 'None'}
+        - Pregnancy ICD10: {prompt_inputs['pregnancy_icd10'] or 'None'}
+        - Comorbidity ICD10: {prompt_inputs['comorbidity_icd10'] or 'None'}
+        - Other conditions: {', '.join(prompt_inputs['conditions']) if prompt_inputs['conditions'] else 'None'}
         
         Medications:
-        {', '.join(patient_context['medications']) if patient_context['medications'] else 'None'}
+        {', '.join(prompt_inputs['medications']) if prompt_inputs['medications'] else 'None'}
         
         Weather Conditions:
-        - Temperature: {patient_context['weather_conditions'].get('temperature', 'N/A')}°C
-        - Heat wave risk: {patient_context['weather_conditions'].get('is_heat_wave', False)}
-        - Humidity: {patient_context['weather_conditions'].get('humidity', 'N/A')}%
+        - Temperature: {temperature}°C
+        - Heat wave risk: {prompt_inputs['is_heat_wave']}
+        - Humidity: {humidity}%
         
         Risk Factors:
-        {AIService._format_risk_factors(risk_data.get('factors', {}))}
+        {AIService._format_risk_factors(prompt_inputs['factors'])}
         
         Provide comprehensive recommendations in JSON format with these keys:
-        - immediate_actions: List of immediate actions needed
-        - medical_recommendations: Medical care recommendations
-        - lifestyle_changes: Lifestyle modifications
-        - monitoring_guidelines: What to monitor and how often
-        - emergency_signs: Warning signs requiring immediate medical attention
-        - weather_precautions: Weather-specific precautions
-        - follow_up_schedule: Recommended follow-up schedule
-        - priority_level: High/Medium/Low priority for medical attention
+        {AIService._format_recommendation_keys()}
+        """
+    
+    @staticmethod
+    def _format_recommendation_keys():
+        """Format the expected answer keys for AI prompts"""
+        return '\n        '.join(f"- {key}: {description}" for key, description in AIService.RECOMMENDATION_KEYS)
+    
+    @staticmethod
+    def _create_batch_risk_assessment_prompt(labeled_inputs):
+        """Create one prompt covering several patients from (patient_id, normalized prompt inputs) pairs
+        
+        The instructions are sent once and each patient is a compact JSON line.
+        """
+        profiles = '\n        '.join(
+            json.dumps({'patient_id': patient_id, **prompt_inputs}, ensure_ascii=False, separators=(',', ':'), default=str)
+            for patient_id, prompt_inputs in labeled_inputs
+        )
+        return f"""
+        As a medical AI assistant, analyze the risk profiles of these pregnant patients and provide recommendations for each of them.
+        
+        Each line is one patient: age (years), pregnancy_weeks, zip_code, risk_level, risk_score,
+        pregnancy_icd10, comorbidity_icd10, conditions, medications, temperature (°C), is_heat_wave,
+        humidity (%) and factors (risk factor -> level).
+        
+        Patients:
+        {profiles}
+        
+        Respond with a JSON array containing one object per patient, with these keys:
+        - patient_id: The patient_id given above
+        {AIService._format_recommendation_keys()}
         """
     
     @staticmethod
@@ -208,7 +775,7 @@ class AIService:
             else:
                 # Fallback to text parsing
                 return AIService._parse_text_response(response_text)
-                
+        
         except Exception as e:
             logger.warning(f"Error parsing AI response: {e}")
             return AIService._parse_text_response(response_text)
@@ -0,0 +1,64 @@
+"""
+Shared Gemini models for AI calls.
+
+genai.configure() replaces the library's global client settings and drops its
+cached service clients, so configuring on every request rebuilds the transport
+(channel, TLS session) each time. The library is configured once per worker
+process and settings, and one GenerativeModel is kept per model name and
+reused across calls.
+"""
+
+import os
+import threading
+import google.generativeai as genai
+from google.generativeai import client as genai_client
+from flask import current_app
+from app.utils.exceptions import ExternalAPIException
+
+_models = {}
+_configured = {}
+_lock = threading.Lock()
+
+def get_model(model_name=None):
+    """Get the shared GenerativeModel for `model_name` (default GEMINI_MODEL) in this process"""
+    config = current_app.config
+    api_key = config.get('GEMINI_API_KEY')
+    if not api_key:
+        raise ExternalAPIException("Gemini API key not configured")
+    
+    model_name = model_name or config.get('GEMINI_MODEL') or 'gemini-2.0-flash-exp'
+    settings = (api_key, config.get('GEMINI_API_ENDPOINT'), config.get('GEMINI_TRANSPORT'))
+    pid = os.getpid()
+    key = (model_name, pid)
+    
+    if _configured.get(pid) == settings:
+        model = _models.get(key)
+        if model is not None:
+            return model
+    
+    with _lock:
+        if _configured.get(pid) != settings:
+            _configure(*settings)
+            _configured[pid] = settings
+            # Models bound to the previous settings hold the old service client
+            for stale_key in [k for k in _models if k[1] == pid]:
+                del _models[stale_key]
+        
+        model = _models.get(key)
+        if model is None:
+            model = _models[key] = genai.GenerativeModel(model_name)
+        return model
+
+def reset_models():
+    """Forget the configuration and models of this process (next call reconfigures)"""
+    with _lock:
+        _configured.pop(os.getpid(), None)
+        for key in [k for k in _models if k[1] == os.getpid()]:
+            del _models[key]
+
+def _configure(api_key, api_endpoint=None, transport=None):
+    """Configure the library and create its generative service client up front"""
+    options = {'client_options': {'api_endpoint': api_endpoint}} if api_endpoint else {}
+    genai.configure(api_key=api_key, transport=transport, **options)
+    # Build the service client under the lock so concurrent first calls share one
+    genai_client.get_default_generative_client()
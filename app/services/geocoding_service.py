@@ -0,0 +1,113 @@
+import csv
+import os
+import threading
+import requests
+from flask import current_app
+from app.services.shared_cache import get_shared_cache
+from app.services.http_client import get_weather_url
+from app.utils.exceptions import CircuitOpenException
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEED_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'zip_coordinates.csv')
+
+class GeocodingService:
+    """Service for resolving zip codes to coordinates for OneCall requests"""
+    
+    _seed_coordinates = None
+    _seed_lock = threading.Lock()
+    
+    @staticmethod
+    def get_coordinates(zip_code, fetch=True):
+        """Get (lat, lon) for a zip code from the seed dataset, the shared cache or the geocoding API
+        
+        With fetch=False only local data is consulted, so the call never blocks on the network.
+        """
+        if not zip_code:
+            return None
+        
+        coordinates = GeocodingService._get_seed_coordinates().get(zip_code)
+        if coordinates is not None:
+            return coordinates
+        
+        cache = get_shared_cache('geocoding')
+        entry = cache.get(zip_code)
+        if entry is not None:
+            return tuple(entry.value) if entry.value else None
+        
+        if not fetch:
+            return None
+        
+        try:
+            coordinates = GeocodingService._fetch_coordinates(zip_code)
+        except CircuitOpenException as e:
+            # An outage says nothing about the zip, so don't negatively cache it
+            logger.warning(f"Geocoding skipped for zip {zip_code}: {e}")
+            return None
+        if coordinates is not None:
+            cache.set(zip_code, list(coordinates), current_app.config.get('GEOCODING_CACHE_TTL', 30 * 24 * 3600))
+        else:
+            # Remember unknown zips briefly so they don't hit the API on every lookup
+            cache.set(zip_code, None, current_app.config.get('WEATHER_CACHE_FALLBACK_TTL', 60), is_fallback=True)
+        
+        return coordinates
+    
+    @staticmethod
+    def _fetch_coordinates(zip_code):
+        """Resolve a zip code through the OpenWeatherMap geocoding API
+        
+        Calls go through WeatherService._http_get, so the geocoding endpoint has
+        its own circuit breaker; CircuitOpenException is raised while it is open.
+        """
+        from app.services.weather_service import WeatherService
+        
+        try:
+            query = zip_code if ',' in zip_code else f"{zip_code},{current_app.config.get('WEATHER_DEFAULT_COUNTRY', 'US')}"
+            url = get_weather_url('/geo/1.0/zip')
+            params = {
+                'zip': query,
+                'appid': current_app.config['WEATHER_API_KEY']
+            }
+            response = WeatherService._http_get(url, params)
+            
+            if response.status_code == 200:
+                data = response.json()
+                return (data['lat'], data['lon'])
+            
+            logger.warning(f"Geocoding API returned status {response.status_code} for zip {zip_code}")
+            return None
+        
+        except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+            logger.error(f"Geocoding API error: {e}")
+            return None
+    
+    @staticmethod
+    def _get_seed_coordinates():
+        """Load the offline zip coordinate dataset once per process"""
+        if GeocodingService._seed_coordinates is not None:
+            return GeocodingService._seed_coordinates
+        
+        with GeocodingService._seed_lock:
+            if GeocodingService._seed_coordinates is None:
+                path = current_app.config.get('GEOCODING_SEED_FILE') or DEFAULT_SEED_FILE
+                GeocodingService._seed_coordinates = GeocodingService._load_seed_file(path)
+            return GeocodingService._seed_coordinates
+    
+    @staticmethod
+    def _load_seed_file(path):
+        """Read a zip_code,lat,lon CSV file into a lookup dict"""
+        coordinates = {}
+        if not os.path.exists(path):
+            logger.warning(f"Geocoding seed file not found: {path}")
+            return coordinates
+        
+        with open(path, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                try:
+                    coordinates[row['zip_code'].strip()] = (float(row['lat']), float(row['lon']))
+                except (KeyError, ValueError):
+                    continue
+        
+        logger.info(f"Loaded {len(coordinates)} zip coordinates from {path}")
+        return coordinates
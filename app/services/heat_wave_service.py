@@ -0,0 +1,113 @@
+from flask import current_app
+from app.services.weather_service import WeatherService
+from app.utils import heat
+from datetime import datetime
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class HeatWaveService:
+    """Lookahead index of upcoming heat-wave windows per weather location"""
+    
+    INDEX_KEY = 'heatwave:index'
+    
+    @staticmethod
+    def rebuild_index():
+        """Scan every cached OneCall forecast for upcoming heat-wave windows and store the index
+        
+        All locations are flattened into one series and classified in a single
+        vectorized pass; each run of consecutive heat-wave slots becomes a window.
+        """
+        days = current_app.config.get('HEAT_WAVE_LOOKAHEAD_DAYS', 5)
+        cache = WeatherService._get_cache()
+        documents = [
+            (key[len('onecall:'):], entry.value)
+            for key, entry in cache.items('onecall:')
+            if entry.value
+        ]
+        
+        location_index, times, hours, temperatures, humidities = [], [], [], [], []
+        for index, (location_key, document) in enumerate(documents):
+            for item, temperature, feels_like, slot_hours in WeatherService._select_onecall_forecast_entries(document, days):
+                location_index.append(index)
+                times.append(item.get('dt', 0))
+                hours.append(slot_hours)
+                temperatures.append(temperature)
+                humidities.append(item.get('humidity', 50))
+        
+        locations = {}
+        if temperatures:
+            starts, ends, heat_indexes = heat.heat_wave_runs(location_index, temperatures, humidities)
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                locations.setdefault(documents[location_index[start]][0], []).append({
+                    'start': times[start],
+                    'end': times[end] + hours[end] * 3600,
+                    'peak_heat_index': round(float(heat_indexes[start:end + 1].max()), 1)
+                })
+        
+        index = {
+            'built_at': time.time(),
+            'lookahead_days': days,
+            'locations_scanned': len(documents),
+            'locations': locations
+        }
+        cache.set(HeatWaveService.INDEX_KEY, index, current_app.config.get('WEATHER_CACHE_TTL', 600))
+        logger.info(f"Heat-wave index rebuilt: {len(locations)} of {len(documents)} locations have upcoming heat waves")
+        return index
+    
+    @staticmethod
+    def get_index():
+        """Get the heat-wave index, rebuilding it from the cached forecasts if it has expired"""
+        entry = WeatherService._get_cache().get(HeatWaveService.INDEX_KEY)
+        if entry is not None:
+            return entry.value
+        return HeatWaveService.rebuild_index()
+    
+    @staticmethod
+    def get_upcoming_windows(hours=72):
+        """Get heat-wave windows overlapping the next `hours` hours, by location key"""
+        now = time.time()
+        until = now + hours * 3600
+        
+        upcoming = {}
+        for location_key, windows in HeatWaveService.get_index()['locations'].items():
+            overlapping = [window for window in windows if window['start'] < until and window['end'] > now]
+            if overlapping:
+                upcoming[location_key] = overlapping
+        return upcoming
+    
+    @staticmethod
+    def get_patients_facing_heat_wave(hours=72):
+        """Join upcoming heat-wave windows with the zip code -> patient posting lists"""
+        from app.models.csv_models import csv_manager
+        
+        upcoming = HeatWaveService.get_upcoming_windows(hours)
+        zip_codes = []
+        if upcoming:
+            for zip_code, patient_ids in csv_manager.get_patient_ids_by_zip().items():
+                location_key = WeatherService.get_location_key(zip_code, fetch=False)
+                windows = upcoming.get(location_key)
+                if windows:
+                    zip_codes.append({
+                        'zip_code': zip_code,
+                        'location': location_key,
+                        'patient_ids': list(patient_ids),
+                        'windows': [HeatWaveService._format_window(window) for window in windows]
+                    })
+        
+        zip_codes.sort(key=lambda item: item['windows'][0]['start'])
+        return {
+            'hours': hours,
+            'zip_codes': zip_codes,
+            'total_patients': sum(len(item['patient_ids']) for item in zip_codes)
+        }
+    
+    @staticmethod
+    def _format_window(window):
+        """Render window timestamps as ISO strings"""
+        return {
+            'start': datetime.utcfromtimestamp(window['start']).isoformat(),
+            'end': datetime.utcfromtimestamp(window['end']).isoformat(),
+            'peak_heat_index': window['peak_heat_index']
+        }
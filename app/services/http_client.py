@@ -0,0 +1,81 @@
+"""
+Pooled HTTP sessions for outbound API calls.
+
+One requests.Session is kept per worker process and per upstream name, so
+calls to the same host reuse keep-alive connections instead of opening a new
+TCP connection every time.
+"""
+
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from flask import current_app
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def get_session(name, pool_size=10, retries=2, backoff_factor=0.3):
+    """Get the pooled session for `name` in this process, creating it on first use"""
+    key = (name, os.getpid())
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+    
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = _create_session(pool_size, retries, backoff_factor)
+        return session
+
+def get_weather_session():
+    """Get the pooled session used for OpenWeatherMap calls"""
+    config = current_app.config
+    return get_session(
+        'weather',
+        pool_size=config.get('WEATHER_HTTP_POOL_SIZE', 10),
+        retries=config.get('WEATHER_HTTP_RETRIES', 2),
+        backoff_factor=config.get('WEATHER_HTTP_BACKOFF', 0.3)
+    )
+
+def get_weather_url(path):
+    """Build an OpenWeatherMap URL from the configured base URL (a local stub in benchmarks)"""
+    base_url = current_app.config.get('WEATHER_API_BASE_URL') or 'http://api.openweathermap.org'
+    return f"{base_url.rstrip('/')}{path}"
+
+def get_weather_timeout():
+    """Get the (connect, read) timeout tuple for OpenWeatherMap calls"""
+    config = current_app.config
+    return (config.get('WEATHER_CONNECT_TIMEOUT', 3.05), config.get('WEATHER_READ_TIMEOUT', 5))
+
+def close_sessions():
+    """Close every pooled session owned by this process"""
+    with _sessions_lock:
+        for key in [key for key in _sessions if key[1] == os.getpid()]:
+            _sessions.pop(key).close()
+
+def _create_session(pool_size, retries, backoff_factor):
+    """Create a keep-alive session with a bounded pool and retry policy
+    
+    Connect errors and throttling/5xx statuses are retried; read timeouts are
+    not, so a slow upstream fails after one read timeout and the circuit
+    breaker can take over.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET']),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=False, max_retries=retry)
+    
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'Connection': 'keep-alive'})
+    return session
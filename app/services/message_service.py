@@ -1,53 +1,165 @@
-import google.generativeai as genai
 from flask import current_app
+from app.services.gemini_client import get_model
+from app.services.shared_cache import get_shared_cache
 from app.utils.exceptions import ExternalAPIException
+from string import Formatter
+import hashlib
+import json
 
 class MessageService:
     """Service for generating and managing notifications"""
     
+    # Bump when the cohort template prompt changes so cached templates are not reused
+    TEMPLATE_VERSION = 1
+    
+    # Per-patient fields a cohort template may reference as {slot}, with a sample value of the type rendered
+    TEMPLATE_SLOTS = {'first_name': 'Анна', 'age': 30, 'weeks_pregnant': 20, 'temperature': 30.5}
+    
     @staticmethod
     def generate_personalized_message(patient, risk_assessment):
-        """Generate personalized message using Gemini"""
+        """Generate personalized message using Gemini
+        
+        The message is rendered from the patient's cohort template, so patients
+        with the same risk profile share one LLM call.
+        """
+        return MessageService.generate_cohort_messages([(patient, risk_assessment)])[0]
+    
+    @staticmethod
+    def generate_cohort_messages(patients_with_risk):
+        """Generate messages for (patient, risk_assessment) pairs with one LLM call per cohort, in input order
+        
+        Patients are clustered by get_cohort_key; each cohort gets one message
+        template with {slot} placeholders from Gemini (cached across runs), which
+        is rendered locally per patient. Patients whose cohort has no usable
+        template get the default message.
+        """
+        cohorts = {}
+        for index, (patient, risk_assessment) in enumerate(patients_with_risk):
+            cohort_key = MessageService.get_cohort_key(patient, risk_assessment)
+            cohorts.setdefault(cohort_key, []).append(index)
+        
+        messages = [None] * len(patients_with_risk)
+        for cohort_key, indexes in cohorts.items():
+            template = MessageService._get_cohort_template(cohort_key)
+            for index in indexes:
+                patient, risk_assessment = patients_with_risk[index]
+                message = None
+                if template is not None:
+                    message = MessageService._render_template(template, patient, risk_assessment)
+                if message is None:
+                    message = MessageService._get_default_message(patient, risk_assessment)
+                messages[index] = message
+        
+        return messages
+    
+    @staticmethod
+    def get_cohort_key(patient, risk_assessment):
+        """Risk profile a patient's message is generated for: (risk level, trimester, condition groups, heat exposure)"""
+        from app.services.risk_service import RiskAssessmentService
+        from app.services.recommendation_engine import RecommendationEngine
+        
+        weather_data = risk_assessment.get('weather_data') or {}
+        if risk_assessment.get('heat_wave_risk'):
+            weather_data = dict(weather_data, is_heat_wave=True)
+        
+        return (
+            risk_assessment['risk_level'],
+            RiskAssessmentService._trimester_band(patient.weeks_pregnant),
+            RecommendationEngine.get_condition_groups(patient),
+            RiskAssessmentService._weather_bucket(weather_data)[0]
+        )
+    
+    @staticmethod
+    def _get_cohort_template(cohort_key):
+        """Get the message template for a cohort from the cache or Gemini, or None if unavailable"""
         try:
-            genai.configure(api_key=current_app.config['GEMINI_API_KEY'])
-            model = genai.GenerativeModel('gemini-pro')
-            
-            # Prepare context for AI
-            context = {
-                'patient_name': patient.name,
-                'age': patient.age,
-                'trimester': risk_assessment['trimester_risk'],
-                'risk_level': risk_assessment['risk_level'],
-                'heat_wave': risk_assessment['heat_wave_risk'],
-                'temperature': risk_assessment['weather_data']['temperature'],
-                'conditions': patient.get_conditions()
-            }
-            
-            prompt = f"""
-            Generate a personalized health notification for a pregnant woman with the following details:
-            - Name: {context['patient_name']}
-            - Age: {context['age']} years
-            - Trimester: {context['trimester']} (risk level: {context['trimester_risk']})
-            - Overall risk level: {context['risk_level']}
-            - Heat wave warning: {context['heat_wave']}
-            - Current temperature: {context['temperature']}°C
-            - Medical conditions: {', '.join(context['conditions']) if context['conditions'] else 'None'}
-            
-            The message should be:
-            - Warm and supportive
-            - Specific to her risk level and conditions
-            - Include practical advice
-            - Be in Russian language
-            - Maximum 200 words
-            - Professional but caring tone
-            """
-            
-            response = model.generate_content(prompt)
-            return response.text.strip()
-            
+            model = get_model('gemini-pro')
+        except ExternalAPIException as e:
+            current_app.logger.warning(f"Cohort message template unavailable: {e}")
+            return None
+        
+        cache = get_shared_cache('messages')
+        key_data = json.dumps([MessageService.TEMPLATE_VERSION, model.model_name, list(cohort_key)], default=list)
+        cache_key = f"cohort_template:{hashlib.sha256(key_data.encode()).hexdigest()}"
+        entry = cache.get(cache_key)
+        if entry is not None:
+            return entry.value
+        
+        try:
+            response = model.generate_content(MessageService._create_cohort_prompt(cohort_key))
+            template = MessageService._validate_template(response.text)
         except Exception as e:
             current_app.logger.error(f"Gemini API error: {e}")
-            return MessageService._get_default_message(patient, risk_assessment)
+            return None
+        
+        if template is None:
+            current_app.logger.warning(f"Unusable message template for cohort {cohort_key}")
+            return None
+        
+        cache.set(cache_key, template, current_app.config.get('MESSAGE_TEMPLATE_TTL', 24 * 3600))
+        return template
+    
+    @staticmethod
+    def _create_cohort_prompt(cohort_key):
+        """Create the template prompt for a cohort"""
+        risk_level, trimester, condition_groups, heat_exposure = cohort_key
+        
+        return f"""
+        Generate a health notification template for pregnant women with the following profile:
+        - Overall risk level: {risk_level}
+        - Trimester: {trimester or 'unknown'}
+        - Medical condition groups: {', '.join(condition_groups) if condition_groups else 'None'}
+        - Heat exposure: {heat_exposure}
+        
+        The template will be sent to every patient with this profile. Use these
+        placeholders, written exactly as shown, for per-patient details:
+        - {{first_name}}: patient's first name
+        - {{age}}: age in years
+        - {{weeks_pregnant}}: weeks of pregnancy
+        - {{temperature}}: current temperature in °C
+        Use no other braces.
+        
+        The message should be:
+        - Warm and supportive
+        - Specific to the risk level and conditions
+        - Include practical advice
+        - Be in Russian language
+        - Maximum 200 words
+        - Professional but caring tone
+        
+        Return only the template text.
+        """
+    
+    @staticmethod
+    def _validate_template(text):
+        """Return the template if it only uses known slots and renders, else None"""
+        template = (text or '').strip()
+        if not template:
+            return None
+        try:
+            fields = {field for _, field, _, _ in Formatter().parse(template) if field is not None}
+            if not fields <= set(MessageService.TEMPLATE_SLOTS):
+                return None
+            template.format(**MessageService.TEMPLATE_SLOTS)
+        except (ValueError, IndexError, KeyError, TypeError):
+            return None
+        return template
+    
+    @staticmethod
+    def _render_template(template, patient, risk_assessment):
+        """Fill a cohort template with one patient's details, or None if the template cannot render them"""
+        weather_data = risk_assessment.get('weather_data') or {}
+        try:
+            return template.format(
+                first_name=patient.name.split()[0] if patient.name else 'Уважаемая',
+                age=patient.age if patient.age is not None else '',
+                weeks_pregnant=patient.weeks_pregnant if patient.weeks_pregnant is not None else '',
+                temperature=weather_data.get('temperature', '')
+            ).strip()
+        except (ValueError, IndexError, KeyError, TypeError) as e:
+            # Missing values render as '', which a format spec such as {age:d} rejects
+            current_app.logger.warning(f"Could not render message template for patient {patient.id}: {e}")
+            return None
     
     @staticmethod
     def _get_default_message(patient, risk_assessment):
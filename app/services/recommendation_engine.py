@@ -0,0 +1,289 @@
+from flask import current_app
+from functools import lru_cache
+from app.services.risk_service import RiskAssessmentService
+
+# Fallback lists shown next to failed, skipped or pending AI suggestions, by locale
+FALLBACK_RECOMMENDATIONS = {
+    'en': {
+        'high': (
+            "Immediate medical consultation recommended",
+            "Monitor vital signs closely",
+            "Avoid extreme weather conditions",
+            "Ensure emergency contact is available"
+        ),
+        'medium': (
+            "Regular medical check-ups recommended",
+            "Monitor symptoms closely",
+            "Follow prescribed medication schedule",
+            "Maintain healthy lifestyle"
+        ),
+        'low': (
+            "Continue regular prenatal care",
+            "Maintain healthy diet and exercise",
+            "Stay hydrated",
+            "Regular medical check-ups"
+        ),
+        'heat_wave': (
+            "Stay indoors during peak heat hours",
+            "Ensure adequate hydration",
+            "Use air conditioning if available",
+            "Wear light, loose clothing"
+        )
+    },
+    'ru': {
+        'high': (
+            "Немедленная консультация с врачом рекомендуется",
+            "Тщательно следите за жизненными показателями",
+            "Избегайте экстремальных погодных условий",
+            "Убедитесь, что экстренный контакт доступен"
+        ),
+        'medium': (
+            "Рекомендуются регулярные медицинские осмотры",
+            "Внимательно следите за симптомами",
+            "Соблюдайте предписанный график приема лекарств",
+            "Ведите здоровый образ жизни"
+        ),
+        'low': (
+            "Продолжайте регулярное дородовое наблюдение",
+            "Поддерживайте здоровую диету и физические упражнения",
+            "Пейте достаточно воды",
+            "Регулярные медицинские осмотры"
+        ),
+        'heat_wave': (
+            "Оставайтесь в помещении в часы пиковой жары",
+            "Обеспечьте адекватную гидратацию",
+            "Используйте кондиционер, если доступен",
+            "Носите легкую, свободную одежду"
+        )
+    },
+    # Shorter Russian advice returned by utils.helpers.get_risk_recommendations
+    'ru_brief': {
+        'high': (
+            'Регулярно консультируйтесь с врачом',
+            'Следите за артериальным давлением',
+            'Отслеживайте движения плода',
+            'Избегайте стрессовых ситуаций'
+        ),
+        'medium': (
+            'Планируйте регулярные визиты к врачу',
+            'Ведите здоровый образ жизни',
+            'Следите за питанием'
+        ),
+        'low': (
+            'Продолжайте регулярные визиты к врачу',
+            'Ведите активный образ жизни',
+            'Следите за общим самочувствием'
+        ),
+        'heat_wave': (
+            'Оставайтесь в прохладном месте',
+            'Пейте больше воды',
+            'Избегайте прямых солнечных лучей',
+            'Немедленно обратитесь к врачу при ухудшении самочувствия'
+        )
+    }
+}
+
+# ICD10 prefixes grouped into the condition groups the rule tables cover
+CONDITION_GROUPS = (
+    ('O24', 'diabetes'),
+    ('E11', 'diabetes'),
+    ('O13', 'hypertension'),
+    ('O14', 'hypertension'),
+    ('O15', 'hypertension'),
+    ('O16', 'hypertension'),
+    ('I10', 'hypertension'),
+    ('E03', 'thyroid'),
+    ('J45', 'asthma'),
+    ('D50', 'anemia'),
+    ('E66', 'obesity')
+)
+
+# Structured recommendation tables, in the shape of an AI answer (see AIService.RECOMMENDATION_KEYS)
+RISK_LEVEL_RULES = {
+    'high': {
+        'immediate_actions': ("Contact your healthcare provider within 24 hours", "Keep an emergency contact available"),
+        'medical_recommendations': ("Schedule a prenatal visit this week", "Review medications with your provider"),
+        'follow_up_schedule': ("Weekly prenatal visits",),
+        'priority_level': 'High'
+    },
+    'medium': {
+        'immediate_actions': ("Review your symptoms with your healthcare provider",),
+        'medical_recommendations': ("Keep regular prenatal appointments", "Follow the prescribed medication schedule"),
+        'follow_up_schedule': ("Prenatal visits every 2 weeks",),
+        'priority_level': 'Medium'
+    },
+    'low': {
+        'immediate_actions': ("Continue routine prenatal care",),
+        'medical_recommendations': ("Keep regular prenatal appointments",),
+        'follow_up_schedule': ("Prenatal visits as scheduled",),
+        'priority_level': 'Low'
+    }
+}
+
+HEAT_RULES = {
+    'heat_wave': ("Stay indoors with air conditioning during peak heat", "Drink water regularly, even without thirst", "Avoid outdoor activities"),
+    'hot': ("Limit outdoor exposure", "Stay hydrated", "Wear light, loose clothing"),
+    'warm': ("Take breaks in cool areas", "Stay hydrated"),
+    'mild': ("No special weather precautions needed",)
+}
+
+TRIMESTER_RULES = {
+    'first': {
+        'monitoring_guidelines': ("Report nausea that prevents eating or drinking",),
+        'emergency_signs': ("Vaginal bleeding", "Severe abdominal pain")
+    },
+    'second': {
+        'monitoring_guidelines': ("Note fetal movements once they begin",),
+        'emergency_signs': ("Vaginal bleeding", "Severe headache or vision changes")
+    },
+    'third': {
+        'monitoring_guidelines': ("Count fetal movements daily",),
+        'emergency_signs': ("Decreased fetal movement", "Fluid leakage", "Regular contractions before 37 weeks")
+    },
+    None: {
+        'monitoring_guidelines': ("Follow your provider's monitoring plan",),
+        'emergency_signs': ("Severe pain, bleeding, or unusual symptoms",)
+    }
+}
+
+CONDITION_RULES = {
+    'diabetes': {
+        'medical_recommendations': ("Follow your glucose management plan",),
+        'monitoring_guidelines': ("Check blood glucose as prescribed",),
+        'lifestyle_changes': ("Eat regular meals with limited simple sugars",)
+    },
+    'hypertension': {
+        'medical_recommendations': ("Take blood pressure medication as prescribed",),
+        'monitoring_guidelines': ("Measure blood pressure daily",),
+        'emergency_signs': ("Severe headache, vision changes or swelling of face and hands",)
+    },
+    'thyroid': {
+        'medical_recommendations': ("Check thyroid levels each trimester",)
+    },
+    'asthma': {
+        'medical_recommendations': ("Keep your inhaler with you",),
+        'lifestyle_changes': ("Avoid smoke and air pollution",)
+    },
+    'anemia': {
+        'medical_recommendations': ("Take iron supplements as prescribed",),
+        'lifestyle_changes': ("Eat iron-rich foods",)
+    },
+    'obesity': {
+        'lifestyle_changes': ("Follow the weight gain plan agreed with your provider",)
+    }
+}
+
+BASE_LIFESTYLE = ("Maintain a balanced diet", "Get regular light exercise if approved by your provider")
+
+
+class RecommendationEngine:
+    """Rule-based recommendations from precompiled tables, with AI reserved for unusual profiles"""
+    
+    @staticmethod
+    def get_fallback_recommendations(risk_level, risk_data, locale='en'):
+        """Get fallback recommendations when AI service is unavailable"""
+        return list(RecommendationEngine._get_fallback_list(locale, risk_level, bool(risk_data.get('heat_wave_risk', False))))
+    
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _get_fallback_list(locale, risk_level, heat_wave):
+        """Build the fallback list for a (locale, risk level, heat wave) key"""
+        table = FALLBACK_RECOMMENDATIONS[locale]
+        recommendations = table.get(risk_level, table['low'])
+        if heat_wave:
+            recommendations += table['heat_wave']
+        return recommendations
+    
+    @staticmethod
+    def get_condition_groups(patient):
+        """Sorted condition groups of a patient's ICD10 codes ('other'/'other_pregnancy' for codes without rules)"""
+        groups = set()
+        for code in (getattr(patient, 'pregnancy_icd10', None), getattr(patient, 'comorbidity_icd10', None)):
+            if not code:
+                continue
+            code = code.strip().upper()
+            for prefix, group in CONDITION_GROUPS:
+                if code.startswith(prefix):
+                    groups.add(group)
+                    break
+            else:
+                groups.add('other_pregnancy' if code.startswith('O') else 'other')
+        return tuple(sorted(groups))
+    
+    @staticmethod
+    def get_novelty_reasons(patient, risk_data):
+        """Reasons a profile is too unusual for the rule tables; empty when the rules cover it"""
+        reasons = []
+        
+        high_risk_codes = [
+            code for code in (getattr(patient, 'pregnancy_icd10', None), getattr(patient, 'comorbidity_icd10', None))
+            if code and (
+                code.strip().upper() in RiskAssessmentService.HIGH_RISK_PREGNANCY_CODES
+                or code.strip().upper() in RiskAssessmentService.HIGH_RISK_COMORBIDITY_CODES
+            )
+        ]
+        if len(high_risk_codes) > 1:
+            reasons.append('multiple_high_risk_codes')
+        
+        medications = patient.get_medications_list() if hasattr(patient, 'get_medications_list') else []
+        for medication in medications:
+            for name, description in RiskAssessmentService.HIGH_RISK_MEDICATIONS.items():
+                if name.lower() in medication.lower() and ('teratogenic' in description or 'contraindicated' in description):
+                    reasons.append('teratogenic_medication')
+                    break
+            if 'teratogenic_medication' in reasons:
+                break
+        
+        if any(group.startswith('other') for group in RecommendationEngine.get_condition_groups(patient)):
+            reasons.append('uncovered_condition')
+        
+        return reasons
+    
+    @staticmethod
+    def needs_ai(patient, risk_data):
+        """Check whether a profile should go to the AI rather than the rule tables"""
+        if not current_app.config.get('AI_RULES_TIER_ENABLED', True):
+            return True
+        return bool(RecommendationEngine.get_novelty_reasons(patient, risk_data))
+    
+    @staticmethod
+    def get_recommendations(patient, risk_data):
+        """Get structured recommendations for a profile from the rule tables"""
+        weather_data = risk_data.get('weather_data') or {}
+        if risk_data.get('heat_wave_risk'):
+            weather_data = dict(weather_data, is_heat_wave=True)
+        
+        recommendations = RecommendationEngine._compose(
+            risk_data.get('risk_level', 'low'),
+            RiskAssessmentService._weather_bucket(weather_data)[0],
+            RiskAssessmentService._trimester_band(getattr(patient, 'weeks_pregnant', None)),
+            RecommendationEngine.get_condition_groups(patient)
+        )
+        return {key: list(value) if isinstance(value, tuple) else value for key, value in recommendations.items()}
+    
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _compose(risk_level, heat_band, trimester_band, condition_groups):
+        """Compose the recommendation tables for a coarse profile key"""
+        level_rules = RISK_LEVEL_RULES.get(risk_level, RISK_LEVEL_RULES['low'])
+        trimester_rules = TRIMESTER_RULES[trimester_band]
+        recommendations = {
+            'immediate_actions': level_rules['immediate_actions'],
+            'medical_recommendations': level_rules['medical_recommendations'],
+            'lifestyle_changes': BASE_LIFESTYLE,
+            'monitoring_guidelines': trimester_rules['monitoring_guidelines'],
+            'emergency_signs': trimester_rules['emergency_signs'],
+            'weather_precautions': HEAT_RULES[heat_band],
+            'follow_up_schedule': level_rules['follow_up_schedule'],
+            'priority_level': level_rules['priority_level']
+        }
+        
+        if heat_band == 'heat_wave':
+            recommendations['immediate_actions'] += ("Move to a cool place and drink water now",)
+        
+        for group in condition_groups:
+            for key, values in CONDITION_RULES.get(group, {}).items():
+                recommendations[key] += values
+        
+        recommendations['source'] = 'rules'
+        return recommendations
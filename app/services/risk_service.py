@@ -1,9 +1,42 @@
 from app.services.weather_service import WeatherService
 from app.utils.exceptions import ExternalAPIException
+from app.utils.metrics import TimingRegistry
+from collections import namedtuple
+from functools import lru_cache
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Precomputed recommendation lists for a coarse (weather, trimester, age, conditions) profile
+RecommendationBlock = namedtuple('RecommendationBlock', [
+    'weather_risk_level',
+    'weather_risk_score',
+    'weather_recommendations',
+    'immediate_concerns',
+    'monitoring_needs',
+    'general_recommendations'
+])
 
 class RiskAssessmentService:
     """Service for risk assessment logic"""
     
+    # Factor functions covered by the optional per-factor instrumentation
+    FACTOR_FUNCTIONS = (
+        '_calculate_age_risk',
+        '_calculate_trimester_risk',
+        '_calculate_location_risk',
+        '_calculate_conditions_risk',
+        '_calculate_medications_risk',
+        '_calculate_age_group_risk',
+        '_calculate_additional_risk_factors',
+        '_determine_priority_level'
+    )
+    
+    factor_metrics = TimingRegistry()
+    _original_factor_functions = {}
+    _instrumentation_lock = threading.Lock()
+    
     # ICD10 codes that increase pregnancy risk (based on real data analysis)
     HIGH_RISK_PREGNANCY_CODES = {
         'O24.4': 'Gestational diabetes mellitus',
@@ -62,6 +95,38 @@ class RiskAssessmentService:
         'Vitamin D': 'Vitamin supplement - generally safe'
     }
     
+    @classmethod
+    def enable_instrumentation(cls):
+        """Record call counts and timings for every factor function"""
+        with cls._instrumentation_lock:
+            if cls._original_factor_functions:
+                return
+            for name in cls.FACTOR_FUNCTIONS:
+                original = cls.__dict__[name]
+                cls._original_factor_functions[name] = original
+                setattr(cls, name, staticmethod(cls.factor_metrics.timed(name, original.__func__)))
+    
+    @classmethod
+    def disable_instrumentation(cls):
+        """Restore the uninstrumented factor functions"""
+        with cls._instrumentation_lock:
+            for name, original in cls._original_factor_functions.items():
+                setattr(cls, name, original)
+            cls._original_factor_functions = {}
+    
+    @classmethod
+    def is_instrumentation_enabled(cls):
+        """Check whether factor functions are currently instrumented"""
+        return bool(cls._original_factor_functions)
+    
+    @classmethod
+    def get_factor_metrics(cls):
+        """Get collected per-factor call counts and timings"""
+        return {
+            'enabled': cls.is_instrumentation_enabled(),
+            'factors': cls.factor_metrics.snapshot()
+        }
+    
     @staticmethod
     def assess_risk(patient):
         """Assess risk for a patient based on multiple factors"""
@@ -78,17 +143,9 @@ class RiskAssessmentService:
         risk_score += trimester_risk['score']
         factors['trimester_risk'] = trimester_risk['level']
         
-        # Location factor (weather) - temporarily disabled
-        # Use default weather data to prevent API hanging
-        weather_data = {
-            'temperature': 25,
-            'feels_like': 25,
-            'humidity': 50,
-            'pressure': 1013,
-            'description': 'Weather API disabled',
-            'is_heat_wave': False,
-            'heat_index': 25
-        }
+        # Location factor (weather) - read from the cache the prefetcher keeps warm,
+        # so assessments never wait on the weather API
+        weather_data = WeatherService.get_cached_weather(patient.zip_code)
         location_risk = RiskAssessmentService._calculate_location_risk(weather_data)
         risk_score += location_risk['score']
         factors['location_risk'] = location_risk['level']
@@ -125,7 +182,9 @@ class RiskAssessmentService:
             'risk_score': risk_score,
             'factors': factors,
             'heat_wave_risk': factors.get('heat_wave', False),
-            'weather_data': weather_data
+            'weather_data': weather_data,
+            'weather_as_of': weather_data.get('as_of'),
+            'weather_stale': weather_data.get('stale', False)
         }
     
     @staticmethod
@@ -229,20 +288,13 @@ class RiskAssessmentService:
     @staticmethod
     def get_comprehensive_risk_assessment(patient):
         """Get comprehensive risk assessment with detailed analysis"""
+        risk_data = None
         try:
             # Get basic risk assessment
             risk_data = RiskAssessmentService.assess_risk(patient)
             
-            # Get weather data - temporarily disabled
-            weather_data = {
-                'temperature': 25,
-                'feels_like': 25,
-                'humidity': 50,
-                'pressure': 1013,
-                'description': 'Weather API disabled',
-                'is_heat_wave': False,
-                'heat_index': 25
-            }
+            # Reuse the weather data the basic assessment already read
+            weather_data = risk_data['weather_data']
             
             # Calculate additional risk factors
             additional_factors = RiskAssessmentService._calculate_additional_risk_factors(patient, weather_data)
@@ -271,81 +323,153 @@ class RiskAssessmentService:
             
         except Exception as e:
             logger.error(f"Error in comprehensive risk assessment: {e}")
-            # Return basic assessment if comprehensive fails
+            # Return basic assessment if comprehensive fails, reusing it when already computed
             return {
                 'patient_id': patient.id,
                 'patient_name': patient.name,
-                'basic_risk': RiskAssessmentService.assess_risk(patient),
+                'basic_risk': risk_data if risk_data is not None else RiskAssessmentService.assess_risk(patient),
                 'error': 'Comprehensive assessment unavailable'
             }
     
     @staticmethod
     def _calculate_additional_risk_factors(patient, weather_data):
         """Calculate additional risk factors beyond basic assessment"""
-        factors = {
-            'weather_risk': {'level': 'low', 'score': 0},
-            'weather_recommendations': [],
-            'immediate_concerns': [],
-            'monitoring_needs': [],
-            'general_recommendations': []
-        }
+        block = RiskAssessmentService._get_recommendation_block(
+            RiskAssessmentService._weather_bucket(weather_data),
+            RiskAssessmentService._trimester_band(patient.weeks_pregnant),
+            RiskAssessmentService._age_band(patient.age),
+            bool(patient.pregnancy_icd10 or patient.comorbidity_icd10)
+        )
         
-        # Weather-specific analysis
+        return {
+            'weather_risk': {'level': block.weather_risk_level, 'score': block.weather_risk_score},
+            'weather_recommendations': list(block.weather_recommendations),
+            'immediate_concerns': list(block.immediate_concerns),
+            'monitoring_needs': list(block.monitoring_needs),
+            'general_recommendations': list(block.general_recommendations)
+        }
+    
+    @staticmethod
+    def _weather_bucket(weather_data):
+        """Map weather conditions to a coarse (temperature, humidity) bucket"""
         temperature = weather_data.get('temperature', 25)
         humidity = weather_data.get('humidity', 50)
-        is_heat_wave = weather_data.get('is_heat_wave', False)
         
-        if is_heat_wave:
-            factors['weather_risk'] = {'level': 'high', 'score': 3}
-            factors['immediate_concerns'].append("Extreme heat wave conditions")
-            factors['weather_recommendations'].extend([
+        if weather_data.get('is_heat_wave', False):
+            temperature_band = 'heat_wave'
+        elif temperature > 35:
+            temperature_band = 'hot'
+        elif temperature > 30:
+            temperature_band = 'warm'
+        else:
+            temperature_band = 'mild'
+        
+        if humidity > 80:
+            humidity_band = 'humid'
+        elif humidity < 30:
+            humidity_band = 'dry'
+        else:
+            humidity_band = 'normal'
+        
+        return (temperature_band, humidity_band)
+    
+    @staticmethod
+    def _trimester_band(weeks_pregnant):
+        """Map weeks pregnant to the band used for monitoring recommendations"""
+        if not weeks_pregnant:
+            return None
+        if weeks_pregnant > 28:  # Third trimester
+            return 'third'
+        if weeks_pregnant < 12:  # First trimester
+            return 'first'
+        return 'second'
+    
+    @staticmethod
+    def _age_band(age):
+        """Map age to the band used for monitoring recommendations"""
+        return 'outside' if age < 18 or age > 35 else 'typical'
+    
+    @staticmethod
+    def precompute_recommendation_blocks():
+        """Build the recommendation block for every coarse profile key up front"""
+        for temperature_band in ('heat_wave', 'hot', 'warm', 'mild'):
+            for humidity_band in ('humid', 'dry', 'normal'):
+                for trimester_band in ('first', 'second', 'third', None):
+                    for age_band in ('outside', 'typical'):
+                        for has_conditions in (True, False):
+                            RiskAssessmentService._get_recommendation_block(
+                                (temperature_band, humidity_band), trimester_band, age_band, has_conditions
+                            )
+    
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _get_recommendation_block(weather_bucket, trimester_band, age_band, has_conditions):
+        """Build the immutable recommendation block for a coarse profile key"""
+        temperature_band, humidity_band = weather_bucket
+        weather_risk = ('low', 0)
+        weather_recommendations = []
+        immediate_concerns = []
+        monitoring_needs = []
+        general_recommendations = []
+        
+        # Weather-specific analysis
+        if temperature_band == 'heat_wave':
+            weather_risk = ('high', 3)
+            immediate_concerns.append("Extreme heat wave conditions")
+            weather_recommendations.extend([
                 "Stay indoors with air conditioning",
                 "Drink plenty of water",
                 "Avoid outdoor activities",
                 "Monitor for heat exhaustion symptoms"
             ])
-        elif temperature > 35:
-            factors['weather_risk'] = {'level': 'high', 'score': 2}
-            factors['immediate_concerns'].append("High temperature risk")
-            factors['weather_recommendations'].extend([
+        elif temperature_band == 'hot':
+            weather_risk = ('high', 2)
+            immediate_concerns.append("High temperature risk")
+            weather_recommendations.extend([
                 "Limit outdoor exposure",
                 "Stay hydrated",
                 "Wear light, loose clothing"
             ])
-        elif temperature > 30:
-            factors['weather_risk'] = {'level': 'medium', 'score': 1}
-            factors['weather_recommendations'].extend([
+        elif temperature_band == 'warm':
+            weather_risk = ('medium', 1)
+            weather_recommendations.extend([
                 "Take breaks in cool areas",
                 "Stay hydrated",
                 "Monitor for overheating"
             ])
         
         # Humidity considerations
-        if humidity > 80:
-            factors['weather_recommendations'].append("High humidity increases heat stress - take extra precautions")
-        elif humidity < 30:
-            factors['weather_recommendations'].append("Low humidity - ensure adequate hydration")
+        if humidity_band == 'humid':
+            weather_recommendations.append("High humidity increases heat stress - take extra precautions")
+        elif humidity_band == 'dry':
+            weather_recommendations.append("Low humidity - ensure adequate hydration")
         
         # Patient-specific considerations
-        if patient.weeks_pregnant:
-            if patient.weeks_pregnant > 28:  # Third trimester
-                factors['monitoring_needs'].append("Increased monitoring due to third trimester")
-                factors['general_recommendations'].append("More frequent prenatal check-ups recommended")
-            elif patient.weeks_pregnant < 12:  # First trimester
-                factors['monitoring_needs'].append("Early pregnancy monitoring important")
-                factors['general_recommendations'].append("Avoid extreme temperatures during early pregnancy")
+        if trimester_band == 'third':
+            monitoring_needs.append("Increased monitoring due to third trimester")
+            general_recommendations.append("More frequent prenatal check-ups recommended")
+        elif trimester_band == 'first':
+            monitoring_needs.append("Early pregnancy monitoring important")
+            general_recommendations.append("Avoid extreme temperatures during early pregnancy")
         
         # Age considerations
-        if patient.age < 18 or patient.age > 35:
-            factors['monitoring_needs'].append("Age-related risk factors require closer monitoring")
-            factors['general_recommendations'].append("Consider additional prenatal care due to age")
+        if age_band == 'outside':
+            monitoring_needs.append("Age-related risk factors require closer monitoring")
+            general_recommendations.append("Consider additional prenatal care due to age")
         
         # Medical conditions
-        if patient.pregnancy_icd10 or patient.comorbidity_icd10:
-            factors['monitoring_needs'].append("Medical conditions require specialized monitoring")
-            factors['general_recommendations'].append("Follow medical provider's specific instructions")
-        
-        return factors
+        if has_conditions:
+            monitoring_needs.append("Medical conditions require specialized monitoring")
+            general_recommendations.append("Follow medical provider's specific instructions")
+        
+        return RecommendationBlock(
+            weather_risk_level=weather_risk[0],
+            weather_risk_score=weather_risk[1],
+            weather_recommendations=tuple(weather_recommendations),
+            immediate_concerns=tuple(immediate_concerns),
+            monitoring_needs=tuple(monitoring_needs),
+            general_recommendations=tuple(general_recommendations)
+        )
     
     @staticmethod
     def _determine_priority_level(risk_data):
@@ -477,3 +601,5 @@ class RiskAssessmentService:
                 'level': 'high',
                 'details': ['Outside optimal age range (17-35 years)']
             }
+
+RiskAssessmentService.precompute_recommendation_blocks()
@@ -0,0 +1,233 @@
+"""
+Shared TTL cache backed by a local SQLite file.
+
+Every gunicorn worker opens the same database file, so an entry written by
+one worker is served to all of them. Hit/miss counters are kept per process;
+entry counts and ages are read from the shared store.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+CacheEntry = namedtuple('CacheEntry', ['value', 'stored_at', 'expires_at', 'is_fallback'])
+
+class SharedCache:
+    """TTL cache for JSON-serializable values, shared between processes through SQLite"""
+    
+    # Expired rows are purged once every this many writes
+    PURGE_EVERY = 200
+    
+    def __init__(self, path, namespace, retention=0, max_entries=None):
+        self.path = path
+        self.namespace = namespace
+        # Seconds to keep expired rows around so callers can still peek at them
+        self.retention = retention
+        # Upper bound on rows in the namespace; the oldest rows are evicted past it
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._writes = 0
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evicted = 0
+    
+    def _connection(self):
+        """Get the SQLite connection for this process, reopening it after a fork"""
+        if self._conn is None or self._pid != os.getpid():
+            if self.path != ':memory:':
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            if self.path != ':memory:':
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entries ('
+                'namespace TEXT NOT NULL, '
+                'key TEXT NOT NULL, '
+                'value TEXT NOT NULL, '
+                'stored_at REAL NOT NULL, '
+                'expires_at REAL NOT NULL, '
+                'is_fallback INTEGER NOT NULL DEFAULT 0, '
+                'PRIMARY KEY (namespace, key))'
+            )
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+    
+    def get(self, key):
+        """Get a live entry for `key`, or None if it is missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._connection().execute(
+                'SELECT value, stored_at, expires_at, is_fallback FROM cache_entries '
+                'WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            ).fetchone()
+            
+            if row is None:
+                self._misses += 1
+                return None
+            if row[2] <= now:
+                self._misses += 1
+                self._expired += 1
+                return None
+            self._hits += 1
+        
+        return CacheEntry(json.loads(row[0]), row[1], row[2], bool(row[3]))
+    
+    def peek(self, key):
+        """Get the entry for `key` even if it has expired, without touching the hit/miss counters"""
+        with self._lock:
+            row = self._connection().execute(
+                'SELECT value, stored_at, expires_at, is_fallback FROM cache_entries '
+                'WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            ).fetchone()
+        
+        if row is None:
+            return None
+        return CacheEntry(json.loads(row[0]), row[1], row[2], bool(row[3]))
+    
+    def items(self, prefix=''):
+        """Get (key, entry) pairs for every live entry whose key starts with `prefix`"""
+        now = time.time()
+        escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT key, value, stored_at, expires_at, is_fallback FROM cache_entries "
+                "WHERE namespace = ? AND key LIKE ? ESCAPE '\\' AND expires_at > ? ORDER BY key",
+                (self.namespace, escaped + '%', now)
+            ).fetchall()
+        
+        return [(row[0], CacheEntry(json.loads(row[1]), row[2], row[3], bool(row[4]))) for row in rows]
+    
+    def set(self, key, value, ttl, is_fallback=False):
+        """Store `value` under `key` for `ttl` seconds and return the stored entry"""
+        now = time.time()
+        payload = json.dumps(value)
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO cache_entries '
+                '(namespace, key, value, stored_at, expires_at, is_fallback) VALUES (?, ?, ?, ?, ?, ?)',
+                (self.namespace, key, payload, now, now + ttl, int(is_fallback))
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                conn.execute(
+                    'DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?',
+                    (self.namespace, now - self.retention)
+                )
+            if self.max_entries:
+                self._evict(conn, now)
+        
+        return CacheEntry(value, now, now + ttl, is_fallback)
+    
+    def _evict(self, conn, now):
+        """Delete expired rows first, then the oldest ones, until the namespace fits in max_entries"""
+        excess = conn.execute(
+            'SELECT COUNT(*) FROM cache_entries WHERE namespace = ?', (self.namespace,)
+        ).fetchone()[0] - self.max_entries
+        if excess > 0:
+            cursor = conn.execute(
+                'DELETE FROM cache_entries WHERE namespace = ? AND key IN ('
+                'SELECT key FROM cache_entries WHERE namespace = ? '
+                'ORDER BY expires_at > ?, stored_at LIMIT ?)',
+                (self.namespace, self.namespace, now, excess)
+            )
+            self._evicted += cursor.rowcount
+    
+    def add(self, key, value, ttl):
+        """Store `value` under `key` only if there is no live entry; return True if it was stored
+        
+        Atomic across processes, so it can serve as a short-lived lease.
+        """
+        now = time.time()
+        payload = json.dumps(value)
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute(
+                    'DELETE FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at <= ?',
+                    (self.namespace, key, now)
+                )
+                cursor = conn.execute(
+                    'INSERT OR IGNORE INTO cache_entries '
+                    '(namespace, key, value, stored_at, expires_at, is_fallback) VALUES (?, ?, ?, ?, ?, 0)',
+                    (self.namespace, key, payload, now, now + ttl)
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        
+        return cursor.rowcount == 1
+    
+    def delete(self, key):
+        """Remove the entry for `key`"""
+        with self._lock:
+            self._connection().execute(
+                'DELETE FROM cache_entries WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            )
+    
+    def clear(self):
+        """Remove every entry in this namespace and reset the counters"""
+        with self._lock:
+            self._connection().execute('DELETE FROM cache_entries WHERE namespace = ?', (self.namespace,))
+            self._hits = self._misses = self._expired = self._evicted = 0
+    
+    def stats(self):
+        """Get hit/miss counters for this process and age metrics for the shared entries"""
+        now = time.time()
+        with self._lock:
+            row = self._connection().execute(
+                'SELECT COUNT(*), SUM(is_fallback), MIN(stored_at), AVG(stored_at) FROM cache_entries '
+                'WHERE namespace = ? AND expires_at > ?',
+                (self.namespace, now)
+            ).fetchone()
+            hits, misses, expired, evicted = self._hits, self._misses, self._expired, self._evicted
+        
+        entries, fallback_entries, oldest, average = row
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'expired': expired,
+            'evicted': evicted,
+            'hit_rate': round(hits / lookups, 3) if lookups else 0,
+            'entries': entries,
+            'fallback_entries': fallback_entries or 0,
+            'oldest_entry_age_seconds': round(now - oldest, 1) if oldest else 0,
+            'average_entry_age_seconds': round(now - average, 1) if average else 0,
+            'pid': os.getpid()
+        }
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_shared_cache(namespace, retention=None, max_entries=None):
+    """Get the process-wide SharedCache for `namespace` using the app's CACHE_DB_PATH"""
+    path = current_app.config.get('CACHE_DB_PATH', ':memory:')
+    with _caches_lock:
+        cache = _caches.get((path, namespace))
+        if cache is None:
+            cache = _caches[(path, namespace)] = SharedCache(path, namespace)
+        if retention is not None:
+            cache.retention = retention
+        if max_entries is not None:
+            cache.max_entries = max_entries
+        return cache
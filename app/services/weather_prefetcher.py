@@ -0,0 +1,178 @@
+"""
+Background weather prefetcher.
+
+Keeps the shared weather cache warm for every location in the patient store,
+so request handlers can read weather with WeatherService.get_cached_weather
+and never wait on OpenWeatherMap. Every worker starts a prefetcher thread, but
+only the one holding the lock file refreshes; the others stand by and take
+over if that worker exits.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+import logging
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class WeatherPrefetcher:
+    """Refreshes cached weather for all distinct patient locations on a schedule"""
+    
+    def __init__(self, app):
+        self.app = app
+        self.interval = app.config.get('WEATHER_PREFETCH_INTERVAL', 300)
+        self.max_calls_per_minute = app.config.get('WEATHER_PREFETCH_MAX_CALLS_PER_MINUTE', 30)
+        self.lock_path = app.config.get('WEATHER_PREFETCH_LOCK_FILE', 'instance/weather_prefetch.lock')
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_file = None
+        self.is_leader = False
+        self.last_cycle = None
+    
+    def start(self):
+        """Start the background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='weather-prefetcher', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the background thread and release the leader lock"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._release_lock()
+    
+    def status(self):
+        """Get the prefetcher state for the metrics endpoint"""
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'is_leader': self.is_leader,
+            'interval_seconds': self.interval,
+            'max_calls_per_minute': self.max_calls_per_minute,
+            'last_cycle': self.last_cycle
+        }
+    
+    def _run(self):
+        """Main loop: refresh once per interval while holding the leader lock"""
+        while not self._stop.is_set():
+            if self._acquire_lock():
+                try:
+                    with self.app.app_context():
+                        self.run_cycle()
+                except Exception as e:
+                    logger.error(f"Weather prefetch cycle failed: {e}")
+            self._stop.wait(self.interval)
+    
+    def run_cycle(self):
+        """Refresh every location whose cache entry is missing or expires before the next cycle"""
+        from app.services.weather_service import WeatherService
+        
+        started = time.time()
+        zip_codes = self._get_patient_zip_codes()
+        locations = WeatherService.group_zips_by_location(zip_codes)
+        
+        # Spread upstream calls evenly to stay within the rate budget
+        spacing = 60.0 / self.max_calls_per_minute if self.max_calls_per_minute else 0
+        refreshed = 0
+        skipped = 0
+        
+        for location_key, location_zips in locations.items():
+            if self._stop.is_set():
+                break
+            
+            entry = WeatherService.peek_cache_entry(location_zips[0])
+            if entry is not None and not entry.is_fallback and entry.expires_at - time.time() > self.interval:
+                skipped += 1
+                continue
+            
+            try:
+                WeatherService.refresh_weather_data(location_zips[0], force=True)
+                refreshed += 1
+            except Exception as e:
+                logger.warning(f"Failed to prefetch weather for {location_key}: {e}")
+            
+            if spacing:
+                self._stop.wait(spacing)
+        
+        # Rebuild the heat-wave lookahead index from the refreshed forecasts
+        try:
+            from app.services.heat_wave_service import HeatWaveService
+            HeatWaveService.rebuild_index()
+        except Exception as e:
+            logger.warning(f"Failed to rebuild heat-wave index: {e}")
+        
+        self.last_cycle = {
+            'started_at': datetime.utcfromtimestamp(started).isoformat(),
+            'duration_seconds': round(time.time() - started, 2),
+            'zip_codes': len(zip_codes),
+            'locations': len(locations),
+            'refreshed': refreshed,
+            'skipped_fresh': skipped
+        }
+        logger.info(f"Weather prefetch cycle: {self.last_cycle}")
+        return self.last_cycle
+    
+    def _get_patient_zip_codes(self):
+        """Get the distinct zip codes in the patient store"""
+        from app.models.csv_models import csv_manager
+        
+        return sorted({patient.zip_code for patient in csv_manager.get_all_patients() if patient.zip_code})
+    
+    def _acquire_lock(self):
+        """Try to become the single refreshing process"""
+        if self.is_leader:
+            return True
+        if fcntl is None:
+            self.is_leader = True
+            return True
+        
+        try:
+            directory = os.path.dirname(self.lock_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            lock_file = open(self.lock_path, 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            self._lock_file = lock_file
+            self.is_leader = True
+            logger.info(f"Weather prefetcher leader in process {os.getpid()}")
+            return True
+        except OSError as e:
+            logger.warning(f"Could not open weather prefetch lock file: {e}")
+            return False
+    
+    def _release_lock(self):
+        """Release the leader lock if held"""
+        if self._lock_file is not None:
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            finally:
+                self._lock_file.close()
+                self._lock_file = None
+        self.is_leader = False
+
+weather_prefetcher = None
+
+def init_weather_prefetcher(app):
+    """Create and start the prefetcher for this process"""
+    global weather_prefetcher
+    weather_prefetcher = WeatherPrefetcher(app)
+    weather_prefetcher.start()
+    return weather_prefetcher
+
+def get_prefetcher_status():
+    """Get this process's prefetcher status, or a stub when it was not started"""
+    if weather_prefetcher is None:
+        return {'running': False, 'is_leader': False, 'last_cycle': None}
+    return weather_prefetcher.status()
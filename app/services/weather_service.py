@@ -1,22 +1,364 @@
 import requests
-from flask import current_app
-from app.utils.exceptions import ExternalAPIException
+from flask import current_app, has_app_context
+from app.utils.exceptions import ExternalAPIException, CircuitOpenException
+from app.utils.circuit_breaker import CircuitBreaker
+from app.services.shared_cache import get_shared_cache
+from app.services.http_client import get_weather_session, get_weather_timeout, get_weather_url
+from app.services.geocoding_service import GeocodingService
+from app.utils.metrics import TimingRegistry
+from app.utils import heat
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
+from urllib.parse import urlparse
+from datetime import datetime
 import logging
+import math
+import os
 import time
-from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+# Coarse grid cell shared by nearby zip codes; lat/lon is the cell center
+WeatherCell = namedtuple('WeatherCell', ['key', 'lat', 'lon'])
+
+# Result of a batch lookup: weather by zip code for the locations that resolved, plus the zips that did not
+WeatherBatch = namedtuple('WeatherBatch', ['weather', 'failed'])
+
 class WeatherService:
     """Service for weather data integration"""
     
+    upstream_metrics = TimingRegistry()
+    
+    # One circuit breaker per upstream endpoint path, per process
+    _breakers = {}
+    _breakers_lock = threading.Lock()
+    
+    # Background stale-while-revalidate refreshes
+    _refresh_executor = None
+    _refresh_executor_pid = None
+    _refresh_lock = threading.Lock()
+    
     @staticmethod
-    @lru_cache(maxsize=100)
     def get_weather_data(zip_code):
-        """Get weather data by zip code using OpenWeatherMap API with caching"""
+        """Get weather data by zip code using OpenWeatherMap API with caching
+        
+        Expired entries are served immediately (marked stale) while a single
+        background refresh runs; only a miss waits on the upstream fetch.
+        """
+        cache_key = f"current:{WeatherService.get_location_key(zip_code)}"
+        
+        weather_data = WeatherService._read_cached(cache_key, zip_code)
+        if weather_data is not None:
+            return weather_data
+        
+        return WeatherService.refresh_weather_data(zip_code)
+    
+    @staticmethod
+    def get_cached_weather(zip_code):
+        """Get weather data from the cache only, falling back to default data on a miss
+        
+        Never calls an upstream API, so it is safe on the request path; the
+        background prefetcher keeps the cache warm.
+        """
+        if not has_app_context():
+            return WeatherService._with_freshness(WeatherService._get_default_weather_data(), None)
+        
+        cache_key = f"current:{WeatherService.get_location_key(zip_code, fetch=False)}"
+        weather_data = WeatherService._read_cached(cache_key, zip_code)
+        if weather_data is not None:
+            return weather_data
+        return WeatherService._with_freshness(WeatherService._get_default_weather_data(), None)
+    
+    @staticmethod
+    def refresh_weather_data(zip_code, force=False):
+        """Rebuild a zip code's current-conditions cache entry
+        
+        The OneCall document cached for the location is reused unless `force`
+        is set, in which case it is fetched again from upstream. A failed
+        refresh keeps the last good entry while it is within WEATHER_MAX_STALENESS
+        and only records the failure, so readers keep getting stale data
+        rather than defaults during an outage.
+        """
+        cache = WeatherService._get_cache()
+        cache_key = f"current:{WeatherService.get_location_key(zip_code)}"
+        weather_data = WeatherService._fetch_weather_data(zip_code, force=force)
+        fallback_ttl = current_app.config.get('WEATHER_CACHE_FALLBACK_TTL', 60)
+        
+        if WeatherService._is_default_weather_data(weather_data):
+            entry = cache.peek(cache_key)
+            if WeatherService._is_servable(entry):
+                # Suppress background refreshes of this key until the failure expires
+                cache.set(f"failed:{cache_key}", True, fallback_ttl)
+                return WeatherService._annotate_entry(entry, stale=entry.expires_at <= time.time())
+            
+            # Default data is only a stand-in for a failed lookup, so keep it briefly
+            entry = cache.set(cache_key, weather_data, fallback_ttl, is_fallback=True)
+        else:
+            entry = cache.set(cache_key, weather_data, current_app.config.get('WEATHER_CACHE_TTL', 600))
+        
+        return WeatherService._annotate_entry(entry, stale=False)
+    
+    @staticmethod
+    def _read_cached(cache_key, zip_code):
+        """Get annotated weather for a cache key, serving an expired entry within WEATHER_MAX_STALENESS
+        
+        Serving an expired entry schedules a background refresh. Returns None
+        when there is nothing usable and the caller has to fetch.
+        """
+        cache = WeatherService._get_cache()
+        entry = cache.get(cache_key)
+        if entry is not None:
+            return WeatherService._annotate_entry(entry, stale=False)
+        
+        entry = cache.peek(cache_key)
+        if not WeatherService._is_servable(entry):
+            return None
+        
+        WeatherService._schedule_refresh(cache_key, zip_code)
+        return WeatherService._annotate_entry(entry, stale=True)
+    
+    @staticmethod
+    def _is_servable(entry):
+        """Check whether a cache entry holds upstream data that is fresh or within WEATHER_MAX_STALENESS"""
+        if entry is None or entry.is_fallback:
+            return False
+        return time.time() - entry.expires_at <= current_app.config.get('WEATHER_MAX_STALENESS', 3600)
+    
+    @staticmethod
+    def _schedule_refresh(cache_key, zip_code):
+        """Refresh a cache key in the background, at most once at a time across all workers
+        
+        Skipped while a recent refresh of the key has failed (see refresh_weather_data).
+        """
+        cache = WeatherService._get_cache()
+        failure = cache.peek(f"failed:{cache_key}")
+        if failure is not None and failure.expires_at > time.time():
+            return
+        
+        # The lease lives in the shared cache, so concurrent readers in other workers skip it too
+        lease_ttl = sum(get_weather_timeout()) * 2
+        if not cache.add(f"refresh:{cache_key}", os.getpid(), lease_ttl):
+            return
+        
+        app = current_app._get_current_object()
+        
+        def refresh():
+            with app.app_context():
+                try:
+                    WeatherService.refresh_weather_data(zip_code, force=True)
+                except Exception as e:
+                    logger.warning(f"Background weather refresh failed for {cache_key}: {e}")
+                finally:
+                    WeatherService._get_cache().delete(f"refresh:{cache_key}")
+        
+        WeatherService._get_refresh_executor().submit(refresh)
+    
+    @staticmethod
+    def _get_refresh_executor():
+        """Get this process's executor for background refreshes"""
+        with WeatherService._refresh_lock:
+            if WeatherService._refresh_executor is None or WeatherService._refresh_executor_pid != os.getpid():
+                WeatherService._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='weather-refresh')
+                WeatherService._refresh_executor_pid = os.getpid()
+            return WeatherService._refresh_executor
+    
+    @staticmethod
+    def _annotate_entry(entry, stale):
+        """Attach freshness metadata to a cached value; default data has no observation time"""
+        if entry.is_fallback:
+            return WeatherService._with_freshness(entry.value, None)
+        return WeatherService._with_freshness(entry.value, entry.stored_at, stale)
+    
+    @staticmethod
+    def _with_freshness(weather_data, stored_at, stale=False):
+        """Copy weather data with `as_of` (when it was fetched) and `stale` (served past its TTL)"""
+        return dict(
+            weather_data,
+            as_of=datetime.utcfromtimestamp(stored_at).isoformat() if stored_at else None,
+            stale=stale
+        )
+    
+    @staticmethod
+    def get_weather_for_zips(zip_codes, deadline=None, max_workers=None):
+        """Get weather for many zip codes, fetching each distinct location concurrently
+        
+        Cached locations are answered directly; the rest are fetched on a bounded
+        thread pool. Zips without known coordinates are geocoded inside their
+        pooled fetch, so the deadline covers geocoding too. Locations not resolved
+        within `deadline` seconds, or whose fetch failed, are reported in `failed`
+        instead of blocking the caller.
+        """
+        config = current_app.config
+        if deadline is None:
+            deadline = config.get('WEATHER_FANOUT_DEADLINE', 8)
+        if max_workers is None:
+            max_workers = config.get('WEATHER_FANOUT_MAX_WORKERS', 8)
+        
+        weather = {}
+        failed = []
+        pending = {}
+        
+        zip_codes = sorted(set(filter(None, zip_codes)))
+        for location_key, location_zips in WeatherService.group_zips_by_location(zip_codes, fetch=False).items():
+            weather_data = WeatherService._read_cached(f"current:{location_key}", location_zips[0])
+            if weather_data is None:
+                pending[location_key] = location_zips
+            elif weather_data['as_of'] is None:
+                # A recent lookup already failed; don't retry until the fallback entry expires
+                failed.extend(location_zips)
+            else:
+                weather.update((zip_code, weather_data) for zip_code in location_zips)
+        
+        if not pending:
+            return WeatherBatch(weather, sorted(failed))
+        
+        app = current_app._get_current_object()
+        
+        def fetch(zip_code):
+            with app.app_context():
+                return WeatherService.refresh_weather_data(zip_code)
+        
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(pending)), thread_name_prefix='weather-fanout')
+        try:
+            futures = {executor.submit(fetch, location_zips[0]): location_zips for location_zips in pending.values()}
+            done, not_done = wait(futures, timeout=deadline)
+        finally:
+            # Late fetches still finish in the background and warm the cache for the next caller
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        for future in done:
+            location_zips = futures[future]
+            try:
+                weather_data = future.result()
+            except Exception as e:
+                logger.warning(f"Weather fetch failed for {location_zips[0]}: {e}")
+                failed.extend(location_zips)
+                continue
+            
+            if WeatherService._is_default_weather_data(weather_data):
+                failed.extend(location_zips)
+            else:
+                weather.update((zip_code, weather_data) for zip_code in location_zips)
+        
+        for future in not_done:
+            failed.extend(futures[future])
+        
+        if not_done:
+            logger.warning(f"Weather fan-out deadline of {deadline}s reached with {len(not_done)} locations pending")
+        
+        return WeatherBatch(weather, sorted(failed))
+    
+    @staticmethod
+    def peek_cache_entry(zip_code):
+        """Get the cache entry for a zip code's location, expired or not, without counting a lookup"""
+        return WeatherService._get_cache().peek(f"current:{WeatherService.get_location_key(zip_code, fetch=False)}")
+    
+    @staticmethod
+    def get_location_cell(zip_code, fetch=True):
+        """Map a zip code to its coarse weather grid cell, or None if it cannot be located"""
+        coordinates = GeocodingService.get_coordinates(zip_code, fetch=fetch)
+        if coordinates is None:
+            return None
+        
+        size = current_app.config.get('WEATHER_CELL_DEGREES', 0.25)
+        lat_index = math.floor(coordinates[0] / size)
+        lon_index = math.floor(coordinates[1] / size)
+        return WeatherCell(
+            key=f"{lat_index}:{lon_index}",
+            lat=round((lat_index + 0.5) * size, 4),
+            lon=round((lon_index + 0.5) * size, 4)
+        )
+    
+    @staticmethod
+    def get_location_key(zip_code, fetch=True):
+        """Get the cache key for a zip code: its grid cell when known, otherwise the zip itself"""
+        cell = WeatherService.get_location_cell(zip_code, fetch=fetch)
+        return f"cell:{cell.key}" if cell else f"zip:{zip_code}"
+    
+    @staticmethod
+    def group_zips_by_location(zip_codes, fetch=True):
+        """Group zip codes that share a weather location key
+        
+        With fetch=False zips without local coordinates are not geocoded and each
+        gets its own 'zip:' key.
+        """
+        groups = {}
+        for zip_code in zip_codes:
+            groups.setdefault(WeatherService.get_location_key(zip_code, fetch=fetch), []).append(zip_code)
+        return groups
+    
+    @staticmethod
+    def get_cache_metrics():
+        """Get hit/miss/age metrics for the shared weather cache"""
+        return WeatherService._get_cache().stats()
+    
+    @staticmethod
+    def get_upstream_metrics():
+        """Get per-endpoint counts and timings of upstream weather calls made by this process"""
+        return WeatherService.upstream_metrics.snapshot()
+    
+    @staticmethod
+    def _get_cache():
+        """Get the weather cache shared by all worker processes"""
+        # Keep expired entries long enough to be served stale
+        return get_shared_cache('weather', retention=current_app.config.get('WEATHER_MAX_STALENESS', 3600))
+    
+    @staticmethod
+    def get_breaker_metrics():
+        """Get the state of every upstream circuit breaker in this process"""
+        with WeatherService._breakers_lock:
+            breakers = list(WeatherService._breakers.values())
+        return {breaker.name: breaker.snapshot() for breaker in breakers}
+    
+    @staticmethod
+    def _get_breaker(endpoint):
+        """Get the circuit breaker guarding an upstream endpoint"""
+        breaker = WeatherService._breakers.get(endpoint)
+        if breaker is not None:
+            return breaker
+        
+        with WeatherService._breakers_lock:
+            breaker = WeatherService._breakers.get(endpoint)
+            if breaker is None:
+                breaker = WeatherService._breakers[endpoint] = CircuitBreaker(
+                    endpoint,
+                    failure_threshold=current_app.config.get('WEATHER_BREAKER_FAILURE_THRESHOLD', 5),
+                    reset_timeout=current_app.config.get('WEATHER_BREAKER_RESET_TIMEOUT', 30)
+                )
+            return breaker
+    
+    @staticmethod
+    def _http_get(url, params):
+        """Issue a GET through the pooled weather session, guarded by the endpoint's circuit breaker"""
+        endpoint = urlparse(url).path
+        breaker = WeatherService._get_breaker(endpoint)
+        if not breaker.allow_request():
+            raise CircuitOpenException(f"Circuit open for {endpoint}")
+        
+        start = time.perf_counter()
+        try:
+            response = get_weather_session().get(url, params=params, timeout=get_weather_timeout())
+        except Exception:
+            # Any error must end a half-open trial, or the breaker would reject calls until it reopens
+            breaker.record_failure()
+            raise
+        finally:
+            WeatherService.upstream_metrics.record(endpoint, time.perf_counter() - start)
+        
+        # Only outages count against the breaker; a 4xx means the endpoint is answering
+        if response.status_code == 429 or response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+    
+    @staticmethod
+    def _fetch_weather_data(zip_code, force=False):
+        """Fetch weather data from the upstream APIs, falling back to default data"""
         try:
             # Try OneCall API first (more comprehensive data)
-            return WeatherService.get_onecall_weather_data(zip_code)
+            return WeatherService.get_onecall_weather_data(zip_code, force=force)
         except Exception as e:
             logger.warning(f"OneCall API failed, trying Current Weather API: {e}")
             # Fallback to Current Weather API
@@ -28,24 +370,69 @@ class WeatherService:
                 return WeatherService._get_default_weather_data()
     
     @staticmethod
-    def get_onecall_weather_data(zip_code):
-        """Get weather data using OneCall API (3.0)"""
+    def get_onecall_weather_data(zip_code, force=False):
+        """Get current conditions derived from the location's OneCall document"""
+        return WeatherService._process_weather_data(WeatherService.get_onecall_document(zip_code, force=force))
+    
+    @staticmethod
+    def get_onecall_document(zip_code, force=False):
+        """Get the raw OneCall (3.0) response for a zip code's location
+        
+        One document per grid cell is cached and shared by the current-conditions,
+        forecast and alert views. Failed fetches are negatively cached for the
+        fallback TTL. Raises ExternalAPIException when no document is available.
+        """
+        # OneCall only accepts coordinates, so query the center of the zip's grid cell
+        cell = WeatherService.get_location_cell(zip_code)
+        if cell is None:
+            raise ExternalAPIException(f"No coordinates available for zip code {zip_code}")
+        
+        cache = WeatherService._get_cache()
+        cache_key = f"onecall:cell:{cell.key}"
+        if not force:
+            entry = cache.get(cache_key)
+            if entry is not None:
+                if entry.value is None:
+                    raise ExternalAPIException(f"OneCall API recently failed for {cell.key}")
+                return entry.value
+            
+            # Serve an expired document within the staleness limit and refresh it in the background
+            entry = cache.peek(cache_key)
+            if entry is not None and entry.value is not None and \
+                    time.time() - entry.expires_at <= current_app.config.get('WEATHER_MAX_STALENESS', 3600):
+                WeatherService._schedule_refresh(f"current:cell:{cell.key}", zip_code)
+                return entry.value
+        
         try:
-            url = "http://api.openweathermap.org/data/3.0/onecall"
+            document = WeatherService._fetch_onecall_document(cell)
+        except ExternalAPIException:
+            # Keep a stale document for the other views; only negatively cache when there is none
+            if not WeatherService._is_servable(cache.peek(cache_key)):
+                cache.set(cache_key, None, current_app.config.get('WEATHER_CACHE_FALLBACK_TTL', 60), is_fallback=True)
+            raise
+        
+        cache.set(cache_key, document, current_app.config.get('WEATHER_CACHE_TTL', 600))
+        return document
+    
+    @staticmethod
+    def _fetch_onecall_document(cell):
+        """Fetch the full OneCall response for a grid cell center"""
+        try:
+            url = get_weather_url('/data/3.0/onecall')
             params = {
-                'zip': zip_code,
+                'lat': cell.lat,
+                'lon': cell.lon,
                 'appid': current_app.config['WEATHER_API_KEY'],
                 'units': 'metric'
             }
-            response = requests.get(url, params=params, timeout=5)
+            response = WeatherService._http_get(url, params)
             
             if response.status_code == 200:
-                data = response.json()
-                return WeatherService._process_weather_data(data)
+                return response.json()
             else:
                 raise ExternalAPIException(f"OneCall API returned status {response.status_code}")
-                
-        except requests.exceptions.RequestException as e:
+        
+        except (requests.exceptions.RequestException, ValueError) as e:
             logger.error(f"OneCall API error: {e}")
             raise ExternalAPIException(f"OneCall API error: {str(e)}")
     
@@ -53,20 +440,20 @@ class WeatherService:
     def get_current_weather_data(zip_code):
         """Get weather data using Current Weather API (2.5)"""
         try:
-            url = "http://api.openweathermap.org/data/2.5/weather"
+            url = get_weather_url('/data/2.5/weather')
             params = {
                 'zip': zip_code,
                 'appid': current_app.config['WEATHER_API_KEY'],
                 'units': 'metric'
             }
-            response = requests.get(url, params=params, timeout=5)
+            response = WeatherService._http_get(url, params)
             
             if response.status_code == 200:
                 data = response.json()
                 return WeatherService._process_weather_data(data)
             else:
                 raise ExternalAPIException(f"Current Weather API returned status {response.status_code}")
-                
+        
         except requests.exceptions.RequestException as e:
             logger.error(f"Current Weather API error: {e}")
             # Return default values if API fails
@@ -76,47 +463,46 @@ class WeatherService:
     def get_weather_forecast(zip_code, days=5):
         """Get weather forecast for multiple days"""
         try:
-            url = "http://api.openweathermap.org/data/2.5/forecast"
+            return WeatherService._process_onecall_forecast(WeatherService.get_onecall_document(zip_code), days)
+        except ExternalAPIException as e:
+            logger.warning(f"OneCall forecast unavailable, trying Forecast API: {e}")
+            return WeatherService._fetch_forecast_data(zip_code, days)
+    
+    @staticmethod
+    def _fetch_forecast_data(zip_code, days):
+        """Get a forecast from the 5 day / 3 hour Forecast API (2.5)"""
+        try:
+            url = get_weather_url('/data/2.5/forecast')
             params = {
-                'zip': zip_code,
                 'appid': current_app.config['WEATHER_API_KEY'],
                 'units': 'metric',
                 'cnt': days * 8  # 8 forecasts per day (every 3 hours)
             }
-            response = requests.get(url, params=params, timeout=5)
+            cell = WeatherService.get_location_cell(zip_code)
+            if cell:
+                params.update({'lat': cell.lat, 'lon': cell.lon})
+            else:
+                params['zip'] = zip_code
+            response = WeatherService._http_get(url, params)
             
             if response.status_code == 200:
                 data = response.json()
                 return WeatherService._process_forecast_data(data)
             else:
                 raise ExternalAPIException(f"Weather forecast API returned status {response.status_code}")
-                
-        except requests.exceptions.RequestException as e:
+        
+        except (requests.exceptions.RequestException, CircuitOpenException) as e:
             logger.error(f"Weather forecast API error: {e}")
             return WeatherService._get_default_forecast_data()
     
     @staticmethod
     def get_weather_alerts(zip_code):
-        """Get weather alerts and warnings using OneCall API"""
+        """Get weather alerts and warnings from the location's OneCall document"""
         try:
-            url = "http://api.openweathermap.org/data/3.0/onecall"
-            params = {
-                'zip': zip_code,
-                'appid': current_app.config['WEATHER_API_KEY'],
-                'units': 'metric',
-                'exclude': 'minutely,hourly,daily'
-            }
-            response = requests.get(url, params=params, timeout=5)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return WeatherService._process_alert_data(data)
-            else:
-                # Fallback to basic weather data
-                return WeatherService.get_weather_data(zip_code)
-                
-        except requests.exceptions.RequestException as e:
+            return WeatherService._process_alert_data(WeatherService.get_onecall_document(zip_code))
+        except ExternalAPIException as e:
             logger.error(f"Weather alerts API error: {e}")
+            # Fallback to basic weather data
             return WeatherService.get_weather_data(zip_code)
     
     @staticmethod
@@ -134,10 +520,9 @@ class WeatherService:
         current = data.get('current', {})
         weather = current.get('weather', [{}])[0]
         
-        # Convert temperature from Kelvin to Celsius
-        temperature = current.get('temp', 295.15) - 273.15
-        feels_like = current.get('feels_like', temperature + 273.15) - 273.15
+        temperature, feels_like = WeatherService._onecall_temperatures(current)
         humidity = current.get('humidity', 50)
+        heat_index = WeatherService._calculate_heat_index(temperature, humidity)
         
         return {
             'temperature': round(temperature, 1),
@@ -145,15 +530,15 @@ class WeatherService:
             'humidity': humidity,
             'pressure': current.get('pressure', 1013),
             'description': weather.get('description', 'Unknown'),
-            'is_heat_wave': WeatherService._is_heat_wave(temperature, humidity),
-            'heat_index': WeatherService._calculate_heat_index(temperature, humidity),
+            'is_heat_wave': WeatherService._is_heat_wave(temperature, humidity, heat_index),
+            'heat_index': heat_index,
             'uv_index': current.get('uvi', 0),
             'wind_speed': current.get('wind_speed', 0),
             'wind_deg': current.get('wind_deg', 0),
             'wind_gust': current.get('wind_gust', 0),
             'visibility': current.get('visibility', 10000),
             'cloudiness': current.get('clouds', 0),
-            'dew_point': current.get('dew_point', 0) - 273.15,  # Convert from Kelvin
+            'dew_point': current.get('dew_point', 0),
             'sunrise': current.get('sunrise', 0),
             'sunset': current.get('sunset', 0),
             'timestamp': current.get('dt', 0),
@@ -178,6 +563,7 @@ class WeatherService:
         
         temperature = main.get('temp', 25)
         humidity = main.get('humidity', 50)
+        heat_index = WeatherService._calculate_heat_index(temperature, humidity)
         
         return {
             'temperature': temperature,
@@ -185,8 +571,8 @@ class WeatherService:
             'humidity': humidity,
             'pressure': main.get('pressure', 1013),
             'description': weather.get('description', 'Unknown'),
-            'is_heat_wave': WeatherService._is_heat_wave(temperature, humidity),
-            'heat_index': WeatherService._calculate_heat_index(temperature, humidity),
+            'is_heat_wave': WeatherService._is_heat_wave(temperature, humidity, heat_index),
+            'heat_index': heat_index,
             'uv_index': data.get('uvi', 0),
             'wind_speed': data.get('wind', {}).get('speed', 0),
             'wind_deg': data.get('wind', {}).get('deg', 0),
@@ -228,15 +614,16 @@ class WeatherService:
     @staticmethod
     def _process_forecast_data(data):
         """Process forecast data from API response"""
-        forecasts = []
+        items = data.get('list', [])
+        temperatures = [item.get('main', {}).get('temp', 25) for item in items]
+        humidities = [item.get('main', {}).get('humidity', 50) for item in items]
+        heat_indexes, heat_waves = heat.analyze_series(temperatures, humidities)
         
-        for item in data.get('list', []):
+        forecasts = []
+        for item, temperature, humidity, heat_index, is_heat_wave in zip(items, temperatures, humidities, heat_indexes, heat_waves):
             main = item.get('main', {})
             weather = item.get('weather', [{}])[0]
             
-            temperature = main.get('temp', 25)
-            humidity = main.get('humidity', 50)
-            
             forecasts.append({
                 'datetime': item.get('dt', 0),
                 'temperature': temperature,
@@ -244,8 +631,8 @@ class WeatherService:
                 'humidity': humidity,
                 'pressure': main.get('pressure', 1013),
                 'description': weather.get('description', 'Unknown'),
-                'is_heat_wave': WeatherService._is_heat_wave(temperature, humidity),
-                'heat_index': WeatherService._calculate_heat_index(temperature, humidity),
+                'is_heat_wave': is_heat_wave,
+                'heat_index': heat_index,
                 'precipitation_probability': item.get('pop', 0) * 100,
                 'wind_speed': item.get('wind', {}).get('speed', 0)
             })
@@ -258,6 +645,127 @@ class WeatherService:
             }
         }
     
+    @staticmethod
+    def _process_onecall_forecast(data, days):
+        """Build the forecast view from a OneCall document"""
+        entries = WeatherService._select_onecall_forecast_entries(data, days)
+        heat_indexes, heat_waves = heat.analyze_series(
+            [entry[1] for entry in entries],
+            [entry[0].get('humidity', 50) for entry in entries]
+        )
+        
+        forecasts = []
+        for (item, temperature, feels_like, hours), heat_index, is_heat_wave in zip(entries, heat_indexes, heat_waves):
+            weather = item.get('weather', [{}])[0]
+            forecasts.append({
+                'datetime': item.get('dt', 0),
+                'temperature': temperature,
+                'feels_like': feels_like if feels_like is not None else temperature,
+                'humidity': item.get('humidity', 50),
+                'pressure': item.get('pressure', 1013),
+                'description': weather.get('description', 'Unknown'),
+                'is_heat_wave': is_heat_wave,
+                'heat_index': heat_index,
+                'precipitation_probability': item.get('pop', 0) * 100,
+                'wind_speed': item.get('wind_speed', 0)
+            })
+        
+        return {
+            'forecasts': forecasts,
+            'location': {
+                'name': 'Unknown',  # OneCall doesn't provide city name
+                'country': 'Unknown'
+            }
+        }
+    
+    @staticmethod
+    def _select_onecall_forecast_entries(data, days):
+        """Pick (item, temperature, feels_like, hours) forecast entries from a OneCall document
+        
+        The first 48 hours come from the hourly series at 3-hour steps, matching
+        the Forecast API; later days come from the daily series.
+        """
+        entries = []
+        horizon = data.get('current', {}).get('dt', 0) + days * 24 * 3600
+        
+        for item in data.get('hourly', [])[::3]:
+            if item.get('dt', 0) >= horizon:
+                break
+            entries.append((item, *WeatherService._onecall_temperatures(item), 3))
+        
+        last_hourly = entries[-1][0].get('dt', 0) if entries else 0
+        for item in data.get('daily', []):
+            if item.get('dt', 0) >= horizon:
+                break
+            if item.get('dt', 0) <= last_hourly:
+                continue
+            entries.append((item, *WeatherService._onecall_temperatures(item), 24))
+        
+        return entries
+    
+    @staticmethod
+    def _onecall_temperatures(item):
+        """Get (temperature, feels_like) in °C from a OneCall current, hourly or daily item
+        
+        Every OneCall document is fetched with units=metric, so all views read
+        temperatures through here unconverted; daily items use their daytime value.
+        """
+        temperature = item.get('temp', 25)
+        feels_like = item.get('feels_like')
+        if isinstance(temperature, dict):
+            temperature = temperature.get('day', 25)
+        if isinstance(feels_like, dict):
+            feels_like = feels_like.get('day')
+        return temperature, feels_like if feels_like is not None else temperature
+    
+    @staticmethod
+    def get_heat_exposure(days=5, patient_counts=None):
+        """Score forecast heat exposure for every location with a cached OneCall document
+        
+        All locations are flattened into one series and scored in a single
+        vectorized pass. `patient_counts` maps location keys to patient counts
+        and weights each location's exposure; locations are ranked by it.
+        """
+        patient_counts = patient_counts or {}
+        documents = [
+            (key[len('onecall:'):], entry.value)
+            for key, entry in WeatherService._get_cache().items('onecall:')
+            if entry.value
+        ]
+        
+        location_index, temperatures, humidities, hours = [], [], [], []
+        for index, (location_key, document) in enumerate(documents):
+            for item, temperature, feels_like, slot_hours in WeatherService._select_onecall_forecast_entries(document, days):
+                location_index.append(index)
+                temperatures.append(temperature)
+                humidities.append(item.get('humidity', 50))
+                hours.append(slot_hours)
+        
+        if not temperatures:
+            return {'days': days, 'locations': [], 'total_patient_degree_hours': 0}
+        
+        degree_hours, heat_wave_hours, peak = heat.exposure_by_location(location_index, temperatures, humidities, hours, len(documents))
+        
+        locations = []
+        for index, (location_key, document) in enumerate(documents):
+            count = patient_counts.get(location_key, 0)
+            locations.append({
+                'location': location_key,
+                'coordinates': {'lat': document.get('lat', 0), 'lon': document.get('lon', 0)},
+                'peak_heat_index': round(float(peak[index]), 1),
+                'heat_wave_hours': float(heat_wave_hours[index]),
+                'degree_hours': round(float(degree_hours[index]), 1),
+                'patient_count': count,
+                'patient_degree_hours': round(float(degree_hours[index]) * count, 1)
+            })
+        locations.sort(key=lambda location: (location['patient_degree_hours'], location['degree_hours']), reverse=True)
+        
+        return {
+            'days': days,
+            'locations': locations,
+            'total_patient_degree_hours': round(sum(location['patient_degree_hours'] for location in locations), 1)
+        }
+    
     @staticmethod
     def _process_alert_data(data):
         """Process alert data from API response"""
@@ -270,11 +778,12 @@ class WeatherService:
         }
     
     @staticmethod
-    def _is_heat_wave(temperature, humidity):
+    def _is_heat_wave(temperature, humidity, heat_index=None):
         """Determine if current conditions constitute a heat wave"""
         # Heat wave criteria: temperature > 35°C OR heat index > 40°C
-        heat_index = WeatherService._calculate_heat_index(temperature, humidity)
-        return temperature > 35 or heat_index > 40
+        if heat_index is None:
+            heat_index = WeatherService._calculate_heat_index(temperature, humidity)
+        return temperature > heat.HEAT_WAVE_TEMPERATURE or heat_index > heat.HEAT_WAVE_HEAT_INDEX
     
     @staticmethod
     def _get_default_weather_data():
@@ -307,6 +816,12 @@ class WeatherService:
             'minutely_precipitation': []
         }
     
+    @staticmethod
+    def _is_default_weather_data(weather_data):
+        """Check whether weather data is the built-in default rather than an upstream result"""
+        data = {key: value for key, value in weather_data.items() if key not in ('as_of', 'stale')}
+        return data == WeatherService._get_default_weather_data()
+    
     @staticmethod
     def _get_default_forecast_data():
         """Get default forecast data when API fails"""
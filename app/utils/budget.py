@@ -0,0 +1,72 @@
+import threading
+import time
+
+
+class LatencyBudget:
+    """Request-scoped time budget for slow upstream calls
+    
+    The clock starts when the budget is created, so it covers the whole request.
+    A budget of None or <= 0 milliseconds never runs out. Callers record how
+    many items finished within the budget and how many were skipped once it ran out.
+    """
+    
+    def __init__(self, budget_ms=None):
+        self.budget_ms = budget_ms if budget_ms and budget_ms > 0 else None
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self._completed = 0
+        self._skipped = 0
+        self._used = False
+    
+    @property
+    def deadline(self):
+        """Monotonic time at which the budget runs out, or None if unlimited"""
+        if self.budget_ms is None:
+            return None
+        return self._started + self.budget_ms / 1000
+    
+    def remaining(self):
+        """Seconds left, or None if unlimited"""
+        if self.budget_ms is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+    
+    def expired(self):
+        """Check whether the budget has run out"""
+        return self.budget_ms is not None and time.monotonic() >= self.deadline
+    
+    def record(self, completed=0, skipped=0):
+        """Count items finished within the budget and items skipped because it ran out"""
+        with self._lock:
+            self._completed += completed
+            self._skipped += skipped
+            self._used = True
+    
+    @property
+    def used(self):
+        """Whether any work was recorded against the budget"""
+        with self._lock:
+            return self._used
+    
+    def summary(self):
+        """Budget usage for a response summary"""
+        used_ms = (time.monotonic() - self._started) * 1000
+        with self._lock:
+            return {
+                'budget_ms': self.budget_ms,
+                'used_ms': round(used_ms, 1),
+                'remaining_ms': None if self.budget_ms is None else round(max(0.0, self.budget_ms - used_ms), 1),
+                'exhausted': self._skipped > 0,
+                'completed': self._completed,
+                'skipped': self._skipped
+            }
+
+def add_budget_summary(summary, budget):
+    """Add `budget` usage to a response summary as 'ai_budget', unless nothing ran under it
+    
+    Work queued elsewhere (e.g. background AI jobs) never touches the budget,
+    so reporting it would only show an empty summary.
+    """
+    if budget is not None and budget.used:
+        summary['ai_budget'] = budget.summary()
+    return summary
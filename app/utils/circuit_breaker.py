@@ -0,0 +1,90 @@
+import threading
+import time
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for a single upstream endpoint
+    
+    Closed: calls pass through. After `failure_threshold` consecutive failures
+    it opens and rejects calls for `reset_timeout` seconds, then lets a single
+    trial call through (half-open); success closes it, failure reopens it.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._rejected = 0
+        self._times_opened = 0
+    
+    @property
+    def state(self):
+        """Current state, moving from open to half-open once the reset timeout has passed"""
+        with self._lock:
+            return self._current_state()
+    
+    def _current_state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+    
+    def allow_request(self):
+        """Check whether a call may go upstream now"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self._rejected += 1
+            return False
+    
+    def record_success(self):
+        """Record a successful call and close the breaker"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+    
+    def record_failure(self):
+        """Record a failed call, opening the breaker at the threshold or after a failed trial"""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+    
+    def reset(self):
+        """Force the breaker closed and clear its counters"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+            self._rejected = 0
+            self._times_opened = 0
+    
+    def snapshot(self):
+        """Get the breaker state and counters"""
+        with self._lock:
+            state = self._current_state()
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'times_opened': self._times_opened,
+                'rejected_calls': self._rejected,
+                'retry_in_seconds': round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 1) if state == self.OPEN else 0
+            }
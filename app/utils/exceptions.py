@@ -15,3 +15,7 @@ class ExternalAPIException(HealthNotifierException):
 class DatabaseException(HealthNotifierException):
     """Исключение для ошибок базы данных"""
     pass
+
+class CircuitOpenException(ExternalAPIException):
+    """Исключение, когда вызов внешнего API заблокирован открытым предохранителем"""
+    pass
@@ -0,0 +1,79 @@
+"""
+Vectorized heat-stress kernel.
+
+Computes the heat index and heat-wave flags for whole temperature/humidity
+series in one numpy pass, and aggregates per-location exposure from a single
+flattened series covering every location.
+"""
+
+import numpy as np
+
+# Heat wave criteria: temperature > 35°C OR heat index > 40°C
+HEAT_WAVE_TEMPERATURE = 35
+HEAT_WAVE_HEAT_INDEX = 40
+
+# Heat index above which time counts toward exposure ("extreme caution", °C)
+EXPOSURE_THRESHOLD = 32
+
+
+def heat_index(temperature_c, humidity):
+    """Heat index in Celsius for arrays of temperatures (°C) and relative humidity (%)"""
+    temp_f = np.asarray(temperature_c, dtype=float) * 9 / 5 + 32
+    humidity = np.asarray(humidity, dtype=float)
+    
+    hi = -42.379 + 2.04901523 * temp_f + 10.14333127 * humidity
+    hi += -0.22475541 * temp_f * humidity - 6.83783e-3 * temp_f**2
+    hi += -5.481717e-2 * humidity**2 + 1.22874e-3 * temp_f**2 * humidity
+    hi += 8.5282e-4 * temp_f * humidity**2 - 1.99e-6 * temp_f**2 * humidity**2
+    
+    return (hi - 32) * 5 / 9
+
+
+def heat_wave_flags(temperature_c, heat_index_c):
+    """Boolean heat-wave mask from temperatures and their precomputed heat index"""
+    return (np.asarray(temperature_c, dtype=float) > HEAT_WAVE_TEMPERATURE) | (np.asarray(heat_index_c) > HEAT_WAVE_HEAT_INDEX)
+
+
+def analyze_series(temperature_c, humidity):
+    """Heat index and heat-wave flags for a series, as plain Python lists"""
+    hi = heat_index(temperature_c, humidity)
+    return hi.tolist(), heat_wave_flags(temperature_c, hi).tolist()
+
+
+def exposure_by_location(location_index, temperature_c, humidity, hours, location_count):
+    """Aggregate heat exposure per location from one flattened series
+    
+    `location_index[i]` says which location sample i belongs to and `hours[i]`
+    how long the sample stands for. Returns arrays of length `location_count`:
+    degree-hours of heat index above EXPOSURE_THRESHOLD, heat-wave hours and
+    peak heat index.
+    """
+    location_index = np.asarray(location_index, dtype=np.intp)
+    hours = np.asarray(hours, dtype=float)
+    hi = heat_index(temperature_c, humidity)
+    flags = heat_wave_flags(temperature_c, hi)
+    
+    degree_hours = np.bincount(location_index, weights=np.maximum(hi - EXPOSURE_THRESHOLD, 0) * hours, minlength=location_count)
+    heat_wave_hours = np.bincount(location_index, weights=flags * hours, minlength=location_count)
+    peak = np.full(location_count, -np.inf)
+    np.maximum.at(peak, location_index, hi)
+    
+    return degree_hours, heat_wave_hours, peak
+
+
+def heat_wave_runs(location_index, temperature_c, humidity):
+    """Find runs of consecutive heat-wave samples within each location of a flattened series
+    
+    Returns (starts, ends, heat_index): inclusive sample positions of every
+    run, never spanning two locations, and the heat index of every sample.
+    """
+    location_index = np.asarray(location_index, dtype=np.intp)
+    hi = heat_index(temperature_c, humidity)
+    flags = heat_wave_flags(temperature_c, hi)
+    
+    same_as_previous = np.concatenate(([False], location_index[1:] == location_index[:-1]))
+    previous_flag = np.concatenate(([False], flags[:-1])) & same_as_previous
+    same_as_next = np.concatenate((location_index[:-1] == location_index[1:], [False]))
+    next_flag = np.concatenate((flags[1:], [False])) & same_as_next
+    
+    return np.flatnonzero(flags & ~previous_flag), np.flatnonzero(flags & ~next_flag), hi
@@ -96,34 +96,5 @@ def calculate_risk_percentage(risk_score: int, max_score: int = 8) -> int:
 
 def get_risk_recommendations(risk_level: str, heat_wave: bool = False) -> List[str]:
     """Get recommendations based on risk level"""
-    recommendations = []
-    
-    if risk_level == 'high':
-        recommendations.extend([
-            'Регулярно консультируйтесь с врачом',
-            'Следите за артериальным давлением',
-            'Отслеживайте движения плода',
-            'Избегайте стрессовых ситуаций'
-        ])
-    elif risk_level == 'medium':
-        recommendations.extend([
-            'Планируйте регулярные визиты к врачу',
-            'Ведите здоровый образ жизни',
-            'Следите за питанием'
-        ])
-    else:
-        recommendations.extend([
-            'Продолжайте регулярные визиты к врачу',
-            'Ведите активный образ жизни',
-            'Следите за общим самочувствием'
-        ])
-    
-    if heat_wave:
-        recommendations.extend([
-            'Оставайтесь в прохладном месте',
-            'Пейте больше воды',
-            'Избегайте прямых солнечных лучей',
-            'Немедленно обратитесь к врачу при ухудшении самочувствия'
-        ])
-    
-    return recommendations
+    from app.services.recommendation_engine import RecommendationEngine
+    return RecommendationEngine.get_fallback_recommendations(risk_level, {'heat_wave_risk': heat_wave}, 'ru_brief')
@@ -0,0 +1,131 @@
+import math
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+
+class TimingRegistry:
+    """Thread-safe call counters and cumulative timings keyed by name"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+    
+    def record(self, name, elapsed):
+        """Record a single call of `name` that took `elapsed` seconds"""
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = {'calls': 0, 'total_time': 0.0, 'max_time': 0.0}
+            stats['calls'] += 1
+            stats['total_time'] += elapsed
+            if elapsed > stats['max_time']:
+                stats['max_time'] = elapsed
+    
+    def timed(self, name, func):
+        """Wrap `func` so every call is recorded under `name`"""
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+        return wrapper
+    
+    def snapshot(self):
+        """Return a copy of the collected stats with derived averages (times in ms)"""
+        with self._lock:
+            items = [(name, dict(stats)) for name, stats in self._stats.items()]
+        
+        result = {}
+        for name, stats in items:
+            calls = stats['calls']
+            result[name] = {
+                'calls': calls,
+                'total_ms': round(stats['total_time'] * 1000, 3),
+                'avg_ms': round(stats['total_time'] * 1000 / calls, 4) if calls else 0,
+                'max_ms': round(stats['max_time'] * 1000, 3)
+            }
+        return result
+    
+    def reset(self):
+        """Drop all collected stats"""
+        with self._lock:
+            self._stats = {}
+
+
+def _nearest_rank(sorted_values, percent):
+    """Nearest-rank percentile of a non-empty sorted list"""
+    index = math.ceil(percent / 100 * len(sorted_values)) - 1
+    return sorted_values[min(len(sorted_values) - 1, max(0, index))]
+
+
+class LatencyWindow:
+    """Thread-safe rolling window of recent call latencies and errors keyed by name
+    
+    Each name keeps its last `size` calls; percentiles only use calls from the
+    last `max_age` seconds, so a slow period stops counting once it is over.
+    """
+    
+    def __init__(self, size=200, max_age=300):
+        self.size = size
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._totals = {}
+    
+    def record(self, name, elapsed, ok=True):
+        """Record one call of `name` that took `elapsed` seconds"""
+        with self._lock:
+            calls = self._calls.get(name)
+            if calls is None:
+                calls = self._calls[name] = deque(maxlen=self.size)
+                self._totals[name] = {'calls': 0, 'errors': 0}
+            calls.append((time.monotonic(), elapsed, ok))
+            self._totals[name]['calls'] += 1
+            if not ok:
+                self._totals[name]['errors'] += 1
+    
+    def _recent(self, name):
+        cutoff = time.monotonic() - self.max_age
+        return [(elapsed, ok) for recorded_at, elapsed, ok in self._calls.get(name, ()) if recorded_at >= cutoff]
+    
+    def percentile(self, name, percent, min_samples=1):
+        """Latency percentile of recent calls in seconds, or None with fewer than `min_samples` calls"""
+        with self._lock:
+            latencies = sorted(elapsed for elapsed, _ in self._recent(name))
+        if len(latencies) < max(1, min_samples):
+            return None
+        return _nearest_rank(latencies, percent)
+    
+    def snapshot(self):
+        """Return totals and recent-window latency stats per name (times in ms)"""
+        with self._lock:
+            items = [(name, self._recent(name), dict(self._totals[name])) for name in self._calls]
+        
+        result = {}
+        for name, recent, totals in items:
+            latencies = sorted(elapsed for elapsed, _ in recent)
+            
+            def pick(percent):
+                return round(_nearest_rank(latencies, percent) * 1000, 3) if latencies else None
+            
+            result[name] = {
+                'calls': totals['calls'],
+                'errors': totals['errors'],
+                'recent_calls': len(recent),
+                'recent_error_rate': round(sum(1 for _, ok in recent if not ok) / len(recent), 4) if recent else 0,
+                'p50_ms': pick(50),
+                'p90_ms': pick(90),
+                'p95_ms': pick(95),
+                'max_ms': round(latencies[-1] * 1000, 3) if latencies else None
+            }
+        return result
+    
+    def reset(self):
+        """Drop all recorded calls"""
+        with self._lock:
+            self._calls = {}
+            self._totals = {}
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark: request count, prompt size and wall time of AI recommendations for
+a population, one prompt per patient versus batched multi-patient prompts,
+against the local Gemini stub.
+
+The recommendation cache and the rule tier are disabled so every profile reaches the stub.
+
+Usage:
+    python benchmarks/bench_ai_batching.py --patients 100 --latency-ms 300
+    python benchmarks/bench_ai_batching.py --patients 100 --batch-sizes 1 5 10
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gemini_stub import DEFAULT_ANSWER, start_stub_server
+from app import create_app
+from app.models.csv_models import CSVPatient
+from app.services.ai_service import AIService
+from app.services.gemini_client import reset_models
+
+def prompt_text(request):
+    """Text of the prompt sent in a generateContent request body"""
+    return ''.join(part.get('text', '') for content in request.get('contents', []) for part in content.get('parts', []))
+
+def stub_answer(request):
+    """Answer batched prompts with one array entry per patient_id and single prompts with one object"""
+    patient_ids = [
+        json.loads(line.strip())['patient_id']
+        for line in prompt_text(request).splitlines()
+        if line.strip().startswith('{"patient_id"')
+    ]
+    if not patient_ids:
+        return DEFAULT_ANSWER
+    answer = {key: DEFAULT_ANSWER.get(key, ['Follow your care plan']) for key, _ in AIService.RECOMMENDATION_KEYS}
+    answer['priority_level'] = 'Medium'
+    return [dict(answer, patient_id=patient_id) for patient_id in patient_ids]
+
+def population(count):
+    """Synthetic patients with distinct profiles"""
+    return [
+        (
+            CSVPatient({'id': index, 'name': f'Patient {index}', 'age': 18 + index % 25,
+                        'weeks_pregnant': 4 + index % 36, 'zip_code': f"{10001 + index % 50:05d}"}),
+            {'risk_level': ['low', 'medium', 'high'][index % 3], 'risk_score': index % 10, 'factors': {},
+             'weather_data': {'temperature': 25 + index % 12, 'humidity': 40 + index % 50, 'is_heat_wave': index % 4 == 0}}
+        )
+        for index in range(1, count + 1)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description='Batched AI prompt benchmark against a local Gemini stub')
+    parser.add_argument('--patients', type=int, default=100, help='Patients to enrich')
+    parser.add_argument('--latency-ms', type=float, default=300, help='Simulated model latency')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 5, 10], help='AI_BATCH_SIZE values to compare')
+    parser.add_argument('--workers', type=int, default=8, help='AI_ENRICHMENT_MAX_WORKERS')
+    args = parser.parse_args()
+    
+    server = start_stub_server(latency_ms=args.latency_ms, answer=stub_answer)
+    app = create_app('testing')
+    app.config.update(
+        GEMINI_API_KEY='stub',
+        GEMINI_API_ENDPOINT=server.base_url,
+        GEMINI_TRANSPORT='rest',
+        AI_CACHE_ENABLED=False,
+        AI_RULES_TIER_ENABLED=False,
+        AI_ENRICHMENT_MAX_WORKERS=args.workers
+    )
+    pairs = population(args.patients)
+    
+    print(f"🤖 Stub Gemini at {server.base_url}: latency {args.latency_ms} ms, "
+          f"{args.patients} patients, {args.workers} workers")
+    try:
+        with app.app_context():
+            reset_models()
+            for batch_size in args.batch_sizes:
+                app.config['AI_BATCH_SIZE'] = batch_size
+                server.reset_counts()
+                start = time.perf_counter()
+                results = AIService.get_risk_recommendations_for_patients(pairs)
+                elapsed = time.perf_counter() - start
+                
+                prompt_chars = sum(len(prompt_text(request)) for request in server.requests)
+                answered = sum(1 for result in results if result is not None)
+                print(f"batch size {batch_size:>3}: {len(server.requests):4d} requests   "
+                      f"{prompt_chars:8d} prompt chars   {elapsed * 1000:8.1f} ms   {answered}/{len(pairs)} answered")
+    finally:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
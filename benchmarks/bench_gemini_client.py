@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-call cost of configuring Gemini and building a GenerativeModel
+on every request versus reusing the shared model, against a local Gemini stub.
+
+"per-call setup" reproduces the old code path (genai.configure + new
+GenerativeModel before each generate_content); "shared model" goes through
+app.services.gemini_client.get_model. Setup and total call time are reported
+separately.
+
+Usage:
+    python benchmarks/bench_gemini_client.py --calls 200
+    python benchmarks/bench_gemini_client.py --calls 200 --latency-ms 50
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import google.generativeai as genai
+from gemini_stub import start_stub_server
+from app import create_app
+from app.services.gemini_client import get_model, reset_models
+
+PROMPT = 'Give heat safety recommendations for a pregnant patient in the third trimester.'
+
+def per_call_setup(app):
+    """The previous code path: configure the library and build a model for every call"""
+    config = app.config
+    genai.configure(
+        api_key=config['GEMINI_API_KEY'],
+        transport=config['GEMINI_TRANSPORT'],
+        client_options={'api_endpoint': config['GEMINI_API_ENDPOINT']}
+    )
+    return genai.GenerativeModel(config['GEMINI_MODEL'])
+
+def shared_model(app):
+    return get_model()
+
+def measure(app, get_model_for_call, calls):
+    """Time `calls` sequential generate_content calls; returns (setup ms, total ms) lists"""
+    setup, total = [], []
+    for _ in range(calls):
+        start = time.perf_counter()
+        model = get_model_for_call(app)
+        ready = time.perf_counter()
+        model.generate_content(PROMPT).text
+        end = time.perf_counter()
+        setup.append((ready - start) * 1000)
+        total.append((end - start) * 1000)
+    return setup, total
+
+def summarize(name, latencies):
+    """Print mean/p50/p95 for a latency series"""
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    print(f"{name:<28} mean {statistics.mean(latencies):8.3f} ms   "
+          f"p50 {statistics.median(latencies):8.3f} ms   p95 {p95:8.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description='Gemini client reuse benchmark against a local stub')
+    parser.add_argument('--calls', type=int, default=200, help='Calls per variant')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Simulated model latency')
+    args = parser.parse_args()
+    
+    server = start_stub_server(latency_ms=args.latency_ms)
+    app = create_app('testing')
+    app.config.update(
+        GEMINI_API_KEY='stub',
+        GEMINI_API_ENDPOINT=server.base_url,
+        GEMINI_TRANSPORT='rest'
+    )
+    
+    print(f"🤖 Stub Gemini at {server.base_url}: latency {args.latency_ms} ms, {args.calls} calls per variant")
+    try:
+        with app.app_context():
+            # Warm up imports and the stub before timing
+            measure(app, per_call_setup, 5)
+            
+            setup, total = measure(app, per_call_setup, args.calls)
+            summarize('per-call setup: setup', setup)
+            summarize('per-call setup: total', total)
+            
+            reset_models()
+            setup, total = measure(app, shared_model, args.calls)
+            summarize('shared model: setup', setup)
+            summarize('shared model: total', total)
+    finally:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
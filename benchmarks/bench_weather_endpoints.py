@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latency of the weather endpoints against the local weather stub
+with simulated upstream latency and failures.
+
+Each endpoint is measured cold (weather cache cleared before every request)
+and warm (cache populated). The dashboard scenario opens the current,
+forecast, alerts and OneCall views for one zip in a row.
+
+Usage:
+    python benchmarks/bench_weather_endpoints.py --latency-ms 150 --jitter-ms 30 --requests 20
+    python benchmarks/bench_weather_endpoints.py --latency-ms 150 --failure-rate 0.2
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from weather_stub import start_stub_server
+from app import create_app
+from app.services.weather_service import WeatherService
+
+ZIP_CODES = ['10001', '90001', '60601', '77001', '85001', '33101', '98101', '30301']
+
+ENDPOINTS = [
+    ('current', '/api/weather/{zip}'),
+    ('forecast', '/api/weather-forecast/{zip}'),
+    ('alerts', '/api/weather-alerts/{zip}'),
+    ('onecall', '/api/weather-onecall/{zip}')
+]
+
+def reset_weather_state():
+    """Drop cached weather and breaker state so the next request goes upstream"""
+    WeatherService._get_cache().clear()
+    WeatherService._breakers.clear()
+
+def measure(client, paths, cold):
+    """Time GETs of `paths` (ms per path list), clearing the cache first when `cold`"""
+    if not cold:
+        # Prime every location so each timed request is a cache hit
+        for path_list in paths:
+            for path in path_list:
+                client.get(path)
+    
+    latencies = []
+    for path_list in paths:
+        if cold:
+            reset_weather_state()
+        start = time.perf_counter()
+        for path in path_list:
+            response = client.get(path)
+            if response.status_code != 200:
+                print(f"  ⚠️  {path} returned {response.status_code}")
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def summarize(name, latencies):
+    """Print mean/p50/p95 for a latency series"""
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    print(f"{name:<22} mean {statistics.mean(latencies):8.2f} ms   "
+          f"p50 {statistics.median(latencies):8.2f} ms   p95 {p95:8.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description='Weather endpoint benchmark against a local stub')
+    parser.add_argument('--requests', type=int, default=20, help='Requests per endpoint and mode')
+    parser.add_argument('--latency-ms', type=float, default=100, help='Mean simulated upstream latency')
+    parser.add_argument('--jitter-ms', type=float, default=20, help='Standard deviation of the latency')
+    parser.add_argument('--failure-rate', type=float, default=0, help='Fraction of upstream calls that fail')
+    args = parser.parse_args()
+    
+    server = start_stub_server(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, failure_rate=args.failure_rate)
+    app = create_app('testing')
+    app.config.update(
+        WEATHER_API_BASE_URL=server.base_url,
+        WEATHER_API_KEY='stub',
+        WEATHER_HTTP_RETRIES=0
+    )
+    
+    print(f"🌤️  Stub upstream at {server.base_url}: latency {args.latency_ms}±{args.jitter_ms} ms, "
+          f"failure rate {args.failure_rate:.0%}, {args.requests} requests per row")
+    
+    try:
+        with app.app_context():
+            client = app.test_client()
+            zips = [ZIP_CODES[i % len(ZIP_CODES)] for i in range(args.requests)]
+            
+            for name, template in ENDPOINTS:
+                paths = [[template.format(zip=zip_code)] for zip_code in zips]
+                summarize(f"{name} (cold)", measure(client, paths, cold=True))
+                summarize(f"{name} (warm)", measure(client, paths, cold=False))
+            
+            server.reset_counts()
+            dashboards = [[template.format(zip=zip_code) for _, template in ENDPOINTS] for zip_code in zips]
+            summarize('dashboard (cold)', measure(client, dashboards, cold=True))
+            counts = server.request_counts()
+            upstream = sum(count for path, count in counts.items() if path != 'failures')
+            print(f"Upstream calls per cold dashboard: {upstream / len(dashboards):.2f} {counts}")
+    finally:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-call latency of requests.get versus the pooled weather session
+against a local OpenWeatherMap stub.
+
+Usage:
+    python benchmarks/bench_weather_session.py --calls 500
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.http_client import get_session
+
+ONECALL_PAYLOAD = json.dumps({
+    'lat': 40.75, 'lon': -73.99, 'timezone': 'America/New_York', 'timezone_offset': -14400,
+    'current': {'dt': 1758460450, 'temp': 301.15, 'feels_like': 303.15, 'pressure': 1015,
+                'humidity': 70, 'uvi': 6.5, 'wind_speed': 2.1,
+                'weather': [{'description': 'clear sky'}]}
+}).encode()
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Minimal HTTP/1.1 handler that answers every GET with a OneCall payload"""
+    
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(ONECALL_PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(ONECALL_PAYLOAD)
+    
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server():
+    """Start the stub server on a free local port"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def measure(get, url, calls):
+    """Time `calls` sequential GETs and return per-call latencies in ms"""
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        response = get(url, params={'lat': 40.75, 'lon': -73.99, 'units': 'metric'}, timeout=(3.05, 5))
+        response.json()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def summarize(name, latencies):
+    """Print mean/p50/p95 for a latency series"""
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{name:<18} mean {statistics.mean(latencies):7.3f} ms   "
+          f"p50 {statistics.median(latencies):7.3f} ms   p95 {p95:7.3f} ms")
+    return statistics.mean(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description='Pooled session benchmark')
+    parser.add_argument('--calls', type=int, default=300, help='Sequential calls per client')
+    args = parser.parse_args()
+    
+    server = start_stub_server()
+    url = f"http://127.0.0.1:{server.server_address[1]}/data/3.0/onecall"
+    
+    try:
+        # Warm up both paths so import and first-connection costs are excluded
+        requests.get(url, timeout=5)
+        session = get_session('benchmark')
+        session.get(url, timeout=5)
+        
+        print(f"🌤️  {args.calls} sequential calls against {url}")
+        unpooled = summarize('requests.get', measure(requests.get, url, args.calls))
+        pooled = summarize('pooled session', measure(session.get, url, args.calls))
+        print(f"Saved per call: {unpooled - pooled:.3f} ms ({(1 - pooled / unpooled) * 100:.1f}%)")
+    finally:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
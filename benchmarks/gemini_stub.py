@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Local Gemini stub answering the REST generateContent endpoint.
+
+Every request gets the same canned JSON answer, with injectable latency and
+failure rate. Point the app at it with GEMINI_API_ENDPOINT and
+GEMINI_TRANSPORT=rest.
+
+Usage:
+    python benchmarks/gemini_stub.py --port 8090 --latency-ms 800
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8090 GEMINI_TRANSPORT=rest GEMINI_API_KEY=stub python run.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+DEFAULT_ANSWER = {
+    'immediate_actions': ['Stay in a cool room', 'Drink water regularly'],
+    'monitoring': ['Check blood pressure twice a day'],
+    'lifestyle': ['Avoid going outside between 11:00 and 17:00'],
+    'emergency_signs': ['Severe headache', 'Blurred vision'],
+    'follow_up': ['Call your doctor within 48 hours']
+}
+
+class StubHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 handler that answers generateContent with a canned candidate"""
+    
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    
+    def do_POST(self):
+        server = self.server
+        path = urlparse(self.path).path
+        length = int(self.headers.get('Content-Length') or 0)
+        request = json.loads(self.rfile.read(length) or b'{}')
+        server.record(path, request)
+        
+        if server.latency_ms or server.jitter_ms:
+            time.sleep(max(0.0, random.gauss(server.latency_ms, server.jitter_ms)) / 1000)
+        
+        if not path.endswith(':generateContent'):
+            return self._send(404, {'error': {'code': 404, 'message': 'Not found', 'status': 'NOT_FOUND'}})
+        if server.failure_rate and random.random() < server.failure_rate:
+            server.record('failures')
+            return self._send(503, {'error': {'code': 503, 'message': 'Injected failure', 'status': 'UNAVAILABLE'}})
+        
+        return self._send(200, {
+            'candidates': [{
+                'content': {'parts': [{'text': server.answer_text(request)}], 'role': 'model'},
+                'finishReason': 'STOP',
+                'index': 0
+            }]
+        })
+    
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+class GeminiStubServer(ThreadingHTTPServer):
+    """Threaded stub server holding the canned answer, fault settings and request counters"""
+    
+    daemon_threads = True
+    
+    def __init__(self, address, latency_ms=0, jitter_ms=0, failure_rate=0, answer=None):
+        super().__init__(address, StubHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.answer = answer if answer is not None else DEFAULT_ANSWER
+        self.requests = []
+        self._counts = {}
+        self._counts_lock = threading.Lock()
+    
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def answer_text(self, request):
+        """Text of the canned answer; callables get the request body"""
+        answer = self.answer(request) if callable(self.answer) else self.answer
+        return answer if isinstance(answer, str) else json.dumps(answer)
+    
+    def record(self, name, request=None):
+        with self._counts_lock:
+            self._counts[name] = self._counts.get(name, 0) + 1
+            if request is not None:
+                self.requests.append(request)
+    
+    def request_counts(self):
+        """Get requests served per path, plus injected failures"""
+        with self._counts_lock:
+            return dict(self._counts)
+    
+    def reset_counts(self):
+        with self._counts_lock:
+            self._counts = {}
+            self.requests = []
+
+def start_stub_server(host='127.0.0.1', port=0, **options):
+    """Start the stub server on a background thread; port 0 picks a free port"""
+    server = GeminiStubServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='Gemini generateContent stub server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency-ms', type=float, default=0, help='Mean simulated model latency')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Standard deviation of the latency')
+    parser.add_argument('--failure-rate', type=float, default=0, help='Fraction of requests answered with an error')
+    args = parser.parse_args()
+    
+    server = GeminiStubServer(
+        (args.host, args.port),
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate
+    )
+    print(f"🤖 Gemini stub listening on {server.base_url} "
+          f"(latency {args.latency_ms}±{args.jitter_ms} ms, failure rate {args.failure_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Local OpenWeatherMap stub that replays recorded responses.
+
+Serves the OneCall (with alerts), Current Weather, Forecast and zip geocoding
+endpoints from benchmarks/fixtures/weather, with injectable latency and
+failure rate. Point the app at it with WEATHER_API_BASE_URL.
+
+Usage:
+    python benchmarks/weather_stub.py --port 8089 --latency-ms 150 --failure-rate 0.05
+    WEATHER_API_BASE_URL=http://127.0.0.1:8089 python run.py
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'weather')
+
+# Endpoint path -> recorded payload file
+ROUTES = {
+    '/data/3.0/onecall': 'onecall.json',
+    '/data/2.5/weather': 'current.json',
+    '/data/2.5/forecast': 'forecast.json',
+    '/geo/1.0/zip': 'geocoding.json'
+}
+
+def load_payloads(fixtures_dir=FIXTURES_DIR):
+    """Load the recorded payload for every route"""
+    payloads = {}
+    for path, filename in ROUTES.items():
+        with open(os.path.join(fixtures_dir, filename), 'r', encoding='utf-8') as f:
+            payloads[path] = json.load(f)
+    return payloads
+
+class StubHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 handler that replays recorded payloads with simulated latency and failures"""
+    
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        server.record(url.path)
+        
+        if server.latency_ms or server.jitter_ms:
+            time.sleep(max(0.0, random.gauss(server.latency_ms, server.jitter_ms)) / 1000)
+        
+        payload = server.payloads.get(url.path)
+        if payload is None:
+            return self._send(404, {'cod': '404', 'message': 'Internal error'})
+        if server.failure_rate and random.random() < server.failure_rate:
+            server.record('failures')
+            return self._send(server.failure_status, {'cod': str(server.failure_status), 'message': 'Injected failure'})
+        
+        return self._send(200, self._personalize(url.path, payload, params))
+    
+    def _personalize(self, path, payload, params):
+        """Echo the requested location back so responses look like they match the query"""
+        if path == '/geo/1.0/zip':
+            zip_code = params.get('zip', '').split(',')[0]
+            return dict(payload, zip=zip_code)
+        if 'lat' in params and 'lon' in params:
+            coordinates = {'lat': float(params['lat']), 'lon': float(params['lon'])}
+            if path == '/data/2.5/weather':
+                return dict(payload, coord=coordinates)
+            if path == '/data/3.0/onecall':
+                return dict(payload, **coordinates)
+        return payload
+    
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+class WeatherStubServer(ThreadingHTTPServer):
+    """Threaded stub server holding the payloads, fault settings and request counters"""
+    
+    daemon_threads = True
+    
+    def __init__(self, address, latency_ms=0, jitter_ms=0, failure_rate=0, failure_status=503, fixtures_dir=FIXTURES_DIR):
+        super().__init__(address, StubHandler)
+        self.payloads = load_payloads(fixtures_dir)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self._counts = {}
+        self._counts_lock = threading.Lock()
+    
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def record(self, name):
+        with self._counts_lock:
+            self._counts[name] = self._counts.get(name, 0) + 1
+    
+    def request_counts(self):
+        """Get requests served per path, plus injected failures"""
+        with self._counts_lock:
+            return dict(self._counts)
+    
+    def reset_counts(self):
+        with self._counts_lock:
+            self._counts = {}
+
+def start_stub_server(host='127.0.0.1', port=0, **options):
+    """Start the stub server on a background thread; port 0 picks a free port"""
+    server = WeatherStubServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='OpenWeatherMap stub server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=0, help='Mean simulated upstream latency')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Standard deviation of the latency')
+    parser.add_argument('--failure-rate', type=float, default=0, help='Fraction of requests answered with an error')
+    parser.add_argument('--failure-status', type=int, default=503, help='HTTP status for injected failures')
+    args = parser.parse_args()
+    
+    server = WeatherStubServer(
+        (args.host, args.port),
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        failure_status=args.failure_status
+    )
+    print(f"🌤️  Weather stub listening on {server.base_url} "
+          f"(latency {args.latency_ms}±{args.jitter_ms} ms, failure rate {args.failure_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import json
+import pytest
+from unittest.mock import Mock, patch
+from app import create_app
+from app.models.csv_models import CSVPatient
+from app.services.ai_job_service import AIJobService
+from app.services.ai_service import AIService
+from app.services.shared_cache import get_shared_cache
+
+
+# Config for tests that exercise the Gemini path; modules add their own through `app_config`
+AI_TEST_CONFIG = {
+    'GEMINI_API_KEY': 'test_key',
+    'AI_RULES_TIER_ENABLED': False
+}
+
+# Answer returned by the mock model unless a test sets its own
+DEFAULT_ANSWER = json.dumps({'immediate_actions': ['Drink water']})
+
+
+@pytest.fixture
+def app_config():
+    """Config overrides for `app`; override this fixture in a test module"""
+    return {}
+
+@pytest.fixture
+def app(app_config):
+    """Testing app with AI_TEST_CONFIG and clean AI caches, latency windows and hedging counters"""
+    app = create_app('testing')
+    app.config.update(AI_TEST_CONFIG, **app_config)
+    with app.app_context():
+        AIService._get_cache().clear()
+        AIJobService._get_cache().clear()
+        get_shared_cache('messages').clear()
+        AIService.model_latency.reset()
+        AIService.reset_hedge_counts()
+        yield app
+        AIService.model_latency.reset()
+        AIService.reset_hedge_counts()
+
+@pytest.fixture
+def model():
+    """Mock Gemini model returned by AIService's get_model"""
+    model = Mock(model_name='models/gemini-test')
+    model.generate_content.return_value = Mock(text=DEFAULT_ANSWER)
+    with patch('app.services.ai_service.get_model', return_value=model):
+        yield model
+
+def make_patient(patient_id=1, age=30, weeks_pregnant=20, **fields):
+    """CSVPatient in zip 10001 with the given id, age and extra fields"""
+    return CSVPatient(dict(
+        {'id': patient_id, 'name': f'Patient {patient_id}', 'age': age, 'weeks_pregnant': weeks_pregnant, 'zip_code': '10001'},
+        **fields
+    ))
+
+def make_patients(ages):
+    """Patients with ids 1..n and the given ages"""
+    return [make_patient(patient_id, age) for patient_id, age in enumerate(ages, start=1)]
+
+def make_risk_data(risk_level='medium', **overrides):
+    """Risk assessment result as returned by RiskAssessmentService.assess_risk"""
+    risk_data = {'risk_level': risk_level, 'risk_score': 4, 'heat_wave_risk': False, 'factors': {}, 'weather_data': {}}
+    risk_data.update(overrides)
+    return risk_data
@@ -0,0 +1,83 @@
+import json
+import pytest
+from unittest.mock import Mock
+from app.services.ai_service import AIService
+from tests.conftest import make_patients, make_risk_data
+
+
+@pytest.fixture
+def app_config():
+    return {'AI_BATCH_SIZE': 5}
+
+def _answer(patient_id, action):
+    answer = {key: [action] for key, _ in AIService.RECOMMENDATION_KEYS}
+    answer.update(patient_id=patient_id, priority_level='Medium')
+    return answer
+
+def _response(items):
+    return Mock(text='```json\n' + json.dumps(items) + '\n```')
+
+class TestBatchedRecommendations:
+    """Test cases for packing several patients into one prompt"""
+    
+    def test_one_call_for_the_batch(self, app, model):
+        model.generate_content.return_value = _response([_answer('2', 'b'), _answer('1', 'a'), _answer('3', 'c')])
+        patients = make_patients([25, 30, 35])
+        
+        results = AIService.get_risk_recommendations_batch(patients, [make_risk_data()] * 3)
+        
+        assert model.generate_content.call_count == 1
+        assert [result['immediate_actions'] for result in results] == [['a'], ['b'], ['c']]
+        assert 'patient_id' not in results[0]
+        prompt = model.generate_content.call_args.args[0]
+        assert prompt.count('"patient_id":') == 3
+        assert prompt.count('As a medical AI assistant') == 1
+    
+    def test_missing_entries_fall_back_to_single_calls(self, app, model):
+        incomplete = _answer('3', 'c')
+        del incomplete['emergency_signs']
+        single = Mock(text=json.dumps({'immediate_actions': ['single']}))
+        model.generate_content.side_effect = [_response([_answer('1', 'a'), incomplete]), single, single]
+        
+        results = AIService.get_risk_recommendations_batch(make_patients([25, 30, 35]), [make_risk_data()] * 3)
+        
+        assert model.generate_content.call_count == 3
+        assert [result['immediate_actions'] for result in results] == [['a'], ['single'], ['single']]
+    
+    def test_cached_and_identical_profiles_are_not_sent(self, app, model):
+        model.generate_content.return_value = _response([_answer('1', 'a'), _answer('2', 'b')])
+        AIService.get_risk_recommendations_batch(make_patients([25, 30]), [make_risk_data()] * 2)
+        
+        model.generate_content.return_value = _response([_answer('3', 'c'), _answer('5', 'd')])
+        patients = make_patients([25, 30, 35, 35, 40])
+        results = AIService.get_risk_recommendations_batch(patients, [make_risk_data()] * 5)
+        
+        assert model.generate_content.call_count == 2
+        prompt = model.generate_content.call_args.args[0]
+        assert prompt.count('"patient_id":') == 2
+        assert [result['immediate_actions'] for result in results] == [['a'], ['b'], ['c'], ['c'], ['d']]
+    
+    def test_unparseable_batch_answer_falls_back(self, app, model):
+        model.generate_content.side_effect = [
+            Mock(text='Sorry, I cannot help with that.'),
+            Mock(text=json.dumps({'immediate_actions': ['single']})),
+            Mock(text=json.dumps({'immediate_actions': ['single']}))
+        ]
+        
+        results = AIService.get_risk_recommendations_batch(make_patients([25, 30]), [make_risk_data()] * 2)
+        
+        assert model.generate_content.call_count == 3
+        assert all(result['immediate_actions'] == ['single'] for result in results)
+    
+    def test_concurrent_enrichment_uses_batches(self, app, model):
+        def answer(prompt):
+            ids = [line.split('"patient_id":"')[1].split('"')[0] for line in prompt.splitlines() if '"patient_id":"' in line]
+            return _response([_answer(patient_id, patient_id) for patient_id in ids])
+        
+        model.generate_content.side_effect = answer
+        patients = make_patients(range(20, 32))
+        
+        results = AIService.get_risk_recommendations_for_patients([(patient, make_risk_data()) for patient in patients])
+        
+        assert model.generate_content.call_count == 3
+        assert [result['immediate_actions'] for result in results] == [[str(patient.id)] for patient in patients]
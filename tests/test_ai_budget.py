@@ -0,0 +1,115 @@
+import time
+import pytest
+from unittest.mock import patch
+from app.services.ai_service import AIService
+from app.utils.budget import LatencyBudget
+from tests.conftest import make_patients, make_risk_data
+
+
+@pytest.fixture
+def app_config():
+    return {'AI_ENRICHMENT_MAX_WORKERS': 2, 'AI_BATCH_SIZE': 1, 'AI_ASYNC_ENABLED': False}
+
+def _recommend(patient, risk_data):
+    if patient.id == 2:
+        raise RuntimeError('quota exceeded')
+    time.sleep(0.02 if patient.id <= 2 else 1)
+    return {'patient': patient.id}
+
+class TestLatencyBudget:
+    """Test cases for request-scoped AI latency budgets"""
+    
+    def test_unlimited_budget(self):
+        budget = LatencyBudget(0)
+        
+        assert budget.deadline is None
+        assert not budget.expired()
+        assert budget.summary()['remaining_ms'] is None
+    
+    def test_calls_stop_when_budget_runs_out(self, app):
+        pairs = [(patient, make_risk_data()) for patient in make_patients([30] * 4)]
+        budget = LatencyBudget(200)
+        
+        with patch.object(AIService, 'get_risk_recommendations', side_effect=_recommend):
+            started = time.time()
+            results, skipped = AIService.get_risk_recommendations_within_budget(pairs, budget)
+        
+        assert time.time() - started < 0.5
+        assert results == [{'patient': 1}, None, None, None]
+        assert skipped == [False, False, True, True]
+        summary = budget.summary()
+        assert summary['completed'] == 1
+        assert summary['skipped'] == 2
+        assert summary['exhausted'] is True
+    
+    def test_spent_budget_sends_no_calls(self, app):
+        budget = LatencyBudget(1)
+        time.sleep(0.01)
+        
+        with patch.object(AIService, 'get_risk_recommendations') as recommend:
+            results, skipped = AIService.get_risk_recommendations_within_budget(
+                [(patient, make_risk_data()) for patient in make_patients([30] * 3)], budget
+            )
+        
+        recommend.assert_not_called()
+        assert results == [None] * 3
+        assert skipped == [True] * 3
+
+class TestBudgetedEndpoints:
+    """Test cases for ai_budget_ms on population endpoints"""
+    
+    def test_skipped_patients_get_flagged_fallbacks(self, app):
+        client = app.test_client()
+        
+        with patch('app.models.csv_models.csv_manager.get_all_patients', return_value=make_patients([30] * 4)), \
+             patch('app.services.RiskAssessmentService.assess_risk', side_effect=lambda patient: make_risk_data()), \
+             patch.object(AIService, 'get_risk_recommendations', side_effect=_recommend):
+            response = client.get('/api/patients/with-risks?ai_budget_ms=300&include_notifications=false')
+        
+        data = response.get_json()
+        suggestions = [patient['ai_suggestions'] for patient in data['patients']]
+        assert suggestions[0] == {'patient': 1}
+        assert suggestions[1]['error'] == 'AI suggestions unavailable'
+        assert all(s['ai_skipped'] and s['fallback_recommendations'] for s in suggestions[2:])
+        assert data['summary']['ai_budget']['budget_ms'] == 300
+        assert data['summary']['ai_budget']['skipped'] == 2
+    
+    def test_config_default_budget(self, app):
+        app.config['AI_BUDGET_MS'] = 5000
+        client = app.test_client()
+        
+        with patch('app.models.csv_models.csv_manager.get_all_patients', return_value=make_patients([30] * 1)), \
+             patch('app.services.RiskAssessmentService.assess_risk', side_effect=lambda patient: make_risk_data()), \
+             patch.object(AIService, 'get_risk_recommendations', side_effect=_recommend):
+            data = client.get('/api/risk-patients?include_ai_suggestions=true').get_json()
+        
+        assert data['risk_patients'][0]['ai_suggestions'] == {'patient': 1}
+        assert data['summary']['ai_budget']['budget_ms'] == 5000
+        assert data['summary']['ai_budget']['completed'] == 1
+    
+    def test_explicit_budget_is_not_queued(self, app):
+        app.config['AI_ASYNC_ENABLED'] = True
+        client = app.test_client()
+        
+        with patch('app.models.csv_models.csv_manager.get_all_patients', return_value=make_patients([30] * 1)), \
+             patch('app.services.RiskAssessmentService.assess_risk', side_effect=lambda patient: make_risk_data()), \
+             patch.object(AIService, 'get_risk_recommendations', side_effect=_recommend):
+            data = client.get('/api/patients/with-risks?ai_budget_ms=5000&include_notifications=false').get_json()
+        
+        assert data['patients'][0]['ai_suggestions'] == {'patient': 1}
+        assert data['summary']['ai_budget']['completed'] == 1
+    
+    def test_unused_budget_is_not_reported(self, app):
+        app.config.update(AI_BUDGET_MS=5000, AI_ASYNC_ENABLED=True)
+        client = app.test_client()
+        
+        with patch('app.models.csv_models.csv_manager.get_all_patients', return_value=make_patients([30] * 2)), \
+             patch('app.services.RiskAssessmentService.assess_risk', side_effect=lambda patient: make_risk_data()), \
+             patch('app.services.ai_job_service.AIJobService.submit_recommendations_for_patients', return_value=[None, None]), \
+             patch('app.services.ai_job_service.AIJobService.describe', return_value={'status': 'pending'}):
+            queued = client.get('/api/patients/with-risks?include_notifications=false').get_json()
+            without_ai = client.get('/api/risk-patients').get_json()
+        
+        assert queued['patients'][0]['ai_suggestions'] == {'status': 'pending'}
+        assert 'ai_budget' not in queued['summary']
+        assert 'ai_budget' not in without_ai['summary']
@@ -0,0 +1,104 @@
+import pytest
+from unittest.mock import Mock
+from app.services.ai_service import AIService
+from app.services.shared_cache import SharedCache
+
+
+@pytest.fixture
+def model(model):
+    model.generate_content.return_value.text = '{"immediate_actions": ["Drink water"], "priority_level": "High"}'
+    return model
+
+def _patient(**overrides):
+    fields = dict(age=31, weeks_pregnant=30, zip_code='10001', pregnancy_icd10='o24.4', comorbidity_icd10=None)
+    fields.update(overrides)
+    conditions = fields.pop('conditions', ['Gestational diabetes', 'Hypertension'])
+    patient = Mock(**fields)
+    patient.get_conditions.return_value = conditions
+    patient.get_medications_list.return_value = ['Insulin']
+    return patient
+
+def _risk_data(temperature=33.4):
+    return {
+        'risk_level': 'high',
+        'risk_score': 7,
+        'factors': {'age': {'level': 'low'}, 'heat': {'level': 'high'}},
+        'weather_data': {'temperature': temperature, 'humidity': 64, 'is_heat_wave': True}
+    }
+
+class TestAIRecommendationCache:
+    """Test cases for fingerprint-keyed AI recommendation caching"""
+    
+    def test_repeated_profile_uses_one_call(self, app, model):
+        first = AIService.get_risk_recommendations(_patient(), _risk_data())
+        second = AIService.get_risk_recommendations(_patient(), _risk_data())
+        
+        assert model.generate_content.call_count == 1
+        assert first == second == {'immediate_actions': ['Drink water'], 'priority_level': 'High'}
+        assert AIService.get_cache_metrics()['hits'] == 1
+    
+    def test_equivalent_inputs_share_a_fingerprint(self, app, model):
+        AIService.get_risk_recommendations(_patient(), _risk_data())
+        AIService.get_risk_recommendations(
+            _patient(pregnancy_icd10=' O24.4 ', conditions=['Hypertension', 'Gestational diabetes']),
+            _risk_data()
+        )
+        
+        assert model.generate_content.call_count == 1
+    
+    def test_different_profiles_are_not_shared(self, app, model):
+        AIService.get_risk_recommendations(_patient(age=31), _risk_data())
+        AIService.get_risk_recommendations(_patient(age=33), _risk_data())
+        
+        assert model.generate_content.call_count == 2
+    
+    def test_bucketing_merges_similar_profiles(self, app, model):
+        app.config['AI_CACHE_BUCKETING'] = True
+        AIService.get_risk_recommendations(_patient(age=31, weeks_pregnant=29, zip_code='10001'), _risk_data(33.4))
+        AIService.get_risk_recommendations(_patient(age=33, weeks_pregnant=30, zip_code='10019'), _risk_data(32.1))
+        
+        assert model.generate_content.call_count == 1
+        prompt = model.generate_content.call_args.args[0]
+        assert 'Age: 30-34 years' in prompt
+        assert 'Pregnancy: 28-31 weeks' in prompt
+        assert 'Location: 100xx' in prompt
+        assert 'Temperature: 32-34°C' in prompt
+    
+    def test_unparseable_answers_are_not_cached(self, app, model):
+        model.generate_content.return_value.text = 'Please consult your doctor.'
+        
+        first = AIService.get_risk_recommendations(_patient(), _risk_data())
+        AIService.get_risk_recommendations(_patient(), _risk_data())
+        
+        assert 'raw_response' in first
+        assert model.generate_content.call_count == 2
+    
+    def test_cache_can_be_disabled(self, app, model):
+        app.config['AI_CACHE_ENABLED'] = False
+        AIService.get_risk_recommendations(_patient(), _risk_data())
+        AIService.get_risk_recommendations(_patient(), _risk_data())
+        
+        assert model.generate_content.call_count == 2
+        assert AIService.get_cache_metrics()['entries'] == 0
+
+class TestSharedCacheEviction:
+    """Test cases for the size bound of the shared cache"""
+    
+    def test_oldest_entries_are_evicted(self, tmp_path):
+        cache = SharedCache(str(tmp_path / 'cache.sqlite3'), 'test', max_entries=2)
+        cache.set('a', 1, ttl=60)
+        cache.set('b', 2, ttl=60)
+        cache.set('c', 3, ttl=60)
+        
+        assert cache.peek('a') is None
+        assert cache.get('b').value == 2 and cache.get('c').value == 3
+        assert cache.stats()['evicted'] == 1
+    
+    def test_expired_entries_are_evicted_first(self, tmp_path):
+        cache = SharedCache(str(tmp_path / 'cache.sqlite3'), 'test', max_entries=2)
+        cache.set('a', 1, ttl=60)
+        cache.set('b', 2, ttl=0)
+        cache.set('c', 3, ttl=60)
+        
+        assert cache.peek('b') is None
+        assert cache.get('a').value == 1
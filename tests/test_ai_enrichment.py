@@ -0,0 +1,94 @@
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from app.services.ai_service import AIService
+from tests.conftest import make_patients, make_risk_data
+
+
+@pytest.fixture
+def app_config():
+    return {'AI_ENRICHMENT_MAX_WORKERS': 4, 'AI_ENRICHMENT_CALL_TIMEOUT': 2, 'AI_BATCH_SIZE': 1, 'AI_ASYNC_ENABLED': False}
+
+class TestConcurrentRecommendations:
+    """Test cases for bounded-concurrency AI recommendations"""
+    
+    def test_results_keep_input_order(self, app):
+        def recommend(patient, risk_data):
+            time.sleep(0.05 * (5 - patient.id))
+            return {'patient': patient.id}
+        
+        pairs = [(patient, make_risk_data()) for patient in make_patients([30] * 4)]
+        with patch.object(AIService, 'get_risk_recommendations', side_effect=recommend):
+            results = AIService.get_risk_recommendations_for_patients(pairs)
+        
+        assert results == [{'patient': 1}, {'patient': 2}, {'patient': 3}, {'patient': 4}]
+    
+    def test_concurrency_is_bounded(self, app):
+        lock = threading.Lock()
+        running = {'now': 0, 'max': 0}
+        
+        def recommend(patient, risk_data):
+            with lock:
+                running['now'] += 1
+                running['max'] = max(running['max'], running['now'])
+            time.sleep(0.05)
+            with lock:
+                running['now'] -= 1
+            return {}
+        
+        pairs = [(patient, make_risk_data()) for patient in make_patients([30] * 12)]
+        with patch.object(AIService, 'get_risk_recommendations', side_effect=recommend):
+            started = time.time()
+            results = AIService.get_risk_recommendations_for_patients(pairs, max_workers=3)
+        
+        assert len(results) == 12
+        assert running['max'] == 3
+        assert time.time() - started < 0.5
+    
+    def test_failures_and_timeouts_are_none(self, app):
+        def recommend(patient, risk_data):
+            if patient.id == 2:
+                raise RuntimeError('quota exceeded')
+            if patient.id == 3:
+                time.sleep(1)
+            return {'patient': patient.id}
+        
+        pairs = [(patient, make_risk_data()) for patient in make_patients([30] * 3)]
+        with patch.object(AIService, 'get_risk_recommendations', side_effect=recommend):
+            started = time.time()
+            results = AIService.get_risk_recommendations_for_patients(pairs, call_timeout=0.2)
+        
+        assert results == [{'patient': 1}, None, None]
+        assert time.time() - started < 0.8
+
+class TestPatientsWithRisksEnrichment:
+    """Test cases for paginating /api/patients/with-risks before AI enrichment"""
+    
+    def test_only_requested_page_is_enriched(self, app):
+        client = app.test_client()
+        
+        with patch('app.models.csv_models.csv_manager.get_all_patients', return_value=make_patients([30] * 10)), \
+             patch('app.services.RiskAssessmentService.assess_risk', side_effect=lambda patient: make_risk_data()), \
+             patch.object(AIService, 'get_risk_recommendations', return_value={'immediate_actions': ['Rest']}) as recommend:
+            response = client.get('/api/patients/with-risks?page=2&per_page=3&include_notifications=false')
+        
+        data = response.get_json()
+        assert response.status_code == 200
+        assert recommend.call_count == 3
+        assert [patient['patient_id'] for patient in data['patients']] == [4, 5, 6]
+        assert all(patient['ai_suggestions'] == {'immediate_actions': ['Rest']} for patient in data['patients'])
+        assert data['pagination']['total'] == 10
+        assert data['summary']['risk_distribution']['medium'] == 10
+    
+    def test_failed_suggestions_fall_back(self, app):
+        client = app.test_client()
+        
+        with patch('app.models.csv_models.csv_manager.get_all_patients', return_value=make_patients([30] * 2)), \
+             patch('app.services.RiskAssessmentService.assess_risk', side_effect=lambda patient: make_risk_data()), \
+             patch.object(AIService, 'get_risk_recommendations', side_effect=RuntimeError('unavailable')):
+            response = client.get('/api/patients/with-risks?include_notifications=false')
+        
+        suggestions = response.get_json()['patients'][0]['ai_suggestions']
+        assert suggestions['error'] == 'AI suggestions unavailable'
+        assert suggestions['fallback_recommendations']
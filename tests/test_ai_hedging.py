@@ -0,0 +1,89 @@
+import threading
+import time
+import pytest
+from unittest.mock import Mock
+from app.services.ai_service import AIService
+
+
+@pytest.fixture
+def app_config():
+    return {'AI_HEDGING_ENABLED': True, 'AI_HEDGE_MIN_SAMPLES': 3, 'AI_HEDGE_MIN_DELAY_MS': 10, 'AI_HEDGE_MAX_RATIO': 1.0}
+
+def _model(*delays):
+    """Mock model whose successive calls take `delays` seconds"""
+    model = Mock(model_name='models/gemini-test')
+    delays = list(delays)
+    lock = threading.Lock()
+    
+    def generate_content(prompt):
+        with lock:
+            delay = delays.pop(0)
+        time.sleep(delay)
+        return Mock(text=f'answer after {delay}')
+    
+    model.generate_content.side_effect = generate_content
+    return model
+
+def _warm_up(elapsed=0.02, calls=3):
+    for _ in range(calls):
+        AIService.model_latency.record('gemini-test', elapsed)
+
+class TestHedgedRequests:
+    """Test cases for duplicating slow AI calls"""
+    
+    def test_no_hedge_without_latency_history(self, app):
+        model = _model(0.1)
+        
+        assert AIService._generate(model, 'prompt').text == 'answer after 0.1'
+        assert model.generate_content.call_count == 1
+    
+    def test_slow_call_is_hedged_and_fastest_answer_wins(self, app):
+        _warm_up()
+        model = _model(1.0, 0.01)
+        
+        started = time.perf_counter()
+        response = AIService._generate(model, 'prompt')
+        
+        assert response.text == 'answer after 0.01'
+        assert time.perf_counter() - started < 0.5
+        assert model.generate_content.call_count == 2
+        assert AIService.get_model_metrics()['hedging']['hedge_wins'] == 1
+    
+    def test_fast_call_is_not_hedged(self, app):
+        _warm_up(elapsed=0.5)
+        model = _model(0.01)
+        
+        AIService._generate(model, 'prompt')
+        
+        assert model.generate_content.call_count == 1
+        assert AIService.get_model_metrics()['hedging']['hedged'] == 0
+    
+    def test_hedges_stay_within_budget(self, app):
+        app.config['AI_HEDGE_MAX_RATIO'] = 0.5
+        _warm_up(calls=30)
+        model = _model(0.2, 0.2, 0.01, 0.2)
+        
+        for _ in range(3):
+            AIService._generate(model, 'prompt')
+        
+        hedging = AIService.get_model_metrics()['hedging']
+        assert hedging['calls'] == 3
+        assert hedging['hedged'] == 1
+        assert model.generate_content.call_count == 4
+    
+    def test_failed_hedge_falls_back_to_first_answer(self, app):
+        _warm_up()
+        model = Mock(model_name='models/gemini-test')
+        calls = []
+        
+        def generate_content(prompt):
+            calls.append(prompt)
+            if len(calls) == 2:
+                raise RuntimeError('quota exceeded')
+            time.sleep(0.1)
+            return Mock(text='first answer')
+        
+        model.generate_content.side_effect = generate_content
+        
+        assert AIService._generate(model, 'prompt').text == 'first answer'
+        assert AIService.get_model_metrics()['models']['gemini-test']['errors'] == 1
@@ -0,0 +1,106 @@
+import time
+import pytest
+from unittest.mock import patch
+from app.services import RiskAssessmentService
+from app.services.ai_job_service import AIJobService
+from tests.conftest import make_patient, make_risk_data
+
+
+@pytest.fixture
+def app_config():
+    return {'AI_ASYNC_ENABLED': True, 'AI_BATCH_SIZE': 1}
+
+def _risk_data(patient=None):
+    return make_risk_data('high', risk_score=7, heat_wave_risk=True)
+
+def _wait_for(job_id, status='complete'):
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        job = AIJobService.get_job(job_id)
+        if job and job['status'] == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not reach {status}")
+
+class TestAIJobService:
+    """Test cases for the background AI recommendation queue"""
+    
+    def test_job_runs_in_background_and_is_reused(self, app, model):
+        job = AIJobService.submit_recommendations(make_patient(), _risk_data())
+        
+        assert job['status'] == 'pending'
+        finished = _wait_for(job['job_id'])
+        assert finished['result'] == {'immediate_actions': ['Drink water']}
+        
+        again = AIJobService.submit_recommendations(make_patient(), _risk_data())
+        assert again['status'] == 'complete'
+        assert model.generate_content.call_count == 1
+    
+    def test_identical_profiles_share_one_job(self, app, model):
+        jobs = AIJobService.submit_recommendations_for_patients([
+            (make_patient(1), _risk_data()),
+            (make_patient(2), _risk_data()),
+            (make_patient(3, age=38), _risk_data())
+        ])
+        
+        assert jobs[0]['job_id'] == jobs[1]['job_id'] != jobs[2]['job_id']
+        _wait_for(jobs[0]['job_id'])
+        _wait_for(jobs[2]['job_id'])
+        assert model.generate_content.call_count == 2
+    
+    def test_failed_job_is_reported(self, app, model):
+        model.generate_content.side_effect = RuntimeError('quota exceeded')
+        
+        job = AIJobService.submit_recommendations(make_patient(), _risk_data())
+        failed = _wait_for(job['job_id'], 'failed')
+        
+        described = AIJobService.describe(failed, ['Stay cool'])
+        assert described['error'] == 'AI suggestions unavailable'
+        assert described['fallback_recommendations'] == ['Stay cool']
+    
+    def test_queue_choice(self, app):
+        assert AIJobService.is_enabled()
+        assert not AIJobService.is_enabled('false')
+        assert not AIJobService.is_enabled('true', '300')
+        
+        app.config.pop('AI_ASYNC_ENABLED')
+        assert not AIJobService.is_enabled()
+
+class TestAIJobEndpoints:
+    """Test cases for fallback-first AI suggestions with result polling"""
+    
+    def _get_details(self, client):
+        with patch('app.models.csv_models.csv_manager.get_patient_by_id', return_value=make_patient()), \
+             patch('app.models.csv_models.csv_manager.get_risk_assessments_by_patient', return_value=[]), \
+             patch.object(RiskAssessmentService, 'assess_risk', side_effect=_risk_data):
+            return client.get('/api/risk-patients/1').get_json()
+    
+    def test_details_return_fallback_then_result(self, app, model):
+        client = app.test_client()
+        
+        first = self._get_details(client)['ai_suggestions']
+        assert first['status'] == 'pending'
+        assert first['fallback_recommendations']
+        
+        poll = client.get(first['poll_url'])
+        assert poll.status_code == 200
+        _wait_for(first['job_id'])
+        assert client.get(first['poll_url']).get_json()['job']['result'] == {'immediate_actions': ['Drink water']}
+        
+        assert self._get_details(client)['ai_suggestions'] == {'immediate_actions': ['Drink water']}
+    
+    def test_sync_mode_waits_for_the_ai(self, app, model):
+        client = app.test_client()
+        
+        with patch('app.models.csv_models.csv_manager.get_patient_by_id', return_value=make_patient()), \
+             patch('app.models.csv_models.csv_manager.get_risk_assessments_by_patient', return_value=[]), \
+             patch.object(RiskAssessmentService, 'assess_risk', side_effect=_risk_data):
+            data = client.get('/api/risk-patients/1?async_ai=false').get_json()
+        
+        assert data['ai_suggestions'] == {'immediate_actions': ['Drink water']}
+    
+    def test_unknown_job_is_not_found(self, app):
+        response = app.test_client().get('/api/ai-suggestions/unknown')
+        
+        assert response.status_code == 404
+        assert response.get_json()['success'] is False
@@ -0,0 +1,80 @@
+import json
+import pytest
+from unittest.mock import Mock, patch
+from app.services.ai_service import AIService
+from tests.conftest import make_patients, make_risk_data
+
+
+ANSWER = json.dumps({'immediate_actions': ['Drink water'], 'priority_level': 'Medium'})
+
+@pytest.fixture
+def app_config():
+    return {'AI_ENRICHMENT_MAX_WORKERS': 2}
+
+@pytest.fixture
+def model(model):
+    model.generate_content.side_effect = lambda prompt, stream=False: [Mock(text=ANSWER[:20]), Mock(text=ANSWER[20:])]
+    return model
+
+def _stream(app, count, query='ai_stream=true&include_notifications=false&batch_size=2'):
+    client = app.test_client()
+    with patch('app.models.csv_models.csv_manager.get_all_patients', return_value=make_patients(range(21, 21 + count))), \
+         patch('app.models.csv_models.csv_manager.get_risk_assessments_by_patient', return_value=[]), \
+         patch('app.services.RiskAssessmentService.assess_risk', side_effect=lambda patient: make_risk_data()):
+        response = client.get(f'/api/patients/with-risks/stream?{query}')
+        return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+class TestStreamedRecommendations:
+    """Test cases for streaming AI recommendations chunk by chunk"""
+    
+    def test_partials_then_complete(self, app, model):
+        events = list(AIService.stream_risk_recommendations(make_patients([21])[0], make_risk_data()))
+        
+        assert [event['type'] for event in events] == ['ai_partial', 'ai_partial', 'ai_complete']
+        assert ''.join(event['text'] for event in events[:2]) == ANSWER
+        assert events[-1]['ai_suggestions']['immediate_actions'] == ['Drink water']
+        assert model.generate_content.call_args.kwargs['stream'] is True
+        
+        cached = list(AIService.stream_risk_recommendations(make_patients([21])[0], make_risk_data()))
+        assert [event['type'] for event in cached] == ['ai_complete']
+        assert cached[0]['cached'] is True
+
+class TestPatientStreamAIEvents:
+    """Test cases for ai_stream mode of /api/patients/with-risks/stream"""
+    
+    def test_records_precede_ai_events(self, app, model):
+        events = _stream(app, 3)
+        types = [event['type'] for event in events]
+        
+        assert types[0] == 'metadata'
+        assert types[-1] == 'summary'
+        assert 'batch' not in types
+        assert types[1:3] == ['patient', 'patient']
+        assert 'ai_suggestions' not in events[1]['patient']
+        
+        for patient_id in (1, 2, 3):
+            record = next(i for i, e in enumerate(events) if e['type'] == 'patient' and e['patient']['patient_id'] == patient_id)
+            completes = [i for i, e in enumerate(events) if e['type'] == 'ai_complete' and e['patient_id'] == patient_id]
+            partials = [e['text'] for e in events if e['type'] == 'ai_partial' and e['patient_id'] == patient_id]
+            assert len(completes) == 1 and completes[0] > record
+            assert ''.join(partials) == ANSWER
+            assert events[completes[0]]['ai_suggestions']['immediate_actions'] == ['Drink water']
+    
+    def test_failed_answer_completes_with_fallback(self, app, model):
+        def answer(prompt, stream=False):
+            if 'Age: 22' in prompt:
+                raise RuntimeError('quota exceeded')
+            return [Mock(text=ANSWER)]
+        
+        model.generate_content.side_effect = answer
+        events = _stream(app, 2)
+        
+        completes = {e['patient_id']: e['ai_suggestions'] for e in events if e['type'] == 'ai_complete'}
+        assert completes[1]['immediate_actions'] == ['Drink water']
+        assert completes[2]['error'] == 'AI suggestions unavailable'
+        assert completes[2]['fallback_recommendations']
+    
+    def test_default_mode_sends_batches(self, app, model):
+        events = _stream(app, 2, 'include_notifications=false&include_ai_suggestions=false')
+        
+        assert [event['type'] for event in events] == ['metadata', 'batch', 'summary']
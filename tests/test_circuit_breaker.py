@@ -0,0 +1,110 @@
+import pytest
+import time
+import requests
+from unittest.mock import patch, Mock
+from app import create_app
+from app.services import http_client
+from app.services.weather_service import WeatherService
+from app.utils.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    app.config.update(WEATHER_BREAKER_FAILURE_THRESHOLD=2, WEATHER_BREAKER_RESET_TIMEOUT=60)
+    with app.app_context():
+        WeatherService._breakers.clear()
+        WeatherService._get_cache().clear()
+        yield app
+        WeatherService._breakers.clear()
+
+class TestCircuitBreaker:
+    """Test cases for the consecutive-failure circuit breaker"""
+    
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        assert breaker.allow_request() is True
+        
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.allow_request() is False
+        assert breaker.snapshot()['rejected_calls'] == 1
+    
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        
+        assert breaker.state == CircuitBreaker.CLOSED
+    
+    def test_half_open_allows_single_trial(self):
+        breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.1)
+        
+        assert breaker.allow_request() is True
+        assert breaker.allow_request() is False
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        
+        time.sleep(0.1)
+        assert breaker.allow_request() is True
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+class TestWeatherBreakers:
+    """Test cases for circuit breakers on weather endpoints"""
+    
+    def test_open_breakers_skip_upstream_calls(self, app):
+        session = http_client.get_weather_session()
+        with patch.object(session, 'get', side_effect=requests.exceptions.ConnectTimeout('down')) as get:
+            for zip_code in ['10001', '90001', '60601']:
+                data = WeatherService.get_weather_data(zip_code)
+                assert WeatherService._is_default_weather_data(data)
+        
+        # OneCall and Current Weather each fail twice, then both breakers short-circuit
+        assert get.call_count == 4
+        breakers = WeatherService.get_breaker_metrics()
+        assert breakers['/data/3.0/onecall']['state'] == CircuitBreaker.OPEN
+        assert breakers['/data/2.5/weather']['state'] == CircuitBreaker.OPEN
+    
+    def test_client_errors_do_not_open_breaker(self, app):
+        session = http_client.get_weather_session()
+        with patch.object(session, 'get', return_value=Mock(status_code=404)):
+            for _ in range(3):
+                WeatherService._http_get('http://api.openweathermap.org/data/2.5/weather', {})
+        
+        assert WeatherService.get_breaker_metrics()['/data/2.5/weather']['state'] == CircuitBreaker.CLOSED
+    
+    def test_unexpected_error_ends_half_open_trial(self, app):
+        app.config['WEATHER_BREAKER_RESET_TIMEOUT'] = 0.05
+        url = 'http://api.openweathermap.org/data/2.5/weather'
+        breaker = WeatherService._get_breaker('/data/2.5/weather')
+        breaker.record_failure()
+        breaker.record_failure()
+        time.sleep(0.1)
+        
+        session = http_client.get_weather_session()
+        with patch.object(session, 'get', side_effect=ValueError('bad url')):
+            with pytest.raises(ValueError):
+                WeatherService._http_get(url, {})
+        assert breaker.state == CircuitBreaker.OPEN
+        
+        time.sleep(0.1)
+        with patch.object(session, 'get', return_value=Mock(status_code=200)):
+            assert WeatherService._http_get(url, {}).status_code == 200
+        assert WeatherService.get_breaker_metrics()['/data/2.5/weather']['state'] == CircuitBreaker.CLOSED
+    
+    def test_forecast_falls_back_when_open(self, app):
+        for endpoint in ['/data/3.0/onecall', '/data/2.5/forecast']:
+            breaker = WeatherService._get_breaker(endpoint)
+            breaker.record_failure()
+            breaker.record_failure()
+        
+        with patch.object(http_client.get_weather_session(), 'get') as get:
+            forecast = WeatherService.get_weather_forecast('10001')
+        
+        get.assert_not_called()
+        assert forecast == WeatherService._get_default_forecast_data()
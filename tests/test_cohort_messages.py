@@ -0,0 +1,85 @@
+import pytest
+from unittest.mock import Mock, patch
+from app.services.message_service import MessageService
+from tests.conftest import make_patient, make_risk_data
+
+
+TEMPLATE = 'Уважаемая {first_name}, на {weeks_pregnant} неделе при {temperature}°C пейте больше воды.'
+
+@pytest.fixture
+def model():
+    model = Mock(model_name='models/gemini-pro')
+    model.generate_content.return_value = Mock(text=TEMPLATE)
+    with patch('app.services.message_service.get_model', return_value=model):
+        yield model
+
+def _patient(patient_id, name='Anna Ivanova', weeks=20, pregnancy_icd10=None, comorbidity_icd10=None):
+    return make_patient(
+        patient_id, name=name, weeks_pregnant=weeks, pregnancy_icd10=pregnancy_icd10, comorbidity_icd10=comorbidity_icd10
+    )
+
+def _risk(risk_level='medium', temperature=30, heat_wave=False):
+    return make_risk_data(
+        risk_level, heat_wave_risk=heat_wave,
+        weather_data={'temperature': temperature, 'humidity': 50, 'is_heat_wave': heat_wave}
+    )
+
+class TestCohortMessages:
+    """Test cases for one Gemini call per risk-profile cohort"""
+    
+    def test_cohort_key_groups_conditions(self):
+        gestational = _patient(1, pregnancy_icd10='O24.4', comorbidity_icd10='I10')
+        type_2 = _patient(2, pregnancy_icd10='O13', comorbidity_icd10='E11.9')
+        
+        key = MessageService.get_cohort_key(gestational, _risk(heat_wave=True))
+        
+        assert key == ('medium', 'second', ('diabetes', 'hypertension'), 'heat_wave')
+        assert MessageService.get_cohort_key(type_2, _risk(heat_wave=True)) == key
+    
+    def test_one_call_per_cohort(self, app, model):
+        pairs = [
+            (_patient(1, 'Anna Ivanova', weeks=14), _risk(temperature=31)),
+            (_patient(2, 'Maria Petrova', weeks=22), _risk(temperature=33)),
+            (_patient(3, 'Olga Sidorova', weeks=30), _risk('high'))
+        ]
+        
+        messages = MessageService.generate_cohort_messages(pairs)
+        
+        assert model.generate_content.call_count == 2
+        assert messages[0] == 'Уважаемая Anna, на 14 неделе при 31°C пейте больше воды.'
+        assert messages[1] == 'Уважаемая Maria, на 22 неделе при 33°C пейте больше воды.'
+        
+        MessageService.generate_cohort_messages(pairs)
+        assert model.generate_content.call_count == 2
+    
+    def test_unknown_slots_fall_back_to_default(self, app, model):
+        model.generate_content.return_value = Mock(text='Hello {patient_name}, your score is {risk_score}')
+        
+        message = MessageService.generate_personalized_message(_patient(1), _risk('high'))
+        
+        assert message == MessageService._get_default_message(_patient(1), _risk('high'))
+    
+    def test_format_spec_must_suit_the_slot_type(self, app, model):
+        model.generate_content.return_value = Mock(text='Уважаемая {first_name}, вам {age:s} лет.')
+        
+        message = MessageService.generate_personalized_message(_patient(1), _risk())
+        
+        assert message == MessageService._get_default_message(_patient(1), _risk())
+    
+    def test_unrenderable_patient_falls_back_to_default(self, app, model):
+        model.generate_content.return_value = Mock(text='Уважаемая {first_name}, вам {age:d} лет.')
+        no_age = _patient(2)
+        no_age.age = None
+        
+        messages = MessageService.generate_cohort_messages([(_patient(1), _risk()), (no_age, _risk())])
+        
+        assert messages[0] == 'Уважаемая Anna, вам 30 лет.'
+        assert messages[1] == MessageService._get_default_message(no_age, _risk())
+    
+    def test_gemini_error_falls_back_to_default(self, app, model):
+        model.generate_content.side_effect = RuntimeError('quota exceeded')
+        
+        messages = MessageService.generate_cohort_messages([(_patient(1), _risk()), (_patient(2), _risk())])
+        
+        assert messages == [MessageService._get_default_message(_patient(1), _risk())] * 2
+        assert model.generate_content.call_count == 1
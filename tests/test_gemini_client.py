@@ -0,0 +1,104 @@
+import os
+import sys
+import threading
+import pytest
+from unittest.mock import Mock, patch
+from app.services import gemini_client
+from app.services.ai_service import AIService
+from app.utils.exceptions import ExternalAPIException
+from tests.conftest import make_patient, make_risk_data
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from gemini_stub import start_stub_server
+
+
+@pytest.fixture
+def app_config():
+    return {'GEMINI_MODEL': 'gemini-test'}
+
+@pytest.fixture
+def app(app):
+    gemini_client.reset_models()
+    yield app
+    gemini_client.reset_models()
+
+@pytest.fixture
+def genai():
+    # _configure builds the service client eagerly; patch it so no real client is created
+    with patch('app.services.gemini_client.genai') as genai, \
+            patch('app.services.gemini_client.genai_client'):
+        genai.GenerativeModel.side_effect = lambda name: Mock(model_name=name)
+        yield genai
+
+class TestGeminiClient:
+    """Test cases for the shared Gemini model"""
+    
+    def test_model_is_reused(self, app, genai):
+        first = gemini_client.get_model()
+        second = gemini_client.get_model()
+        
+        assert first is second
+        assert first.model_name == 'gemini-test'
+        assert genai.configure.call_count == 1
+        assert genai.GenerativeModel.call_count == 1
+    
+    def test_one_model_per_name(self, app, genai):
+        default = gemini_client.get_model()
+        other = gemini_client.get_model('gemini-pro')
+        
+        assert default is not other
+        assert other is gemini_client.get_model('gemini-pro')
+        assert genai.configure.call_count == 1
+    
+    def test_changed_key_reconfigures(self, app, genai):
+        first = gemini_client.get_model()
+        app.config['GEMINI_API_KEY'] = 'rotated_key'
+        second = gemini_client.get_model()
+        
+        assert first is not second
+        assert genai.configure.call_count == 2
+        assert genai.configure.call_args.kwargs['api_key'] == 'rotated_key'
+    
+    def test_missing_key_raises(self, app, genai):
+        app.config['GEMINI_API_KEY'] = None
+        
+        with pytest.raises(ExternalAPIException, match="Gemini API key not configured"):
+            gemini_client.get_model()
+        assert genai.configure.call_count == 0
+    
+    def test_concurrent_first_calls_share_one_model(self, app, genai):
+        models = []
+        
+        def worker():
+            with app.app_context():
+                models.append(gemini_client.get_model())
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len({id(model) for model in models}) == 1
+        assert genai.configure.call_count == 1
+
+class TestGeminiStub:
+    """Test cases for calling the local Gemini stub through the shared model"""
+    
+    def test_recommendations_from_stub(self, app):
+        server = start_stub_server()
+        app.config.update(GEMINI_API_ENDPOINT=server.base_url, GEMINI_TRANSPORT='rest')
+        patient = make_patient(weeks_pregnant=30)
+        risk_data = make_risk_data('high', risk_score=7, weather_data={'temperature': 35})
+        
+        try:
+            first = AIService.get_risk_recommendations(patient, risk_data)
+            risk_data['risk_score'] = 8
+            AIService.get_risk_recommendations(patient, risk_data)
+        finally:
+            server.shutdown()
+            server.server_close()
+        
+        assert first['immediate_actions'] == ['Stay in a cool room', 'Drink water regularly']
+        assert server.request_counts() == {'/v1beta/models/gemini-test:generateContent': 2}
@@ -0,0 +1,92 @@
+import pytest
+from unittest.mock import patch, Mock
+from app import create_app
+from app.services import http_client
+from app.services.geocoding_service import GeocodingService
+from app.services.shared_cache import get_shared_cache
+from app.services.weather_service import WeatherService
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    app.config['WEATHER_API_KEY'] = 'test_api_key_12345'
+    with app.app_context():
+        WeatherService._breakers.clear()
+        get_shared_cache('geocoding').clear()
+        get_shared_cache('weather').clear()
+        yield app
+        WeatherService._breakers.clear()
+
+def _response(status_code, payload=None):
+    response = Mock(status_code=status_code)
+    response.json.return_value = payload
+    return response
+
+class TestGeocodingService:
+    """Test cases for zip to coordinate resolution"""
+    
+    def test_seed_dataset_lookup(self, app):
+        with patch.object(GeocodingService, '_fetch_coordinates') as fetch:
+            assert GeocodingService.get_coordinates('10001') == (40.7506, -73.9972)
+        fetch.assert_not_called()
+    
+    def test_api_miss_is_filled_and_cached(self, app):
+        session = http_client.get_weather_session()
+        with patch.object(session, 'get', return_value=_response(200, {'zip': '12345', 'lat': 42.81, 'lon': -73.94})) as get:
+            assert GeocodingService.get_coordinates('12345') == (42.81, -73.94)
+            assert GeocodingService.get_coordinates('12345') == (42.81, -73.94)
+        
+        assert get.call_count == 1
+        assert get.call_args[1]['params']['zip'] == '12345,US'
+    
+    def test_unknown_zip_is_negatively_cached(self, app):
+        session = http_client.get_weather_session()
+        with patch.object(session, 'get', return_value=_response(404)) as get:
+            assert GeocodingService.get_coordinates('00000') is None
+            assert GeocodingService.get_coordinates('00000') is None
+        
+        assert get.call_count == 1
+    
+    def test_geocoding_goes_through_a_circuit_breaker(self, app):
+        app.config['WEATHER_BREAKER_FAILURE_THRESHOLD'] = 2
+        session = http_client.get_weather_session()
+        with patch.object(session, 'get', return_value=_response(503)) as get:
+            for zip_code in ('12345', '23456', '34567'):
+                assert GeocodingService.get_coordinates(zip_code) is None
+        
+        assert get.call_count == 2
+        assert WeatherService.get_breaker_metrics()['/geo/1.0/zip']['state'] == 'open'
+        # Rejected by the open breaker, so not remembered as an unknown zip
+        assert get_shared_cache('geocoding').peek('34567') is None
+    
+    def test_onecall_uses_cell_coordinates(self, app):
+        session = http_client.get_weather_session()
+        payload = {'lat': 40.75, 'lon': -73.99, 'current': {'temp': 27.0, 'humidity': 40, 'weather': [{'description': 'clear sky'}]}}
+        with patch.object(session, 'get', return_value=_response(200, payload)) as get:
+            result = WeatherService.get_onecall_weather_data('10001')
+        
+        params = get.call_args[1]['params']
+        assert 'zip' not in params
+        cell = WeatherService.get_location_cell('10001')
+        assert (params['lat'], params['lon']) == (cell.lat, cell.lon)
+        assert result['description'] == 'clear sky'
+    
+    def test_onecall_metric_values_are_celsius(self, app):
+        session = http_client.get_weather_session()
+        payload = {
+            'lat': 40.75, 'lon': -73.99, 'timezone': 'America/New_York', 'timezone_offset': -14400,
+            'current': {
+                'dt': 1758459600, 'temp': 18.6, 'feels_like': 18.1, 'pressure': 1021, 'humidity': 62,
+                'dew_point': 11.2, 'uvi': 3.1, 'clouds': 40, 'visibility': 10000, 'wind_speed': 4.1,
+                'weather': [{'id': 802, 'main': 'Clouds', 'description': 'scattered clouds', 'icon': '03d'}]
+            }
+        }
+        with patch.object(session, 'get', return_value=_response(200, payload)):
+            result = WeatherService.get_weather_data('10001')
+        
+        assert result['temperature'] == 18.6
+        assert result['feels_like'] == 18.1
+        assert result['dew_point'] == 11.2
+        assert 15 < result['heat_index'] < 25
+        assert result['is_heat_wave'] is False
@@ -0,0 +1,96 @@
+import pytest
+import time
+from unittest.mock import patch
+from app import create_app
+from app.services.heat_wave_service import HeatWaveService
+from app.services.weather_service import WeatherService
+from app.utils import heat
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        WeatherService._get_cache().clear()
+        yield app
+
+def _document(hot_hours):
+    """OneCall document starting now; hours in `hot_hours` are at 38°C, the rest at 24°C"""
+    start = int(time.time())
+    return {
+        'lat': 40.625, 'lon': -73.875,
+        'current': {'dt': start, 'temp': 24, 'humidity': 50},
+        'hourly': [
+            {'dt': start + hour * 3600, 'temp': 38 if hour in hot_hours else 24, 'humidity': 40}
+            for hour in range(48)
+        ],
+        'daily': [
+            {'dt': start + day * 86400 + 43200, 'temp': {'day': 24}, 'humidity': 40}
+            for day in range(8)
+        ]
+    }
+
+class TestHeatWaveRuns:
+    """Test cases for the vectorized heat-wave run detection"""
+    
+    def test_runs_do_not_span_locations(self):
+        starts, ends, _ = heat.heat_wave_runs(
+            [0, 0, 0, 1, 1, 1],
+            [38, 38, 20, 38, 20, 38],
+            [40] * 6
+        )
+        
+        assert starts.tolist() == [0, 3, 5]
+        assert ends.tolist() == [1, 3, 5]
+    
+    def test_adjacent_locations_split_runs(self):
+        starts, ends, _ = heat.heat_wave_runs([0, 0, 1, 1], [38] * 4, [40] * 4)
+        
+        assert starts.tolist() == [0, 2]
+        assert ends.tolist() == [1, 3]
+
+class TestHeatWaveIndex:
+    """Test cases for the heat-wave lookahead index and patient join"""
+    
+    def _cache_documents(self):
+        cache = WeatherService._get_cache()
+        nyc = WeatherService.get_location_cell('10001')
+        la = WeatherService.get_location_cell('90001')
+        chicago = WeatherService.get_location_cell('60601')
+        cache.set(f"onecall:cell:{nyc.key}", _document(range(24, 33)), 600)
+        cache.set(f"onecall:cell:{la.key}", _document(range(0, 6)), 600)
+        cache.set(f"onecall:cell:{chicago.key}", _document([]), 600)
+        return nyc, la
+    
+    def test_index_records_windows_per_location(self, app):
+        nyc, la = self._cache_documents()
+        
+        index = HeatWaveService.rebuild_index()
+        
+        assert index['locations_scanned'] == 3
+        assert set(index['locations']) == {f"cell:{nyc.key}", f"cell:{la.key}"}
+        window = index['locations'][f"cell:{nyc.key}"][0]
+        assert window['end'] - window['start'] == 3 * 3 * 3600
+        assert window['peak_heat_index'] > 35
+    
+    def test_patients_are_joined_through_zip_postings(self, app):
+        self._cache_documents()
+        postings = {'10001': [1, 2], '10019': [3], '90001': [4], '60601': [5]}
+        
+        with patch('app.models.csv_models.csv_manager.get_patient_ids_by_zip', return_value=postings), \
+             patch.object(WeatherService, '_fetch_weather_data') as fetch:
+            soon = HeatWaveService.get_patients_facing_heat_wave(hours=12)
+            later = HeatWaveService.get_patients_facing_heat_wave(hours=72)
+        
+        fetch.assert_not_called()
+        assert [item['zip_code'] for item in soon['zip_codes']] == ['90001']
+        assert sorted(item['zip_code'] for item in later['zip_codes']) == ['10001', '10019', '90001']
+        assert later['total_patients'] == 4
+    
+    def test_index_is_cached(self, app):
+        self._cache_documents()
+        first = HeatWaveService.get_index()
+        
+        with patch.object(HeatWaveService, 'rebuild_index') as rebuild:
+            assert HeatWaveService.get_index()['built_at'] == first['built_at']
+        rebuild.assert_not_called()
@@ -0,0 +1,34 @@
+from unittest.mock import patch, Mock
+from app import create_app
+from app.services import http_client
+from app.services.weather_service import WeatherService
+
+
+def test_session_is_reused_per_name():
+    first = http_client.get_session('test-reuse')
+    assert http_client.get_session('test-reuse') is first
+    assert http_client.get_session('test-other') is not first
+
+def test_session_pool_and_retry_settings():
+    session = http_client.get_session('test-settings', pool_size=4, retries=3)
+    adapter = session.get_adapter('https://api.openweathermap.org')
+    
+    assert adapter._pool_maxsize == 4
+    assert adapter.max_retries.total == 3
+    assert adapter.max_retries.connect == 3
+    assert adapter.max_retries.read == 0
+    assert 503 in adapter.max_retries.status_forcelist
+
+def test_weather_calls_use_pooled_session_with_split_timeouts():
+    app = create_app('testing')
+    app.config.update(WEATHER_CONNECT_TIMEOUT=1.5, WEATHER_READ_TIMEOUT=4)
+    response = Mock(status_code=200)
+    response.json.return_value = {'main': {'temp': 20, 'humidity': 40}, 'dt': 1, 'name': 'Test City'}
+    
+    with app.app_context():
+        session = http_client.get_weather_session()
+        with patch.object(session, 'get', return_value=response) as get:
+            result = WeatherService.get_current_weather_data('10001')
+    
+    assert result['location']['name'] == 'Test City'
+    assert get.call_args[1]['timeout'] == (1.5, 4)
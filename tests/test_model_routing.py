@@ -0,0 +1,117 @@
+import json
+import time
+import pytest
+from unittest.mock import Mock, patch
+from app.services.ai_service import AIService
+from app.utils.metrics import LatencyWindow
+from tests.conftest import make_patient, make_risk_data
+
+
+@pytest.fixture
+def app_config():
+    return {
+        'GEMINI_MODEL': 'gemini-primary', 'GEMINI_FAST_MODEL': 'gemini-fast',
+        'AI_ROUTING_MIN_SAMPLES': 3, 'AI_ROUTING_P95_THRESHOLD_MS': 500
+    }
+
+@pytest.fixture
+def models():
+    models = {}
+    
+    def get_model(model_name=None):
+        if model_name not in models:
+            model = models[model_name] = Mock(model_name=f'models/{model_name}')
+            model.generate_content.return_value = Mock(text='{"immediate_actions": ["Rest"]}')
+        return models[model_name]
+    
+    with patch('app.services.ai_service.get_model', side_effect=get_model):
+        yield models
+
+class TestLatencyWindow:
+    """Test cases for rolling per-model latency stats"""
+    
+    def test_percentiles_and_errors(self):
+        window = LatencyWindow()
+        for elapsed in (0.1, 0.2, 0.3, 0.4, 1.0):
+            window.record('model', elapsed)
+        window.record('model', 2.0, ok=False)
+        
+        assert window.percentile('model', 50) == 0.3
+        assert window.percentile('model', 95) == 2.0
+        assert window.percentile('model', 95, min_samples=10) is None
+        stats = window.snapshot()['model']
+        assert stats['calls'] == 6
+        assert stats['errors'] == 1
+        assert stats['p90_ms'] == 2000.0
+    
+    def test_old_calls_age_out(self):
+        window = LatencyWindow(max_age=0.05)
+        window.record('model', 5.0)
+        time.sleep(0.06)
+        
+        assert window.percentile('model', 95) is None
+        assert window.snapshot()['model']['calls'] == 1
+
+class TestModelRouting:
+    """Test cases for routing AI calls by risk and primary-model latency"""
+    
+    def test_routes_by_risk_level(self, app, models):
+        AIService.get_risk_recommendations(make_patient(age=25), make_risk_data('medium'))
+        AIService.get_risk_recommendations(make_patient(age=30), make_risk_data('high'))
+        
+        assert models['gemini-fast'].generate_content.call_count == 1
+        assert models['gemini-primary'].generate_content.call_count == 1
+        metrics = AIService.get_model_metrics()['models']
+        assert metrics['gemini-fast']['calls'] == 1
+        assert metrics['gemini-primary']['calls'] == 1
+    
+    def test_slow_primary_sends_high_risk_to_fast_model(self, app, models):
+        for _ in range(3):
+            AIService.model_latency.record('gemini-primary', 0.9)
+        
+        assert AIService._select_model_name(['high']) == 'gemini-fast'
+        
+        app.config['AI_ROUTING_P95_THRESHOLD_MS'] = 1000
+        assert AIService._select_model_name(['high']) == 'gemini-primary'
+    
+    def test_batch_with_a_high_risk_patient_uses_primary(self, app, models):
+        assert AIService._select_model_name(['low', 'high', 'medium']) == 'gemini-primary'
+        assert AIService._select_model_name(['low', 'medium']) == 'gemini-fast'
+    
+    def test_batch_routes_each_risk_tier_separately(self, app, models):
+        patients = [make_patient(age=25), make_patient(age=30), make_patient(age=35)]
+        answer = {key: ['Rest'] for key, _ in AIService.RECOMMENDATION_KEYS}
+        fast = models['gemini-fast'] = Mock(model_name='models/gemini-fast')
+        fast.generate_content.return_value = Mock(text=json.dumps([dict(answer, patient_id='1'), dict(answer, patient_id='1-2')]))
+        
+        results = AIService.get_risk_recommendations_batch(patients, [make_risk_data('low'), make_risk_data('high'), make_risk_data('medium')])
+        
+        assert fast.generate_content.call_count == 1
+        assert models['gemini-primary'].generate_content.call_count == 1
+        assert results[0] == answer and results[2] == answer
+        
+        # The single-call path routes the low-risk patient to the same model and finds the batched answer
+        assert AIService.get_risk_recommendations(patients[0], make_risk_data('low')) == answer
+        assert fast.generate_content.call_count == 1
+    
+    def test_routing_can_be_disabled(self, app, models):
+        app.config['AI_ROUTING_ENABLED'] = False
+        
+        assert AIService._select_model_name(['low']) == 'gemini-primary'
+    
+    def test_errors_are_recorded(self, app, models):
+        models['gemini-fast'] = Mock(model_name='models/gemini-fast')
+        models['gemini-fast'].generate_content.side_effect = RuntimeError('quota exceeded')
+        
+        with pytest.raises(Exception):
+            AIService.get_risk_recommendations(make_patient(), make_risk_data('low'))
+        
+        assert AIService.get_model_metrics()['models']['gemini-fast']['errors'] == 1
+    
+    def test_admin_metrics_expose_models(self, app, models):
+        AIService.get_risk_recommendations(make_patient(), make_risk_data('low'))
+        
+        data = app.test_client().get('/api/admin/metrics').get_json()
+        
+        assert data['metrics']['ai_models']['routing']['fast_model'] == 'gemini-fast'
+        assert data['metrics']['ai_models']['models']['gemini-fast']['calls'] == 1
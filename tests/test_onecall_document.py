@@ -0,0 +1,133 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch, Mock
+from app import create_app
+from app.services import http_client
+from app.services.weather_service import WeatherService
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    app.config['WEATHER_API_KEY'] = 'test_api_key_12345'
+    with app.app_context():
+        WeatherService._breakers.clear()
+        WeatherService._get_cache().clear()
+        yield app
+
+def _onecall_document():
+    start = 1758456000
+    return {
+        'lat': 40.875, 'lon': -73.875, 'timezone': 'America/New_York', 'timezone_offset': -14400,
+        'current': {'dt': start, 'temp': 30, 'feels_like': 33, 'humidity': 60, 'weather': [{'description': 'clear sky'}]},
+        'hourly': [
+            {'dt': start + hour * 3600, 'temp': 30 + hour % 3, 'feels_like': 33, 'humidity': 60,
+             'pop': 0.1, 'wind_speed': 2.0, 'weather': [{'description': 'clear sky'}]}
+            for hour in range(48)
+        ],
+        'daily': [
+            {'dt': start + day * 86400 + 43200, 'temp': {'day': 32 + day}, 'feels_like': {'day': 35},
+             'humidity': 55, 'pop': 0.2, 'wind_speed': 3.0, 'weather': [{'description': 'sunny'}]}
+            for day in range(8)
+        ],
+        'alerts': [{'event': 'Heat Advisory', 'start': start, 'end': start + 86400}]
+    }
+
+def _response(payload):
+    response = Mock(status_code=200)
+    response.json.return_value = payload
+    return response
+
+class TestOneCallDocument:
+    """Test cases for the shared per-location OneCall document"""
+    
+    def test_dashboard_views_share_one_upstream_call(self, app):
+        session = http_client.get_weather_session()
+        with patch.object(session, 'get', return_value=_response(_onecall_document())) as get:
+            current = WeatherService.get_weather_data('10001')
+            forecast = WeatherService.get_weather_forecast('10001')
+            alerts = WeatherService.get_weather_alerts('10001')
+            onecall = WeatherService.get_onecall_weather_data('10019')
+        
+        assert get.call_count == 1
+        assert current['description'] == 'clear sky'
+        assert onecall['temperature'] == current['temperature']
+        # Both views read the same document in the same (metric) units
+        assert current['temperature'] == forecast['forecasts'][0]['temperature'] == 30
+        assert current['feels_like'] == forecast['forecasts'][0]['feels_like'] == 33
+        assert alerts['alert_count'] == 1
+        assert forecast['forecasts']
+    
+    def test_forecast_covers_requested_days(self, app):
+        forecast = WeatherService._process_onecall_forecast(_onecall_document(), days=5)['forecasts']
+        
+        # 16 three-hour slots from the hourly series, then one entry per remaining day
+        assert len(forecast) == 16 + 3
+        assert forecast[1]['datetime'] - forecast[0]['datetime'] == 3 * 3600
+        assert forecast[-1]['temperature'] == 36
+        assert len(WeatherService._process_onecall_forecast(_onecall_document(), days=1)['forecasts']) == 8
+    
+    def test_failed_document_is_negatively_cached(self, app):
+        session = http_client.get_weather_session()
+        with patch.object(session, 'get', return_value=Mock(status_code=500)) as get:
+            WeatherService.get_weather_alerts('10001')
+            WeatherService.get_weather_alerts('10001')
+        
+        onecall_calls = [call for call in get.call_args_list if call[0][0].endswith('/data/3.0/onecall')]
+        assert len(onecall_calls) == 1
+    
+    def test_force_refetches_document(self, app):
+        session = http_client.get_weather_session()
+        with patch.object(session, 'get', return_value=_response(_onecall_document())) as get:
+            WeatherService.refresh_weather_data('10001')
+            WeatherService.refresh_weather_data('10001', force=True)
+        
+        assert get.call_count == 2
+
+class TestVectorizedHeat:
+    """Test cases for the vectorized heat kernel and exposure scoring"""
+    
+    def test_kernel_matches_scalar_formula(self):
+        from app.utils import heat
+        
+        temperatures = [20, 28.5, 33, 36, 41]
+        humidities = [30, 80, 55, 20, 65]
+        heat_indexes, flags = heat.analyze_series(temperatures, humidities)
+        
+        for temperature, humidity, heat_index, flag in zip(temperatures, humidities, heat_indexes, flags):
+            assert heat_index == pytest.approx(WeatherService._calculate_heat_index(temperature, humidity))
+            assert flag == WeatherService._is_heat_wave(temperature, humidity)
+    
+    def test_heat_exposure_ranks_by_patient_exposure(self, app):
+        hot = _onecall_document()
+        mild = _onecall_document()
+        for item in mild['hourly']:
+            item['temp'] = 22
+        for item in mild['daily']:
+            item['temp']['day'] = 22
+        
+        cache = WeatherService._get_cache()
+        cache.set('onecall:cell:1:1', mild, 600)
+        cache.set('onecall:cell:2:2', hot, 600)
+        cache.set('onecall:cell:3:3', None, 60, is_fallback=True)
+        
+        exposure = WeatherService.get_heat_exposure(days=5, patient_counts={'cell:1:1': 10, 'cell:2:2': 3})
+        
+        assert [location['location'] for location in exposure['locations']] == ['cell:2:2', 'cell:1:1']
+        hot_location = exposure['locations'][0]
+        assert hot_location['degree_hours'] > 0
+        assert hot_location['patient_degree_hours'] == pytest.approx(hot_location['degree_hours'] * 3, abs=0.2)
+        assert exposure['locations'][1]['degree_hours'] == 0
+    
+    def test_heat_exposure_endpoint_does_not_geocode(self, app):
+        cell = WeatherService.get_location_cell('10001')
+        WeatherService._get_cache().set(f"onecall:cell:{cell.key}", _onecall_document(), 600)
+        patients = [SimpleNamespace(zip_code=zip_code) for zip_code in ('10001', '10001', '99999')]
+        
+        with patch('app.models.csv_models.csv_manager.get_all_patients', return_value=patients), \
+             patch('app.services.geocoding_service.GeocodingService._fetch_coordinates') as geocode:
+            data = app.test_client().get('/api/heat-exposure').get_json()
+        
+        geocode.assert_not_called()
+        assert data['heat_exposure']['unresolved_zip_codes'] == ['99999']
+        assert data['heat_exposure']['locations'][0]['patient_count'] == 2
@@ -0,0 +1,96 @@
+import pytest
+from app.services.ai_service import AIService
+from app.services.recommendation_engine import RecommendationEngine
+from app.utils.helpers import get_risk_recommendations
+from tests.conftest import make_patient, make_risk_data
+
+
+@pytest.fixture
+def app_config():
+    return {'AI_RULES_TIER_ENABLED': True}
+
+@pytest.fixture
+def model(model):
+    model.generate_content.return_value.text = '{"immediate_actions": ["Call your doctor"]}'
+    return model
+
+def _patient(pregnancy_icd10=None, comorbidity_icd10=None, medications=None, weeks=30):
+    return make_patient(
+        weeks_pregnant=weeks, pregnancy_icd10=pregnancy_icd10, comorbidity_icd10=comorbidity_icd10, medications=medications
+    )
+
+def _risk_data(risk_level='medium', heat_wave=False):
+    return make_risk_data(risk_level, heat_wave_risk=heat_wave, weather_data={'temperature': 28})
+
+class TestRecommendationEngine:
+    """Test cases for rule-based recommendations"""
+    
+    def test_fallback_lists(self):
+        english = RecommendationEngine.get_fallback_recommendations('high', {'heat_wave_risk': True})
+        russian = RecommendationEngine.get_fallback_recommendations('low', {}, 'ru')
+        
+        assert english[0] == "Immediate medical consultation recommended"
+        assert english[-1] == "Wear light, loose clothing"
+        assert len(english) == 8
+        assert russian == ["Продолжайте регулярное дородовое наблюдение", "Поддерживайте здоровую диету и физические упражнения",
+                           "Пейте достаточно воды", "Регулярные медицинские осмотры"]
+        
+        english.append('mutated')
+        assert len(RecommendationEngine.get_fallback_recommendations('high', {'heat_wave_risk': True})) == 8
+    
+    def test_helper_keeps_its_wording(self):
+        assert get_risk_recommendations('medium') == [
+            'Планируйте регулярные визиты к врачу', 'Ведите здоровый образ жизни', 'Следите за питанием'
+        ]
+        assert get_risk_recommendations('high', heat_wave=True)[-1] == 'Немедленно обратитесь к врачу при ухудшении самочувствия'
+    
+    def test_rules_cover_common_profiles(self, app):
+        patient = _patient(pregnancy_icd10='O24.4', medications='Folic acid')
+        
+        assert RecommendationEngine.get_novelty_reasons(patient, _risk_data()) == []
+        recommendations = RecommendationEngine.get_recommendations(patient, _risk_data(heat_wave=True))
+        
+        assert recommendations['source'] == 'rules'
+        assert recommendations['priority_level'] == 'Medium'
+        assert "Check blood glucose as prescribed" in recommendations['monitoring_guidelines']
+        assert "Count fetal movements daily" in recommendations['monitoring_guidelines']
+        assert recommendations['weather_precautions'][0] == "Stay indoors with air conditioning during peak heat"
+        assert all(key in recommendations for key, _ in AIService.RECOMMENDATION_KEYS)
+    
+    @pytest.mark.parametrize('patient, reason', [
+        (_patient(pregnancy_icd10='O14', comorbidity_icd10='I10'), 'multiple_high_risk_codes'),
+        (_patient(medications='Lithium carbonate'), 'teratogenic_medication'),
+        (_patient(comorbidity_icd10='G40.9'), 'uncovered_condition')
+    ])
+    def test_unusual_profiles_need_ai(self, app, patient, reason):
+        assert reason in RecommendationEngine.get_novelty_reasons(patient, _risk_data())
+        assert RecommendationEngine.needs_ai(patient, _risk_data())
+
+class TestTieredRecommendations:
+    """Test cases for sending only unusual profiles to Gemini"""
+    
+    def test_common_profile_makes_no_call(self, app, model):
+        recommendations = AIService.get_risk_recommendations(_patient(comorbidity_icd10='J45.9'), _risk_data())
+        
+        model.generate_content.assert_not_called()
+        assert recommendations['source'] == 'rules'
+    
+    def test_population_sends_only_novel_profiles(self, app, model):
+        pairs = [
+            (_patient(), _risk_data('low')),
+            (_patient(medications='Warfarin; Phenytoin'), _risk_data('high')),
+            (_patient(pregnancy_icd10='O13'), _risk_data())
+        ]
+        
+        results = AIService.get_risk_recommendations_for_patients(pairs)
+        
+        assert model.generate_content.call_count == 1
+        assert [result.get('source') for result in results] == ['rules', None, 'rules']
+        assert results[1]['immediate_actions'] == ['Call your doctor']
+    
+    def test_tier_can_be_disabled(self, app, model):
+        app.config['AI_RULES_TIER_ENABLED'] = False
+        
+        AIService.get_risk_recommendations(_patient(), _risk_data())
+        
+        model.generate_content.assert_called_once()
@@ -0,0 +1,75 @@
+import pytest
+import json
+from app import create_app
+from app.models.csv_models import CSVPatient
+from app.services import RiskAssessmentService
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    yield app
+    RiskAssessmentService.disable_instrumentation()
+    RiskAssessmentService.factor_metrics.reset()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def _make_patient():
+    return CSVPatient({
+        'id': 1,
+        'name': 'Test Patient',
+        'age': 32,
+        'pregnancy_icd10': 'O24.4',
+        'comorbidity_icd10': 'I10',
+        'weeks_pregnant': 30,
+        'zip_code': '10001',
+        'medications': 'Insulin; Folic acid',
+        'between_17_35': True
+    })
+
+def test_instrumentation_disabled_by_default():
+    RiskAssessmentService.assess_risk(_make_patient())
+    
+    assert not RiskAssessmentService.is_instrumentation_enabled()
+    assert RiskAssessmentService.get_factor_metrics()['factors'] == {}
+
+def test_instrumentation_records_factor_calls():
+    RiskAssessmentService.enable_instrumentation()
+    try:
+        for _ in range(3):
+            RiskAssessmentService.assess_risk(_make_patient())
+        
+        factors = RiskAssessmentService.get_factor_metrics()['factors']
+        assert factors['_calculate_age_risk']['calls'] == 3
+        assert factors['_calculate_medications_risk']['calls'] == 3
+        assert factors['_calculate_conditions_risk']['total_ms'] >= 0
+    finally:
+        RiskAssessmentService.disable_instrumentation()
+        RiskAssessmentService.factor_metrics.reset()
+
+def test_disable_restores_original_functions():
+    original = RiskAssessmentService.__dict__['_calculate_age_risk']
+    RiskAssessmentService.enable_instrumentation()
+    assert RiskAssessmentService.__dict__['_calculate_age_risk'] is not original
+    
+    RiskAssessmentService.disable_instrumentation()
+    assert RiskAssessmentService.__dict__['_calculate_age_risk'] is original
+    assert RiskAssessmentService.assess_risk(_make_patient())['risk_level'] == 'high'
+
+def test_admin_metrics_endpoint(client):
+    response = client.post('/api/admin/metrics/risk-factors', json={'enabled': True})
+    assert response.status_code == 200
+    assert json.loads(response.data)['risk_factors']['enabled'] == True
+    
+    RiskAssessmentService.assess_risk(_make_patient())
+    
+    response = client.get('/api/admin/metrics')
+    data = json.loads(response.data)
+    assert data['success'] == True
+    assert data['metrics']['risk_factors']['factors']['_calculate_location_risk']['calls'] == 1
+    
+    response = client.post('/api/admin/metrics/risk-factors', json={'enabled': False, 'reset': True})
+    data = json.loads(response.data)
+    assert data['risk_factors'] == {'enabled': False, 'factors': {}}
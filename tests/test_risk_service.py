@@ -0,0 +1,69 @@
+from unittest.mock import patch
+from app.models.csv_models import CSVPatient
+from app.services import RiskAssessmentService
+
+
+def _make_patient(**overrides):
+    data = {
+        'id': 1,
+        'name': 'Test Patient',
+        'age': 36,
+        'pregnancy_icd10': 'O24.4',
+        'comorbidity_icd10': '',
+        'weeks_pregnant': 30,
+        'zip_code': '10001',
+        'medications': '',
+        'between_17_35': False
+    }
+    data.update(overrides)
+    return CSVPatient(data)
+
+class TestRecommendationBlocks:
+    """Test cases for cached comprehensive assessment recommendations"""
+    
+    def test_comprehensive_assessment_recommendations(self):
+        result = RiskAssessmentService.get_comprehensive_risk_assessment(_make_patient())
+        
+        assert result['weather_analysis']['risk_level'] == 'low'
+        assert result['overall_assessment']['monitoring_needs'] == [
+            "Increased monitoring due to third trimester",
+            "Age-related risk factors require closer monitoring",
+            "Medical conditions require specialized monitoring"
+        ]
+        assert result['recommendations'] == [
+            "More frequent prenatal check-ups recommended",
+            "Consider additional prenatal care due to age",
+            "Follow medical provider's specific instructions"
+        ]
+    
+    def test_heat_wave_weather_bucket(self):
+        factors = RiskAssessmentService._calculate_additional_risk_factors(
+            _make_patient(weeks_pregnant=8, age=25, pregnancy_icd10=''),
+            {'temperature': 38, 'humidity': 85, 'is_heat_wave': True}
+        )
+        
+        assert factors['weather_risk'] == {'level': 'high', 'score': 3}
+        assert factors['immediate_concerns'] == ["Extreme heat wave conditions"]
+        assert factors['weather_recommendations'][-1] == "High humidity increases heat stress - take extra precautions"
+        assert factors['monitoring_needs'] == ["Early pregnancy monitoring important"]
+    
+    def test_blocks_are_shared_and_immutable(self):
+        key = (('mild', 'normal'), 'third', 'outside', True)
+        block = RiskAssessmentService._get_recommendation_block(*key)
+        
+        assert RiskAssessmentService._get_recommendation_block(*key) is block
+        assert isinstance(block.monitoring_needs, tuple)
+        
+        # Callers get their own lists, so mutating a response never touches the cache
+        factors = RiskAssessmentService._calculate_additional_risk_factors(_make_patient(), {})
+        factors['monitoring_needs'].append('extra')
+        assert 'extra' not in block.monitoring_needs
+    
+    def test_error_path_reuses_basic_assessment(self):
+        patient = _make_patient()
+        with patch.object(RiskAssessmentService, '_calculate_additional_risk_factors', side_effect=ValueError('boom')), \
+                patch.object(RiskAssessmentService, 'assess_risk', wraps=RiskAssessmentService.assess_risk) as assess:
+            result = RiskAssessmentService.get_comprehensive_risk_assessment(patient)
+        
+        assert result['error'] == 'Comprehensive assessment unavailable'
+        assert assess.call_count == 1
@@ -42,11 +42,11 @@ class TestWeatherService:
                 "dt": 1758460450,
                 "sunrise": 1758456226,
                 "sunset": 1758500074,
-                "temp": 295.19,  # 22.04°C
-                "feels_like": 295.77,  # 22.62°C
+                "temp": 22.04,
+                "feels_like": 22.62,
                 "pressure": 1015,
                 "humidity": 89,
-                "dew_point": 293.29,  # 20.14°C
+                "dew_point": 20.14,
                 "uvi": 0.21,
                 "clouds": 0,
                 "visibility": 10000,
@@ -83,7 +83,7 @@ class TestWeatherService:
         assert call_args[1]['params']['units'] == 'metric'
         
         # Verify response processing
-        assert result['temperature'] == 22.0  # Converted from Kelvin
+        assert result['temperature'] == 22.0
         assert result['feels_like'] == 22.6
         assert result['humidity'] == 89
         assert result['pressure'] == 1015
@@ -240,11 +240,11 @@ class TestWeatherService:
             "timezone_offset": -18000,
             "current": {
                 "dt": 1758460450,
-                "temp": 310.15,  # 37°C - should trigger heat wave
-                "feels_like": 315.15,  # 42°C
+                "temp": 37.0,  # should trigger heat wave
+                "feels_like": 42.0,
                 "pressure": 1015,
                 "humidity": 85,
-                "dew_point": 300.15,
+                "dew_point": 27.0,
                 "uvi": 8.5,
                 "clouds": 10,
                 "visibility": 10000,
@@ -335,11 +335,11 @@ class TestWeatherService:
             "timezone_offset": -18000,
             "current": {
                 "dt": 1758460450,
-                "temp": 295.19,
-                "feels_like": 295.77,
+                "temp": 22.04,
+                "feels_like": 22.62,
                 "pressure": 1015,
                 "humidity": 89,
-                "dew_point": 293.29,
+                "dew_point": 20.14,
                 "uvi": 0.21,
                 "clouds": 0,
                 "visibility": 10000,
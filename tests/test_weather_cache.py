@@ -0,0 +1,242 @@
+import pytest
+import threading
+import time
+from unittest.mock import patch
+from app import create_app
+from app.services.shared_cache import SharedCache, get_shared_cache
+from app.services.weather_service import WeatherService
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        WeatherService._get_cache().clear()
+        yield app
+
+def _weather(temperature):
+    data = WeatherService._get_default_weather_data()
+    data.update({'temperature': temperature, 'timestamp': 1758460450, 'description': 'clear sky'})
+    return data
+
+class TestSharedCache:
+    """Test cases for the SQLite-backed shared cache"""
+    
+    def test_set_and_get(self, tmp_path):
+        cache = SharedCache(str(tmp_path / 'cache.sqlite3'), 'test')
+        cache.set('key', {'value': 1}, ttl=60)
+        
+        entry = cache.get('key')
+        assert entry.value == {'value': 1}
+        assert entry.is_fallback == False
+        assert cache.stats()['hits'] == 1
+    
+    def test_entries_expire(self, tmp_path):
+        cache = SharedCache(str(tmp_path / 'cache.sqlite3'), 'test')
+        cache.set('key', {'value': 1}, ttl=0.05)
+        time.sleep(0.1)
+        
+        assert cache.get('key') is None
+        stats = cache.stats()
+        assert stats['misses'] == 1
+        assert stats['expired'] == 1
+        assert stats['entries'] == 0
+    
+    def test_entries_are_shared_between_instances(self, tmp_path):
+        path = str(tmp_path / 'cache.sqlite3')
+        SharedCache(path, 'test').set('key', [1, 2, 3], ttl=60)
+        
+        assert SharedCache(path, 'test').get('key').value == [1, 2, 3]
+        assert SharedCache(path, 'other').get('key') is None
+
+class TestWeatherCache:
+    """Test cases for WeatherService caching"""
+    
+    def test_weather_data_is_cached(self, app):
+        with patch.object(WeatherService, '_fetch_weather_data', return_value=_weather(31.5)) as fetch:
+            first = WeatherService.get_weather_data('10001')
+            second = WeatherService.get_weather_data('10001')
+        
+        assert fetch.call_count == 1
+        assert first == second
+        assert second['temperature'] == 31.5
+        
+        metrics = WeatherService.get_cache_metrics()
+        assert metrics['hits'] == 1
+        assert metrics['entries'] == 1
+        assert metrics['fallback_entries'] == 0
+    
+    def test_fallback_data_uses_short_ttl(self, app):
+        app.config['WEATHER_CACHE_FALLBACK_TTL'] = 0.05
+        default = WeatherService._get_default_weather_data()
+        
+        with patch.object(WeatherService, '_fetch_weather_data', return_value=default) as fetch:
+            WeatherService.get_weather_data('10001')
+            assert WeatherService.get_cache_metrics()['fallback_entries'] == 1
+            time.sleep(0.1)
+            WeatherService.get_weather_data('10001')
+        
+        assert fetch.call_count == 2
+    
+    
+    def test_nearby_zips_share_one_fetch(self, app):
+        with patch.object(WeatherService, '_fetch_weather_data', return_value=_weather(29.0)) as fetch:
+            for zip_code in ['10001', '10019', '10025', '10451', '10002', '10003', '10011', '11201']:
+                WeatherService.get_weather_data(zip_code)
+        
+        # Eight Manhattan/Bronx/Brooklyn zips fall into two grid cells
+        assert fetch.call_count == 2
+        assert WeatherService.get_cache_metrics()['entries'] == 2
+    
+    def test_location_cells(self, app):
+        cell = WeatherService.get_location_cell('10001')
+        
+        assert cell.key == WeatherService.get_location_cell('10451').key
+        assert cell.key != WeatherService.get_location_cell('90001').key
+        assert abs(cell.lat - 40.7506) <= 0.125 and abs(cell.lon + 73.9972) <= 0.125
+        assert WeatherService.get_location_key('10001') == f"cell:{cell.key}"
+    
+    def test_group_zips_by_location(self, app):
+        with patch('app.services.geocoding_service.GeocodingService._fetch_coordinates', return_value=None):
+            groups = WeatherService.group_zips_by_location(['10001', '10019', '90001', '00000'])
+        
+        assert len(groups) == 3
+        assert groups['zip:00000'] == ['00000']
+
+class TestWeatherFanout:
+    """Test cases for concurrent multi-location weather lookups"""
+    
+    def test_fetches_each_location_once(self, app):
+        with patch.object(WeatherService, '_fetch_weather_data', return_value=_weather(30.0)) as fetch:
+            batch = WeatherService.get_weather_for_zips(['10001', '10019', '10002', '90001', '10001'])
+        
+        assert fetch.call_count == 3
+        assert batch.failed == []
+        assert set(batch.weather) == {'10001', '10019', '10002', '90001'}
+        assert batch.weather['10019']['temperature'] == 30.0
+    
+    def test_deadline_returns_partial_results(self, app):
+        def slow_fetch(zip_code, force=False):
+            if zip_code == '90001':
+                time.sleep(0.5)
+            return _weather(30.0)
+        
+        with patch.object(WeatherService, '_fetch_weather_data', side_effect=slow_fetch):
+            started = time.time()
+            batch = WeatherService.get_weather_for_zips(['10001', '90001'], deadline=0.2)
+        
+        assert time.time() - started < 0.45
+        assert set(batch.weather) == {'10001'}
+        assert batch.failed == ['90001']
+    
+    def test_deadline_covers_geocoding(self, app):
+        get_shared_cache('geocoding').clear()
+        zip_codes = ['12345', '23456', '34567', '45678']
+        
+        def slow_geocode(zip_code):
+            time.sleep(0.3)
+            return None
+        
+        with patch('app.services.geocoding_service.GeocodingService._fetch_coordinates', side_effect=slow_geocode), \
+             patch.object(WeatherService, '_fetch_weather_data', return_value=_weather(30.0)):
+            started = time.time()
+            batch = WeatherService.get_weather_for_zips(zip_codes, deadline=0.1)
+            elapsed = time.time() - started
+            # Let the late fetches finish while the upstream calls are still patched
+            time.sleep(0.5)
+        
+        assert elapsed < 0.3
+        assert batch.failed == zip_codes
+    
+    def test_failed_fetches_are_reported(self, app):
+        default = WeatherService._get_default_weather_data()
+        
+        with patch.object(WeatherService, '_fetch_weather_data', return_value=default) as fetch:
+            batch = WeatherService.get_weather_for_zips(['10001', '10019'])
+            again = WeatherService.get_weather_for_zips(['10001'])
+        
+        assert fetch.call_count == 1
+        assert batch.weather == {}
+        assert batch.failed == ['10001', '10019']
+        assert again.failed == ['10001']
+
+class TestStaleWhileRevalidate:
+    """Test cases for serving expired weather while it refreshes in the background"""
+    
+    def _wait_for_refresh(self, zip_code):
+        deadline = time.time() + 5
+        while WeatherService.peek_cache_entry(zip_code).expires_at < time.time() and time.time() < deadline:
+            time.sleep(0.01)
+    
+    def test_fresh_reads_carry_metadata(self, app):
+        with patch.object(WeatherService, '_fetch_weather_data', return_value=_weather(31.0)):
+            data = WeatherService.get_weather_data('10001')
+        
+        assert data['stale'] is False
+        assert data['as_of'] is not None
+    
+    def test_expired_entry_is_served_stale_and_refreshed_once(self, app):
+        app.config['WEATHER_CACHE_TTL'] = 0.05
+        with patch.object(WeatherService, '_fetch_weather_data', return_value=_weather(31.0)):
+            first = WeatherService.get_weather_data('10001')
+        time.sleep(0.1)
+        
+        app.config['WEATHER_CACHE_TTL'] = 600
+        release = threading.Event()
+        
+        def slow_fetch(zip_code, force=False):
+            release.wait(5)
+            return _weather(33.0)
+        
+        with patch.object(WeatherService, '_fetch_weather_data', side_effect=slow_fetch) as fetch:
+            stale = WeatherService.get_weather_data('10001')
+            again = WeatherService.get_weather_data('10019')
+            release.set()
+            self._wait_for_refresh('10001')
+            fresh = WeatherService.get_weather_data('10001')
+        
+        assert stale['temperature'] == 31.0 and stale['stale'] is True
+        assert stale['as_of'] == first['as_of']
+        assert again['stale'] is True
+        assert fetch.call_count == 1
+        assert fresh['temperature'] == 33.0 and fresh['stale'] is False
+    
+    def test_failed_revalidation_keeps_stale_entry(self, app):
+        app.config['WEATHER_CACHE_TTL'] = 0.05
+        with patch.object(WeatherService, '_fetch_weather_data', return_value=_weather(31.0)):
+            first = WeatherService.get_weather_data('10001')
+        time.sleep(0.1)
+        
+        default = WeatherService._get_default_weather_data()
+        refresh_key = f"refresh:current:{WeatherService.get_location_key('10001')}"
+        with patch.object(WeatherService, '_fetch_weather_data', return_value=default) as fetch:
+            stale = WeatherService.get_weather_data('10001')
+            deadline = time.time() + 5
+            while WeatherService._get_cache().peek(refresh_key) is not None and time.time() < deadline:
+                time.sleep(0.01)
+            again = WeatherService.get_weather_data('10001')
+        
+        assert fetch.call_count == 1
+        for data in (stale, again):
+            assert data['temperature'] == 31.0 and data['stale'] is True
+            assert data['as_of'] == first['as_of']
+    
+    def test_entries_past_max_staleness_are_fetched(self, app):
+        app.config.update(WEATHER_CACHE_TTL=0.05, WEATHER_MAX_STALENESS=0)
+        with patch.object(WeatherService, '_fetch_weather_data', return_value=_weather(31.0)):
+            WeatherService.get_weather_data('10001')
+        time.sleep(0.1)
+        
+        with patch.object(WeatherService, '_fetch_weather_data', return_value=_weather(33.0)) as fetch:
+            data = WeatherService.get_weather_data('10001')
+        
+        assert fetch.call_count == 1
+        assert data['temperature'] == 33.0 and data['stale'] is False
+    
+    def test_cache_add_is_a_lease(self, tmp_path):
+        cache = SharedCache(str(tmp_path / 'cache.sqlite3'), 'test')
+        
+        assert cache.add('lease', 1, ttl=0.05) is True
+        assert cache.add('lease', 2, ttl=0.05) is False
+        time.sleep(0.1)
+        assert cache.add('lease', 3, ttl=60) is True
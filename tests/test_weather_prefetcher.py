@@ -0,0 +1,125 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+from app import create_app
+from app.models.csv_models import CSVPatient
+from app.services import http_client
+from app.services.risk_service import RiskAssessmentService
+from app.services.weather_service import WeatherService
+from app.services.weather_prefetcher import WeatherPrefetcher
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing')
+    app.config['WEATHER_PREFETCH_MAX_CALLS_PER_MINUTE'] = 0
+    app.config['WEATHER_PREFETCH_LOCK_FILE'] = str(tmp_path / 'weather_prefetch.lock')
+    with app.app_context():
+        WeatherService._get_cache().clear()
+        yield app
+
+def _patients(*zip_codes):
+    return [SimpleNamespace(zip_code=zip_code) for zip_code in zip_codes]
+
+def _onecall_document(temperature, humidity):
+    """OneCall payload as the API returns it with units=metric"""
+    return {
+        'lat': 40.75, 'lon': -73.99, 'timezone': 'America/New_York', 'timezone_offset': -14400,
+        'current': {
+            'dt': 1758459600, 'temp': temperature, 'feels_like': temperature - 0.5, 'pressure': 1019,
+            'humidity': humidity, 'dew_point': 12.4, 'uvi': 2.5, 'clouds': 20, 'visibility': 10000,
+            'wind_speed': 3.2, 'weather': [{'id': 801, 'main': 'Clouds', 'description': 'few clouds', 'icon': '02d'}]
+        }
+    }
+
+def _weather(temperature):
+    data = WeatherService._get_default_weather_data()
+    data.update({'temperature': temperature, 'description': 'clear sky'})
+    return data
+
+class TestWeatherPrefetcher:
+    """Test cases for the background weather prefetcher"""
+    
+    def test_cycle_refreshes_each_location_once(self, app):
+        prefetcher = WeatherPrefetcher(app)
+        patients = _patients('10001', '10019', '10002', '10001')
+        
+        with patch('app.models.csv_models.csv_manager.get_all_patients', return_value=patients), \
+             patch.object(WeatherService, '_fetch_weather_data', return_value=_weather(31)) as mock_fetch:
+            stats = prefetcher.run_cycle()
+        
+        assert mock_fetch.call_count == 2
+        assert stats['zip_codes'] == 3
+        assert stats['locations'] == 2
+        assert stats['refreshed'] == 2
+        assert WeatherService.get_cached_weather('10019')['temperature'] == 31
+    
+    def test_cycle_skips_fresh_entries(self, app):
+        prefetcher = WeatherPrefetcher(app)
+        patients = _patients('10001', '10002')
+        
+        with patch('app.models.csv_models.csv_manager.get_all_patients', return_value=patients), \
+             patch.object(WeatherService, '_fetch_weather_data', return_value=_weather(31)) as mock_fetch:
+            prefetcher.run_cycle()
+            stats = prefetcher.run_cycle()
+        
+        assert mock_fetch.call_count == 2
+        assert stats['refreshed'] == 0
+        assert stats['skipped_fresh'] == 2
+    
+    def test_only_one_prefetcher_holds_the_lock(self, app):
+        first = WeatherPrefetcher(app)
+        second = WeatherPrefetcher(app)
+        try:
+            assert first._acquire_lock() is True
+            assert second._acquire_lock() is False
+        finally:
+            first._release_lock()
+        
+        assert second._acquire_lock() is True
+        second._release_lock()
+
+class TestCachedWeatherReads:
+    """Test cases for cache-only weather reads on the request path"""
+    
+    def test_cache_miss_returns_default_without_fetching(self, app):
+        with patch.object(WeatherService, '_fetch_weather_data') as mock_fetch:
+            data = WeatherService.get_cached_weather('10001')
+        
+        mock_fetch.assert_not_called()
+        assert WeatherService._is_default_weather_data(data)
+        assert data['as_of'] is None
+    
+    def test_assess_risk_uses_cached_weather(self, app):
+        from app.services.risk_service import RiskAssessmentService
+        
+        with patch.object(WeatherService, '_fetch_weather_data', return_value=_weather(36)):
+            WeatherService.refresh_weather_data('10001')
+        
+        patient = SimpleNamespace(
+            zip_code='10001', age=25, is_pregnant=True, pregnancy_week=30,
+            conditions=[], medications=[], between_17_35=True,
+            _calculate_trimester=lambda: 3
+        )
+        with patch.object(WeatherService, '_fetch_weather_data') as mock_fetch:
+            risk = RiskAssessmentService.assess_risk(patient)
+        
+        mock_fetch.assert_not_called()
+        assert risk['weather_data']['temperature'] == 36
+        assert risk['weather_stale'] is False
+        assert risk['weather_as_of'] is not None
+    
+    def test_warm_cache_does_not_change_risk_on_a_mild_day(self, app):
+        patient = CSVPatient({'id': 1, 'name': 'Patient 1', 'age': 25, 'weeks_pregnant': 20, 'zip_code': '10001'})
+        cold = RiskAssessmentService.assess_risk(patient)
+        
+        response = Mock(status_code=200)
+        response.json.return_value = _onecall_document(21.4, 58)
+        with patch.object(http_client.get_weather_session(), 'get', return_value=response):
+            WeatherService.refresh_weather_data('10001')
+        warm = RiskAssessmentService.assess_risk(patient)
+        
+        assert warm['weather_data']['temperature'] == 21.4
+        assert warm['heat_wave_risk'] is False
+        assert warm['factors']['location_risk'] == cold['factors']['location_risk']
+        assert (warm['risk_level'], warm['risk_score']) == (cold['risk_level'], cold['risk_score'])
@@ -0,0 +1,62 @@
+import os
+import sys
+import pytest
+from app import create_app
+from app.services.weather_service import WeatherService
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from weather_stub import start_stub_server
+
+
+@pytest.fixture
+def stub():
+    server = start_stub_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def app(stub):
+    app = create_app('testing')
+    app.config.update(WEATHER_API_BASE_URL=stub.base_url, WEATHER_API_KEY='stub')
+    with app.app_context():
+        WeatherService._breakers.clear()
+        WeatherService._get_cache().clear()
+        yield app
+        WeatherService._breakers.clear()
+
+class TestWeatherStub:
+    """Test cases for running the weather service against the local stub"""
+    
+    def test_replays_recorded_onecall(self, app, stub):
+        client = app.test_client()
+        
+        weather = client.get('/api/weather/10001').get_json()
+        alerts = client.get('/api/weather-alerts/10001').get_json()
+        forecast = client.get('/api/weather-forecast/10001').get_json()
+        
+        assert weather['success'] and alerts['success'] and forecast['success']
+        assert alerts['alerts']['alert_count'] == 1
+        assert len(forecast['forecast']['forecasts']) > 16
+        assert stub.request_counts() == {'/data/3.0/onecall': 1}
+    
+    def test_recorded_onecall_is_read_as_celsius(self, app, stub):
+        weather = WeatherService.get_weather_data('10001')
+        
+        assert weather['temperature'] == 33.4
+        assert weather['feels_like'] == 38.9
+        assert weather['dew_point'] == 23.8
+        assert 30 < weather['heat_index'] < 50
+    
+    def test_injected_failures_fall_back_to_current_weather(self, app, stub):
+        stub.failure_rate = 1.0
+        
+        data = WeatherService.get_weather_data('10001')
+        
+        assert WeatherService._is_default_weather_data(data)
+        # The pooled session may retry 503s, so only check both endpoints were tried and failed
+        counts = stub.request_counts()
+        assert counts['/data/3.0/onecall'] >= 1
+        assert counts['/data/2.5/weather'] >= 1
+        assert counts['failures'] == counts['/data/3.0/onecall'] + counts['/data/2.5/weather']